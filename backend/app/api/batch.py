@@ -4,6 +4,7 @@ Batch forecast API endpoints with auto-partitioning
 """
 
 from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Form
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 import json
@@ -17,11 +18,32 @@ from app.models import BatchJob
 from app.schemas import ForecastConfig
 from app.tasks.batch_task import run_batch_forecast_task
 from app.core.batch_processor import BatchProcessor
-from app.core.preprocessing import load_and_normalize
+from app.core.upload_cache import load_normalized_cached
 
 router = APIRouter(prefix="/api/batch", tags=["Batch Forecast"])
 
 
+def plan_path_for(batch_id: str) -> Path:
+    """Lokasi partition plan yang dipakai ulang oleh batch task"""
+    return Path("uploads") / batch_id / "plan.json"
+
+
+def _plan_batch(file_path: str, dayfirst: bool, partition_strategy: str,
+                max_rows_per_partition: int, batch_id: str, chunk_rows: int = None) -> dict:
+    """Load + analyze + partition (blocking, dijalankan di thread pool)"""
+    df = load_normalized_cached(file_path, dayfirst=dayfirst, chunk_rows=chunk_rows)
+    
+    processor = BatchProcessor(
+        max_rows_per_job=max_rows_per_partition,
+        partition_by=partition_strategy,
+        max_partitions=20
+    )
+    
+    plan = processor.build_plan(df)
+    processor.save_plan(plan, plan_path_for(batch_id))
+    return plan
+
+
 @router.post("/submit")
 async def submit_batch_forecast(
     file: UploadFile = File(..., description="CSV file with demand data"),
@@ -71,19 +93,18 @@ async def submit_batch_forecast(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
     
-    # Analyze data untuk partition planning
+    batch_id = str(uuid4())
+    
+    # Analyze data untuk partition planning (di thread pool supaya event loop tidak blocking)
     try:
-        df = load_and_normalize(str(file_path), dayfirst=forecast_config.dayfirst)
-        
-        processor = BatchProcessor(
-            max_rows_per_job=max_rows_per_partition,
-            partition_by=partition_strategy,
-            max_partitions=20
+        plan = await run_in_threadpool(
+            _plan_batch, str(file_path), forecast_config.dayfirst,
+            partition_strategy, max_rows_per_partition, batch_id,
+            forecast_config.ingest_chunk_rows
         )
-        
-        analysis = processor.analyze_data(df)
-        partitions = processor.create_partitions(df)
-        time_estimate = processor.estimate_processing_time(partitions)
+        analysis = plan['analysis']
+        time_estimate = plan['time_estimate']
+        total_partitions = len(plan['partitions'])
         
     except Exception as e:
         # Cleanup file if analysis fails
@@ -92,15 +113,13 @@ async def submit_batch_forecast(
         raise HTTPException(status_code=400, detail=f"Data analysis failed: {str(e)}")
     
     # Create batch job record
-    batch_id = str(uuid4())
-    
     batch_job = BatchJob(
         batch_id=batch_id,
         original_filename=file.filename,
         original_file_path=str(file_path),
         config=forecast_config.dict(),
         partition_strategy=partition_strategy,
-        total_partitions=len(partitions),
+        total_partitions=total_partitions,
         max_execution_time=max_execution_time,
         status='QUEUED',
         progress=0
@@ -124,7 +143,7 @@ async def submit_batch_forecast(
                 "total_rows": analysis['total_rows'],
                 "unique_sites": analysis['unique_sites'],
                 "unique_partnumbers": analysis['unique_partnumbers'],
-                "total_partitions": len(partitions),
+                "total_partitions": total_partitions,
                 "partition_strategy": partition_strategy,
                 "estimated_time_seconds": time_estimate['parallel_total_seconds'],
                 "estimated_time_minutes": round(time_estimate['parallel_total_seconds'] / 60, 1),
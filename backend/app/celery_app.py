@@ -4,6 +4,7 @@ Celery configuration for background tasks
 """
 
 from celery import Celery
+from celery.signals import worker_process_init
 import os
 
 # Get broker URL from environment
@@ -31,6 +32,15 @@ celery_app.conf.update(
     worker_max_tasks_per_child=50,  # Restart worker after 50 tasks to prevent memory leaks
 )
 
+
+
+@worker_process_init.connect
+def warm_model_cache_on_start(**kwargs):
+    """Load model sekali per worker process supaya task pertama tidak unpickle"""
+    from app.core.model_cache import warm_model_cache
+    warm_model_cache(os.getenv("MODEL_WARMUP_PATH", "models/best_model.pkl"))
+
+
 # Auto-discover tasks
 celery_app.autodiscover_tasks(['app.tasks'])
 
@@ -4,11 +4,23 @@ Batch processing untuk handle large datasets
 Auto-partition data dan run parallel jobs
 """
 
+import os
+import json
 import pandas as pd
 from pathlib import Path
 from typing import List, Dict, Tuple
 import numpy as np
 
+try:
+    import pyarrow.feather as feather
+except ImportError:  # write_partitions / read_partition butuh pyarrow
+    feather = None
+
+
+PARTITIONS_FILE = 'partitions.arrow'
+PARTITIONS_INDEX = 'partitions.json'
+SERIES_KEYS = ['partnumber', 'site_code']
+
 
 class BatchProcessor:
     """
@@ -23,7 +35,7 @@ class BatchProcessor:
         """
         Args:
             max_rows_per_job: Maximum rows per job (optimal: 1000-3000)
-            partition_by: 'site' atau 'auto' (by site recommended)
+            partition_by: 'site' atau 'auto' (by size, batas partition di antara series)
             max_partitions: Maximum number of partitions to create
         """
         self.max_rows_per_job = max_rows_per_job
@@ -37,7 +49,9 @@ class BatchProcessor:
         unique_sites = df['site_code'].nunique()
         unique_parts = df['partnumber'].nunique()
         
-        site_distribution = df['site_code'].value_counts().to_dict()
+        # Categorical site_code: value_counts ikut menghitung category yang tidak muncul (0)
+        site_counts = df['site_code'].value_counts()
+        site_distribution = site_counts[site_counts > 0].to_dict()
         
         return {
             'total_rows': total_rows,
@@ -61,6 +75,7 @@ class BatchProcessor:
             {
                 'partition_id': int,
                 'data': DataFrame,
+                'selector': dict,
                 'metadata': {
                     'rows': int,
                     'sites': List[str],
@@ -69,129 +84,101 @@ class BatchProcessor:
                 }
             }
         """
+        partitions = []
+        selectors = self._partition_selectors(df)
+        series_ids = self._series_ids(df, selectors)
+        for partition_id, selector in enumerate(selectors):
+            data = df if selector.get('all') else df.take(self._selector_rows(df, selector, series_ids))
+            partitions.append({
+                'partition_id': partition_id,
+                'data': data,
+                'selector': selector,
+                'metadata': self._get_partition_metadata(data, partition_id)
+            })
+        
+        return partitions
+    
+    def _partition_selectors(self, df: pd.DataFrame) -> List[Dict]:
+        """Selector per partition ({'all'}, {'sites'} atau {'series'}), tanpa slicing data"""
         analysis = self.analyze_data(df)
         
         # Jika data kecil, tidak perlu partition
         if not analysis['needs_partitioning']:
-            return [{
-                'partition_id': 0,
-                'data': df,
-                'metadata': self._get_partition_metadata(df, 0)
-            }]
+            return [{'all': True}]
         
         # Partition by site (recommended)
         if self.partition_by == 'site':
-            return self._partition_by_site(df, analysis)
+            return self._site_selectors(analysis)
         
         # Auto partition (by size)
-        return self._partition_by_size(df, analysis)
+        return self._size_selectors(df)
     
-    def _partition_by_site(self, df: pd.DataFrame, analysis: Dict) -> List[Dict]:
+    def _site_selectors(self, analysis: Dict) -> List[Dict]:
         """Partition data by site_code"""
         
-        partitions = []
+        selectors = []
         site_dist = analysis['site_distribution']
         
         # Sort sites by volume (largest first)
         sorted_sites = sorted(site_dist.items(), key=lambda x: x[1], reverse=True)
         
-        partition_id = 0
-        
         # Strategy 1: One site per partition (if reasonable)
         if analysis['unique_sites'] <= self.max_partitions:
-            for site_code, count in sorted_sites:
-                site_data = df[df['site_code'] == site_code].copy()
-                
-                partitions.append({
-                    'partition_id': partition_id,
-                    'data': site_data,
-                    'metadata': self._get_partition_metadata(site_data, partition_id)
-                })
-                partition_id += 1
+            return [{'sites': [site_code]} for site_code, _ in sorted_sites]
         
         # Strategy 2: Group small sites together
-        else:
-            current_batch = []
-            current_rows = 0
-            
-            for site_code, count in sorted_sites:
-                if count > self.max_rows_per_job:
-                    # Large site gets its own partition
-                    if current_batch:
-                        # Save current batch first
-                        batch_data = df[df['site_code'].isin(current_batch)].copy()
-                        partitions.append({
-                            'partition_id': partition_id,
-                            'data': batch_data,
-                            'metadata': self._get_partition_metadata(batch_data, partition_id)
-                        })
-                        partition_id += 1
-                        current_batch = []
-                        current_rows = 0
-                    
-                    # Large site
-                    site_data = df[df['site_code'] == site_code].copy()
-                    partitions.append({
-                        'partition_id': partition_id,
-                        'data': site_data,
-                        'metadata': self._get_partition_metadata(site_data, partition_id)
-                    })
-                    partition_id += 1
-                
-                elif current_rows + count > self.max_rows_per_job:
-                    # Save current batch
-                    batch_data = df[df['site_code'].isin(current_batch)].copy()
-                    partitions.append({
-                        'partition_id': partition_id,
-                        'data': batch_data,
-                        'metadata': self._get_partition_metadata(batch_data, partition_id)
-                    })
-                    partition_id += 1
-                    current_batch = [site_code]
-                    current_rows = count
-                
-                else:
-                    # Add to current batch
-                    current_batch.append(site_code)
-                    current_rows += count
-                
-                # Safety: max partitions
-                if partition_id >= self.max_partitions:
-                    break
-            
-            # Save remaining batch
-            if current_batch:
-                batch_data = df[df['site_code'].isin(current_batch)].copy()
-                partitions.append({
-                    'partition_id': partition_id,
-                    'data': batch_data,
-                    'metadata': self._get_partition_metadata(batch_data, partition_id)
-                })
-        
-        return partitions
-    
-    def _partition_by_size(self, df: pd.DataFrame, analysis: Dict) -> List[Dict]:
-        """Partition data by chunk size (simple split)"""
+        current_batch = []
+        current_rows = 0
         
-        partitions = []
-        chunk_size = self.max_rows_per_job
-        total_rows = len(df)
-        
-        for i in range(0, total_rows, chunk_size):
-            chunk_data = df.iloc[i:i+chunk_size].copy()
-            partition_id = i // chunk_size
+        for site_code, count in sorted_sites:
+            if count > self.max_rows_per_job:
+                # Large site gets its own partition (save current batch first)
+                if current_batch:
+                    selectors.append({'sites': list(current_batch)})
+                    current_batch = []
+                    current_rows = 0
+                selectors.append({'sites': [site_code]})
             
-            partitions.append({
-                'partition_id': partition_id,
-                'data': chunk_data,
-                'metadata': self._get_partition_metadata(chunk_data, partition_id)
-            })
+            elif current_rows + count > self.max_rows_per_job:
+                # Save current batch
+                selectors.append({'sites': list(current_batch)})
+                current_batch = [site_code]
+                current_rows = count
+            
+            else:
+                # Add to current batch
+                current_batch.append(site_code)
+                current_rows += count
             
             # Safety: max partitions
-            if partition_id >= self.max_partitions:
+            if len(selectors) >= self.max_partitions:
                 break
         
-        return partitions
+        # Save remaining batch
+        if current_batch:
+            selectors.append({'sites': list(current_batch)})
+        
+        return selectors
+    
+    def _size_selectors(self, df: pd.DataFrame) -> List[Dict]:
+        """
+        Partition data by chunk size, tanpa memotong series
+        
+        Series (urut partnumber, site_code) dibagi menjadi rentang
+        {'series': [start, stop)} dengan ~max_rows_per_job baris. Satu series
+        selalu utuh di satu partition, sehingga lag/rolling (dan statistik
+        distributed_training) per partition sama dengan data penuh. Chunk
+        diperbesar jika perlu supaya semua baris muat di max_partitions.
+        """
+        sizes = df.groupby(SERIES_KEYS, observed=True, sort=True).size().to_numpy()
+        total_rows = int(sizes.sum())
+        chunk_size = max(self.max_rows_per_job, -(-total_rows // max(1, self.max_partitions)))
+        
+        # Series masuk chunk tempat baris pertamanya jatuh
+        chunk = (np.cumsum(sizes) - sizes) // chunk_size
+        bounds = np.r_[np.flatnonzero(np.diff(chunk)) + 1, len(sizes)]
+        starts = np.r_[0, bounds[:-1]]
+        return [{'series': [int(a), int(b)]} for a, b in zip(starts, bounds)]
     
     def _get_partition_metadata(self, df: pd.DataFrame, partition_id: int) -> Dict:
         """Extract metadata dari partition"""
@@ -217,8 +204,204 @@ class BatchProcessor:
             'demand_sum': int(df['demand_qty'].sum()) if 'demand_qty' in df.columns else 0
         }
     
+    def build_plan(self, df: pd.DataFrame) -> Dict:
+        """
+        Analyze + partition + estimate sekali, hasilnya JSON-serializable
+        
+        Plan disimpan saat submit dan dipakai ulang oleh batch task,
+        sehingga partitioning tidak dihitung dua kali. Metadata dihitung
+        dari selector (aggregate per site / row range), tanpa copy data
+        per partition.
+        """
+        analysis = self.analyze_data(df)
+        selectors = self._partition_selectors(df)
+        summary = self._site_summary(df) if any('sites' in s for s in selectors) else None
+        series_ids = self._series_ids(df, selectors)
+        
+        partitions = [
+            {
+                'partition_id': partition_id,
+                'selector': selector,
+                'metadata': self._selector_metadata(df, selector, partition_id, summary, series_ids)
+            } for partition_id, selector in enumerate(selectors)
+        ]
+        
+        return {
+            'settings': self._plan_settings(),
+            'analysis': {k: v for k, v in analysis.items() if k != 'site_distribution'},
+            'partitions': partitions,
+            'time_estimate': self.estimate_processing_time(partitions)
+        }
+    
+    def _site_summary(self, df: pd.DataFrame) -> Dict:
+        """
+        Aggregate per site (urutan first appearance) + pasangan (site, partnumber) unik
+        
+        Dasar metadata partition {'sites': [...]} tanpa slicing df.
+        """
+        site = df['site_code']
+        per_site = {'rows': site.groupby(site, observed=True, sort=False).size()}
+        if 'date' in df.columns:
+            dates = df['date'].groupby(site, observed=True, sort=False)
+            per_site.update(min_date=dates.min(), max_date=dates.max())
+        if 'demand_qty' in df.columns:
+            per_site['demand_sum'] = df['demand_qty'].groupby(site, observed=True, sort=False).sum()
+        
+        pairs = df.groupby(['site_code', 'partnumber'], observed=True, sort=False).size().index
+        return {
+            'per_site': pd.DataFrame(per_site),
+            'pairs': pd.DataFrame({'site_code': pairs.get_level_values(0),
+                                   'partnumber': pairs.get_level_values(1)})
+        }
+    
+    def _selector_metadata(self, df: pd.DataFrame, selector: Dict, partition_id: int,
+                           summary: Dict = None, series_ids: np.ndarray = None) -> Dict:
+        """Metadata partition (sama dengan _get_partition_metadata atas datanya) dari selector"""
+        if 'series' in selector:
+            return self._get_partition_metadata(df.take(self._selector_rows(df, selector, series_ids)),
+                                                partition_id)
+        if 'sites' not in selector:
+            # Row range: slice iloc adalah view, bukan copy
+            start, stop = selector.get('rows', [0, len(df)])
+            return self._get_partition_metadata(df.iloc[start:stop], partition_id)
+        
+        per_site = summary['per_site']
+        per_site = per_site[per_site.index.isin(selector['sites'])]
+        pairs = summary['pairs']
+        
+        date_range = None
+        if 'min_date' in per_site.columns:
+            min_date, max_date = per_site['min_date'].min(), per_site['max_date'].max()
+            date_range = (
+                min_date.isoformat() if hasattr(min_date, 'isoformat') else str(min_date),
+                max_date.isoformat() if hasattr(max_date, 'isoformat') else str(max_date)
+            )
+        
+        return {
+            'partition_id': partition_id,
+            'rows': int(per_site['rows'].sum()),
+            'sites': per_site.index.tolist(),
+            'site_count': len(per_site),
+            'partnumbers_count': pairs.loc[pairs['site_code'].isin(selector['sites']), 'partnumber'].nunique(),
+            'date_range': date_range,
+            'demand_sum': int(per_site['demand_sum'].sum()) if 'demand_sum' in per_site.columns else 0
+        }
+    
+    @staticmethod
+    def _series_ids(df: pd.DataFrame, selectors: List[Dict]):
+        """Nomor series per baris (urut partnumber, site_code) jika ada selector {'series'}"""
+        if not any('series' in s for s in selectors):
+            return None
+        return df.groupby(SERIES_KEYS, observed=True, sort=True).ngroup().to_numpy()
+    
+    def _selector_rows(self, df: pd.DataFrame, selector: Dict, series_ids: np.ndarray = None) -> np.ndarray:
+        """Posisi baris (urutan asli) yang dipilih selector partition"""
+        if 'series' in selector:
+            if series_ids is None:
+                series_ids = self._series_ids(df, [selector])
+            start, stop = selector['series']
+            return np.flatnonzero((series_ids >= start) & (series_ids < stop))
+        if 'sites' in selector:
+            return np.flatnonzero(df['site_code'].isin(selector['sites']).to_numpy())
+        if 'rows' in selector:
+            start, stop = selector['rows']
+            return np.arange(start, min(stop, len(df)))
+        return np.arange(len(df))
+    
+    def write_partitions(self, df: pd.DataFrame, plan: Dict, output_dir: str) -> str:
+        """
+        Write semua partition sekali sebagai satu Feather (Arrow IPC) uncompressed
+        
+        Baris diurutkan per partition sehingga setiap partition adalah
+        slice contiguous. Offset + metadata partition disimpan di
+        partitions.json; subtask membuka file via memory map dan hanya
+        membaca row range miliknya (lihat `read_partition`).
+        
+        Returns:
+            Path ke partitions.json
+        """
+        if feather is None:
+            raise ImportError("pyarrow is required to write batch partitions")
+        
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        
+        row_blocks = []
+        entries = []
+        offset = 0
+        series_ids = self._series_ids(df, [entry['selector'] for entry in plan['partitions']])
+        for entry in plan['partitions']:
+            rows = self._selector_rows(df, entry['selector'], series_ids)
+            row_blocks.append(rows)
+            entries.append({
+                'partition_id': entry['partition_id'],
+                'offset': offset,
+                'rows': len(rows),
+                'metadata': entry['metadata']
+            })
+            offset += len(rows)
+        
+        order = np.concatenate(row_blocks) if row_blocks else np.array([], dtype=np.int64)
+        ordered = df.take(order).reset_index(drop=True)
+        
+        data_path = output_dir / PARTITIONS_FILE
+        tmp = data_path.with_name(f"{data_path.name}.{os.getpid()}.tmp")
+        feather.write_feather(ordered, str(tmp), compression='uncompressed')
+        os.replace(tmp, data_path)
+        
+        index_path = output_dir / PARTITIONS_INDEX
+        with open(index_path, 'w') as f:
+            json.dump({'file': PARTITIONS_FILE, 'partitions': entries}, f)
+        
+        return str(index_path)
+    
+    @staticmethod
+    def read_partition_index(output_dir: str) -> Dict:
+        """Load partitions.json ({'file', 'partitions': [{partition_id, offset, rows, metadata}]})"""
+        with open(Path(output_dir) / PARTITIONS_INDEX) as f:
+            return json.load(f)
+    
+    @staticmethod
+    def read_partition(output_dir: str, partition_id: int) -> pd.DataFrame:
+        """Baca satu partition (memory-mapped slice) dari file hasil write_partitions"""
+        if feather is None:
+            raise ImportError("pyarrow is required to read batch partitions")
+        
+        index = BatchProcessor.read_partition_index(output_dir)
+        entry = next(p for p in index['partitions'] if p['partition_id'] == partition_id)
+        
+        table = feather.read_table(str(Path(output_dir) / index['file']), memory_map=True)
+        return table.slice(entry['offset'], entry['rows']).to_pandas(split_blocks=True)
+    
+    def _plan_settings(self) -> Dict:
+        return {
+            'max_rows_per_job': self.max_rows_per_job,
+            'partition_by': self.partition_by,
+            'max_partitions': self.max_partitions
+        }
+    
+    def save_plan(self, plan: Dict, path: str) -> str:
+        """Save partition plan ke JSON"""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(plan, f)
+        return str(path)
+    
+    @staticmethod
+    def load_plan(path: str):
+        """Load partition plan; None jika belum ada"""
+        if not Path(path).exists():
+            return None
+        with open(path) as f:
+            return json.load(f)
+    
+    @classmethod
+    def from_plan(cls, plan: Dict) -> 'BatchProcessor':
+        """BatchProcessor dengan settings yang sama seperti saat plan dibuat"""
+        return cls(**plan['settings'])
+    
     def save_partition(self, partition: Dict, output_dir: str) -> str:
-        """Save partition to CSV file"""
+        """Save partition to CSV file (untuk export; batch task memakai write_partitions)"""
         
         Path(output_dir).mkdir(parents=True, exist_ok=True)
         
@@ -0,0 +1,120 @@
+# backend/app/core/candidate_pool.py
+"""
+Fit beberapa candidate model paralel dengan wall-clock budget per candidate
+Setiap candidate jalan di process sendiri (fork): matrix train/valid
+di-share read-only lewat copy-on-write, tanpa pickle input. Candidate
+yang melewati budget di-terminate dan di-drop.
+
+Worker Celery prefork adalah process daemon, dan multiprocessing stdlib
+menolak membuat child dari process daemon. billiard (fork multiprocessing
+milik Celery) tidak punya batasan itu, jadi dipakai jika ter-install.
+"""
+
+import multiprocessing as mp
+import os
+import time
+from multiprocessing.connection import wait
+
+try:
+    import billiard
+except ImportError:  # tanpa Celery: multiprocessing stdlib (bukan dari process daemon)
+    billiard = None
+
+
+def _fork_context():
+    """Context fork (billiard jika ada); None jika tidak tersedia (Windows / daemon tanpa billiard)"""
+    if billiard is not None and 'fork' in billiard.get_all_start_methods():
+        return billiard.get_context('fork')
+    if 'fork' not in mp.get_all_start_methods() or mp.current_process().daemon:
+        return None
+    return mp.get_context('fork')
+
+
+def _fit_one(est, X_train, y_train, X_valid):
+    start = time.perf_counter()
+    est.fit(X_train, y_train)
+    return est, est.predict(X_valid), time.perf_counter() - start
+
+
+def _worker(conn, est, X_train, y_train, X_valid):
+    """Entry point child process: kirim ('ok', (est, y_pred, seconds)) atau ('error', pesan)"""
+    try:
+        conn.send(('ok', _fit_one(est, X_train, y_train, X_valid)))
+    except Exception as e:
+        conn.send(('error', f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+def _fit_sequential(candidates, X_train, y_train, X_valid, budget_s):
+    """Fallback tanpa process: budget hanya bisa dicek setelah fit selesai"""
+    fitted, dropped = {}, {}
+    for name, est in candidates.items():
+        try:
+            est, y_pred, seconds = _fit_one(est, X_train, y_train, X_valid)
+        except Exception as e:
+            dropped[name] = f"{type(e).__name__}: {e}"
+            continue
+        if seconds > budget_s:
+            dropped[name] = f"exceeded budget ({seconds:.0f}s > {budget_s:.0f}s)"
+        else:
+            fitted[name] = (est, y_pred, seconds)
+    return fitted, dropped
+
+
+def fit_candidates(candidates, X_train, y_train, X_valid, budget_s=600, workers=None):
+    """
+    Fit candidates paralel (maksimal workers sekaligus)
+
+    Args:
+        candidates: {nama: estimator belum di-fit}
+        budget_s: wall-clock budget per candidate (detik, dihitung sejak start)
+        workers: jumlah process (None = min(jumlah candidate, cpu_count))
+
+    Returns:
+        (fitted, dropped): {nama: (estimator, y_pred_valid, detik)},
+        {nama: alasan} untuk candidate yang timeout / error
+    """
+    workers = workers or min(len(candidates), os.cpu_count() or 1)
+    ctx = _fork_context()
+    if ctx is None or workers <= 1:
+        return _fit_sequential(candidates, X_train, y_train, X_valid, budget_s)
+
+    pending = list(candidates.items())
+    running = {}  # conn -> (nama, process, deadline)
+    fitted, dropped = {}, {}
+
+    while pending or running:
+        while pending and len(running) < workers:
+            name, est = pending.pop(0)
+            recv_conn, send_conn = ctx.Pipe(duplex=False)
+            proc = ctx.Process(target=_worker, args=(send_conn, est, X_train, y_train, X_valid),
+                               name=f"candidate-{name}", daemon=True)
+            proc.start()
+            send_conn.close()
+            running[recv_conn] = (name, proc, time.monotonic() + budget_s)
+
+        timeout = max(0.0, min(deadline for _, _, deadline in running.values()) - time.monotonic())
+        for conn in wait(list(running), timeout=timeout):
+            name, proc, _ = running.pop(conn)
+            try:
+                status, payload = conn.recv()
+            except EOFError:
+                status, payload = 'error', f"process exited with code {proc.exitcode}"
+            conn.close()
+            proc.join()
+            if status == 'ok':
+                fitted[name] = payload
+            else:
+                dropped[name] = payload
+
+        now = time.monotonic()
+        for conn, (name, proc, deadline) in list(running.items()):
+            if now >= deadline:
+                proc.terminate()
+                proc.join()
+                conn.close()
+                del running[conn]
+                dropped[name] = f"exceeded budget ({budget_s:.0f}s)"
+
+    return fitted, dropped
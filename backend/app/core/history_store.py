@@ -0,0 +1,407 @@
+# backend/app/core/history_store.py
+"""
+Persistent demand history per site (append-only Feather segments)
+
+Layout per site (HISTORY_STORE_DIR/site=<site_code>/):
+    raw-000001.feather, ...        daily aggregate per upload (partnumber, date, demand_qty)
+    completed-000002.feather, ...  hasil calendar completion (belum di-clip) per refresh,
+                                   urut partnumber, date; rentang tanggal antar segment disjoint
+    series.feather                 batas clip p99 per partnumber
+    manifest.json                  daftar segment raw / completed + dirty_from
+
+Upload delta hanya menulis segment raw baru. Calendar completion dihitung
+ulang mulai dari tanggal terkecil yang berubah (dirty_from) dan ditulis
+sebagai segment completed baru; segment completed lama tidak ditulis ulang
+(kecuali dipotong saat upload ulang hari lampau, atau di-compact setelah
+COMPACT_SEGMENTS refresh). p99 hanya dihitung untuk series yang punya
+data di window tersebut, sehingga write per refresh sebanding dengan data
+baru, bukan seluruh history.
+"""
+
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import quote, unquote
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from .preprocessing import _complete_calendar, _sort_by_group_date, groupwise_quantile, series_key_index
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # history store butuh pyarrow
+    feather = None
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: tanpa file lock
+    fcntl = None
+
+
+HISTORY_DIR = os.getenv("HISTORY_STORE_DIR", "data/history")
+# Segment raw / completed di-merge menjadi satu jika jumlahnya melebihi ini
+COMPACT_SEGMENTS = int(os.getenv("HISTORY_COMPACT_SEGMENTS", "32"))
+
+
+def _read_feather(path):
+    """Feather uncompressed via memory map"""
+    return feather.read_table(str(path), memory_map=True).to_pandas(split_blocks=True)
+
+
+def _write_feather(df, path):
+    """Atomic write (tmp + replace) supaya reader tidak melihat file setengah jadi"""
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    feather.write_feather(df.reset_index(drop=True), str(tmp), compression='uncompressed')
+    os.replace(tmp, path)
+
+
+def _categorical(s):
+    """Key sebagai category dtype dengan categories urut dan tanpa category kosong"""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s.cat.remove_unused_categories().reset_index(drop=True)
+    return pd.Series(pd.Categorical(s.to_numpy()), name=s.name)
+
+
+def _take_sorted_runs(df, key):
+    """
+    Urutkan df by key (stable) ketika df = beberapa run yang masing-masing sudah urut
+
+    Timsort (argsort stable untuk int64) hanya me-merge run tersebut,
+    jauh lebih murah dari sort penuh by group + date.
+    """
+    return df.take(np.argsort(key, kind='stable')).reset_index(drop=True)
+
+
+def _concat(frames, cat_cols):
+    """Concat frames dengan categorical keys (categories digabung dan tetap urut)"""
+    frames = [f for f in frames if f is not None]
+    out = {}
+    for col in frames[0].columns:
+        if col in cat_cols:
+            out[col] = union_categoricals([f[col] for f in frames], sort_categories=True)
+        else:
+            out[col] = np.concatenate([f[col].to_numpy() for f in frames])
+    return pd.DataFrame(out)
+
+
+class DemandHistoryStore:
+    """
+    Append-only demand history per site
+
+    Delta upload (output load_and_normalize / load_and_aggregate_chunked)
+    di-append dengan append(); load_preprocessed() mengembalikan frame
+    yang sama dengan preprocess_data atas seluruh history.
+
+    Args:
+        root: directory store (default HISTORY_STORE_DIR)
+    """
+
+    def __init__(self, root=None):
+        if feather is None:
+            raise ImportError("DemandHistoryStore membutuhkan pyarrow")
+        self.root = Path(root or HISTORY_DIR)
+
+    def site_dir(self, site):
+        return self.root / f"site={quote(str(site), safe='')}"
+
+    def sites(self):
+        """Site yang sudah punya history (urut)"""
+        return sorted(unquote(p.name[len('site='):]) for p in self.root.glob('site=*')
+                      if (p / 'manifest.json').exists())
+
+    def _manifest(self, site):
+        path = self.site_dir(site) / 'manifest.json'
+        if not path.exists():
+            return {'next_segment': 1, 'segments': [], 'completed': [], 'dirty_from': None}
+        manifest = json.loads(path.read_text())
+        if 'completed' not in manifest:
+            # Store lama: satu completed.feather yang ditulis ulang setiap refresh
+            legacy = self.site_dir(site) / 'completed.feather'
+            manifest['completed'] = []
+            if legacy.exists():
+                dates = _read_feather(legacy)['date']
+                manifest['completed'].append({'file': legacy.name, 'rows': len(dates),
+                                              'min_date': str(dates.min()), 'max_date': str(dates.max())})
+        return manifest
+
+    def _save_manifest(self, site, manifest):
+        path = self.site_dir(site) / 'manifest.json'
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(manifest, indent=2))
+        os.replace(tmp, path)
+
+    @contextmanager
+    def _locked(self, site):
+        """Exclusive lock per site (append / refresh dari beberapa worker)"""
+        site_dir = self.site_dir(site)
+        site_dir.mkdir(parents=True, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(site_dir / '.lock', 'w') as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def append(self, df):
+        """
+        Tambahkan delta upload ke history
+
+        Daily total per (partnumber, site_code, date) di delta menggantikan
+        nilai yang sudah tersimpan untuk key yang sama (upload ulang hari
+        yang sama tidak dihitung dua kali); key lain tidak berubah.
+
+        Returns:
+            dict site_code -> tanggal terkecil di delta
+        """
+        daily = (df.groupby(['site_code', 'partnumber', 'date'], sort=True, observed=True, as_index=False)
+                 .agg(demand_qty=('demand_qty', 'sum')))
+
+        changed = {}
+        for site, part in daily.groupby('site_code', sort=False, observed=True):
+            site = str(site)
+            segment = pd.DataFrame({
+                'partnumber': _categorical(part['partnumber']),
+                'date': part['date'].to_numpy(),
+                'demand_qty': part['demand_qty'].to_numpy(dtype=np.float64),
+            })
+            min_date, max_date = segment['date'].min(), segment['date'].max()
+
+            with self._locked(site):
+                manifest = self._manifest(site)
+                name = self._segment_name(manifest, 'raw')
+                _write_feather(segment, self.site_dir(site) / name)
+                manifest['segments'].append({'file': name, 'rows': len(segment),
+                                             'min_date': str(min_date), 'max_date': str(max_date)})
+                dirty = manifest['dirty_from']
+                manifest['dirty_from'] = str(min_date if dirty is None else min(pd.Timestamp(dirty), min_date))
+                if len(manifest['segments']) > COMPACT_SEGMENTS:
+                    self._compact_raw(site, manifest)
+                self._save_manifest(site, manifest)
+
+            changed[site] = min_date
+            print(f"History {site}: appended {len(segment)} daily rows "
+                  f"({min_date.date()}..{max_date.date()})")
+        return changed
+
+    def _read_raw(self, site, manifest, since=None):
+        """
+        Daily aggregate tersimpan (date >= since), segment terbaru menang per key
+
+        Segment yang seluruhnya sebelum since tidak dibaca. Return None jika kosong.
+        """
+        parts = []
+        for seg in manifest['segments']:
+            if since is not None and pd.Timestamp(seg['max_date']) < since:
+                continue
+            part = _read_feather(self.site_dir(site) / seg['file'])
+            if since is not None:
+                part = part[part['date'] >= since]
+            parts.append(part)
+        if not parts:
+            return None
+
+        raw = _concat(parts, ['partnumber']).drop_duplicates(['partnumber', 'date'], keep='last')
+        raw, _, _ = _sort_by_group_date(raw, ['partnumber'])
+        raw['partnumber'] = raw['partnumber'].cat.remove_unused_categories()
+        return raw if len(raw) else None
+
+    def _compact_raw(self, site, manifest):
+        """Merge semua segment raw menjadi satu (isi history tidak berubah)"""
+        raw = self._read_raw(site, manifest)
+        name = self._segment_name(manifest, 'raw')
+        _write_feather(raw, self.site_dir(site) / name)
+        old = [seg['file'] for seg in manifest['segments']]
+        manifest['segments'] = [{'file': name, 'rows': len(raw),
+                                 'min_date': str(raw['date'].min()), 'max_date': str(raw['date'].max())}]
+        for fname in old:
+            (self.site_dir(site) / fname).unlink(missing_ok=True)
+        print(f"History {site}: compacted {len(old)} segments")
+
+    def _segment_name(self, manifest, prefix):
+        name = f"{prefix}-{manifest['next_segment']:06d}.feather"
+        manifest['next_segment'] += 1
+        return name
+
+    def _write_completed(self, site, manifest, df):
+        """Tulis df sebagai segment completed baru, return entry manifest"""
+        name = self._segment_name(manifest, 'completed')
+        _write_feather(df, self.site_dir(site) / name)
+        return {'file': name, 'rows': len(df),
+                'min_date': str(df['date'].min()), 'max_date': str(df['date'].max())}
+
+    def _completed_head(self, site, manifest, since):
+        """
+        Segment completed dengan tanggal < since (urut kronologis)
+
+        Segment yang seluruhnya >= since dihapus; segment yang memotong
+        since (upload ulang hari lampau) ditulis ulang tanpa tanggal >= since.
+        """
+        site_dir = self.site_dir(site)
+        kept, frames = [], []
+        for seg in manifest['completed']:
+            if pd.Timestamp(seg['min_date']) >= since:
+                (site_dir / seg['file']).unlink(missing_ok=True)
+                continue
+            part = _read_feather(site_dir / seg['file'])
+            if pd.Timestamp(seg['max_date']) >= since:
+                part = part[part['date'] < since].reset_index(drop=True)
+                (site_dir / seg['file']).unlink(missing_ok=True)
+                seg = self._write_completed(site, manifest, part)
+            kept.append(seg)
+            frames.append(part)
+        manifest['completed'] = kept
+        return frames
+
+    def _refresh(self, site, manifest):
+        """
+        Completed history site (belum di-clip) + p99 per series (caller memegang lock)
+
+        Jika dirty, completion dihitung ulang mulai dari dirty_from dan hasilnya
+        di-append sebagai segment completed baru.
+
+        Returns:
+            (completed, series): completed urut partnumber, date
+        """
+        site_dir = self.site_dir(site)
+        since = None if manifest['dirty_from'] is None else pd.Timestamp(manifest['dirty_from'])
+        if since is None:
+            frames = [_read_feather(site_dir / seg['file']) for seg in manifest['completed']]
+        else:
+            frames = self._completed_head(site, manifest, since)
+        series = _read_feather(site_dir / 'series.feather') if frames else None
+
+        tail = None
+        tail_raw = None if since is None else self._read_raw(site, manifest, since)
+        if tail_raw is not None:
+            # Hari terakhir head per series yang punya data baru = titik awal completion,
+            # supaya hari kosong antara head dan data baru ikut di-fill 0 (segment kronologis)
+            anchors = None
+            if frames:
+                last = _concat([f.drop_duplicates('partnumber', keep='last') for f in frames],
+                               ['partnumber']).drop_duplicates('partnumber', keep='last')
+                anchors = last[last['partnumber'].isin(tail_raw['partnumber'].cat.categories)]
+            frame = _concat([anchors, tail_raw], ['partnumber'])
+            out = _complete_calendar(frame, ['partnumber'], 'demand_qty')
+            tail = out['df']
+            tail['demand_qty'] = tail['demand_qty'].astype(np.float64)
+            if anchors is not None and len(anchors):
+                # Anchor selalu baris pertama series-nya (tanggal < since) dan sudah ada di head
+                starts = np.r_[0, np.cumsum(out['lengths'])[:-1]]
+                is_anchor = tail['partnumber'].iloc[starts].isin(anchors['partnumber'].unique())
+                tail = tail.drop(index=starts[is_anchor.to_numpy()]).reset_index(drop=True)
+            tail['partnumber'] = tail['partnumber'].cat.remove_unused_categories()
+            manifest['completed'].append(self._write_completed(site, manifest, tail))
+            frames.append(tail)
+
+        # Setiap segment urut per series dan tanggal antar segment naik -> merge runs
+        completed = _concat(frames, ['partnumber'])
+        run = np.repeat(np.arange(len(frames), dtype=np.int64), [len(f) for f in frames])
+        completed = _take_sorted_runs(completed, completed['partnumber'].cat.codes.to_numpy() * len(frames) + run)
+        completed['partnumber'] = completed['partnumber'].cat.remove_unused_categories()
+
+        if since is None:
+            return completed, series
+
+        # p99 hanya untuk series yang berubah; series lain memakai nilai tersimpan
+        if tail is not None:
+            changed = completed['partnumber'].isin(tail['partnumber'].unique()).to_numpy()
+            sub = completed[changed]
+            sids, row_sid = np.unique(sub['partnumber'].cat.codes.to_numpy(), return_inverse=True)
+            fresh = pd.DataFrame({
+                'partnumber': pd.Categorical.from_codes(sids, dtype=completed['partnumber'].dtype),
+                'p99': groupwise_quantile(sub['demand_qty'].to_numpy(), row_sid, len(sids), q=0.99),
+            })
+            if series is not None:
+                series = series[~series['partnumber'].isin(fresh['partnumber'].unique())]
+            series = _concat([series, fresh], ['partnumber'])
+            _write_feather(series, site_dir / 'series.feather')
+
+        if len(manifest['completed']) > COMPACT_SEGMENTS:
+            old = [seg['file'] for seg in manifest['completed']]
+            manifest['completed'] = [self._write_completed(site, manifest, completed)]
+            for fname in old:
+                (site_dir / fname).unlink(missing_ok=True)
+            print(f"History {site}: compacted {len(old)} completed segments")
+
+        manifest['dirty_from'] = None
+        self._save_manifest(site, manifest)
+        print(f"History {site}: refreshed from {since.date()} "
+              f"({0 if tail is None else len(tail)} of {len(completed)} rows recomputed)")
+        return completed, series
+
+    def _site_frames(self, sites, preprocessed, clip_bounds=None):
+        frames, bounds = [], []
+        for site in (self.sites() if sites is None else [str(s) for s in sites]):
+            with self._locked(site):
+                manifest = self._manifest(site)
+                if not manifest['segments']:
+                    continue
+                if not preprocessed:
+                    df = self._read_raw(site, manifest)
+                else:
+                    df, series = self._refresh(site, manifest)
+
+            if preprocessed:
+                # Clip p99 per series, sama dengan preprocess_data (clip_bounds menggantikan p99 tersimpan)
+                p99 = series['p99'].to_numpy(dtype=np.float64)
+                keys = series_key_index(series.assign(site_code=site), ['partnumber', 'site_code'])
+                if clip_bounds is not None and len(clip_bounds):
+                    pos = clip_bounds.index.get_indexer(keys)
+                    stored = clip_bounds.to_numpy(dtype=np.float64)[np.maximum(pos, 0)]
+                    p99 = np.where(pos >= 0, stored, p99)
+                bounds.append(pd.Series(p99, index=keys, name='p99'))
+                lookup = pd.Index(series['partnumber'].astype(object)).get_indexer(
+                    df['partnumber'].cat.categories)
+                upper = p99[lookup][df['partnumber'].cat.codes.to_numpy()]
+                df['demand_qty'] = df['demand_qty'].clip(lower=0, upper=pd.Series(upper, index=df.index))
+
+            df.insert(1, 'site_code', pd.Categorical.from_codes(np.zeros(len(df), dtype=np.int8), [site]))
+            frames.append(df)
+
+        if not frames:
+            raise ValueError("History store kosong untuk site yang diminta")
+        # Setiap site sudah urut partnumber, date -> merge by (partnumber, site_code)
+        df = _concat(frames, ['partnumber', 'site_code'])
+        key = (df['partnumber'].cat.codes.to_numpy().astype(np.int64) * len(df['site_code'].cat.categories)
+               + df['site_code'].cat.codes.to_numpy())
+        df = _take_sorted_runs(df, key)
+        return (df, pd.concat(bounds).sort_index()) if preprocessed else df
+
+    def load_raw(self, sites=None):
+        """
+        Daily aggregate tersimpan [partnumber, site_code, date, demand_qty]
+
+        Bisa dipakai sebagai pengganti output load_and_normalize (mis. untuk
+        batch partitioning); preprocess_data memberi hasil yang sama.
+        """
+        return self._site_frames(sites, preprocessed=False)
+
+    def load_preprocessed(self, sites=None, clip_bounds=None, return_bounds=False):
+        """
+        History lengkap setelah calendar completion + clip p99
+
+        Sama dengan preprocess_data(load_raw(sites), clip_bounds=...,
+        return_bounds=...): site yang dirty di-refresh dulu (hanya tail
+        sejak dirty_from).
+        """
+        df, bounds = self._site_frames(sites, preprocessed=True, clip_bounds=clip_bounds)
+        return (df, bounds) if return_bounds else df
+
+
+def append_and_load(df, root=None, clip_bounds=None, return_bounds=False):
+    """
+    Append delta upload ke history store lalu return history preprocessed
+
+    Hanya site yang ada di upload yang di-load; hasilnya menggantikan
+    preprocess_data(df, clip_bounds=..., return_bounds=...) di task
+    forecast/training.
+    """
+    store = DemandHistoryStore(root)
+    changed = store.append(df)
+    return store.load_preprocessed(sorted(changed), clip_bounds=clip_bounds, return_bounds=return_bounds)
@@ -0,0 +1,186 @@
+# backend/app/core/incremental.py
+"""
+Incremental recursive forecasting state
+Lag/rolling state per series disimpan di ring buffer NumPy berukuran tetap
+"""
+
+import numpy as np
+import pandas as pd
+
+from .preprocessing import is_sorted_by
+
+
+def _sorted_history(history_df, group_cols, assume_sorted=False):
+    """History urut by group_cols + date; sort di-skip jika sudah urut"""
+    cols = list(group_cols) + ['date']
+    if assume_sorted and is_sorted_by(history_df, cols):
+        return history_df
+    return history_df.sort_values(cols)
+
+
+class LagRingBuffer:
+    """
+    Ring buffer per series untuk lag & rolling features
+
+    Menyimpan hanya nilai terakhir per series (max lag / window + 1),
+    sehingga setiap step recursive hanya menyentuh O(series x window)
+    data, bukan seluruh history.
+
+    Semantik fitur sama dengan `add_group_lags_rolls` yang dibaca dari
+    baris terakhir history (seperti `one_day_forecast`):
+        lag_L      = y[n-1-L]
+        rollmean_W = mean(y[n-1-W : n-1])
+    Nilai yang belum tersedia menjadi 0 (sama dengan fillna(0)).
+    """
+
+    def __init__(self, n_series, lags=(1, 7, 14, 28), roll_windows=(7, 14, 28)):
+        self.lags = tuple(lags)
+        self.roll_windows = tuple(roll_windows)
+        self.size = max(self.lags + self.roll_windows + (0,)) + 1
+        self.n_series = n_series
+
+        self.buffer = np.zeros((n_series, self.size), dtype=np.float64)
+        self.counts = np.zeros(n_series, dtype=np.int64)
+        self.head = 0  # posisi slot berikutnya yang akan ditulis
+
+    @classmethod
+    def from_history(cls, history_df, combos, group_cols, target_col='demand_qty',
+                     lags=(1, 7, 14, 28), roll_windows=(7, 14, 28), assume_sorted=False):
+        """
+        Build ring buffer dari history DataFrame
+
+        Args:
+            history_df: DataFrame dengan group_cols, 'date', target_col
+            combos: DataFrame unique group_cols (urutan = index series)
+            assume_sorted: history_df sudah urut by group_cols + date (diverifikasi)
+        """
+        state = cls(len(combos), lags=lags, roll_windows=roll_windows)
+        if history_df.empty:
+            return state
+
+        # Urutan baris sama dengan add_group_lags_rolls
+        hist = _sorted_history(history_df, group_cols, assume_sorted)
+        series_idx = (pd.MultiIndex.from_frame(combos[list(group_cols)])
+                      .get_indexer(pd.MultiIndex.from_frame(hist[list(group_cols)])))
+        keep = series_idx >= 0
+        series_idx = series_idx[keep]
+        values = hist[target_col].to_numpy(dtype=np.float64)[keep]
+
+        # Posisi dari belakang per series (0 = nilai terakhir)
+        from_end = (pd.Series(series_idx).groupby(series_idx).cumcount(ascending=False)
+                    .to_numpy())
+        recent = from_end < state.size
+
+        slots = (state.head - 1 - from_end[recent]) % state.size
+        state.buffer[series_idx[recent], slots] = values[recent]
+        state.counts = np.bincount(series_idx, minlength=len(combos)).astype(np.int64)
+        return state
+
+    def _back(self, steps):
+        """Nilai `steps` langkah sebelum nilai terakhir, beserta mask valid"""
+        col = self.buffer[:, (self.head - 1 - steps) % self.size]
+        valid = self.counts > steps
+        return col, valid
+
+    def features(self):
+        """Return dict {nama_fitur: array per series} dari state saat ini"""
+        feats = {}
+        for L in self.lags:
+            col, valid = self._back(L)
+            feats[f'lag_{L}'] = np.where(valid, col, 0.0)
+
+        for W in self.roll_windows:
+            # Jumlah berurutan dari nilai terlama ke terbaru (sama dengan rolling sum)
+            total = np.zeros(self.n_series, dtype=np.float64)
+            for steps in range(W, 0, -1):
+                total += self._back(steps)[0]
+            valid = self.counts > W
+            feats[f'rollmean_{W}'] = np.where(valid, total / W, 0.0)
+
+        return feats
+
+    def push(self, values):
+        """Append satu nilai baru untuk setiap series"""
+        self.buffer[:, self.head] = values
+        self.head = (self.head + 1) % self.size
+        self.counts += 1
+
+
+class HistoryStore:
+    """
+    Dense history store (series x day slot) untuk recursive forecast
+
+    Mengganti `pd.concat([history, add_back])` per hari. Setiap series
+    di-align ke kanan: nilai terakhir semua series berada di kolom yang
+    sama, sehingga append = satu column write O(series) dan lag dibaca
+    dengan slicing kolom. Slot sebelum awal series berisi NaN, sama
+    dengan NaN dari groupby shift/rolling di `add_group_lags_rolls`.
+    """
+
+    def __init__(self, series, capacity, dtype=np.float32):
+        self.series = series.reset_index(drop=True)
+        self.values = np.full((len(self.series), capacity), np.nan, dtype=dtype)
+        self.end = 0  # kolom berikutnya yang akan ditulis
+
+    @classmethod
+    def from_history(cls, history_df, combos, group_cols, target_col='demand_qty',
+                     extra_days=0, dtype=np.float32, assume_sorted=False):
+        """
+        Build store dari history DataFrame
+
+        Args:
+            history_df: DataFrame dengan group_cols, 'date', target_col
+            combos: DataFrame unique group_cols (urutan = index series)
+            extra_days: jumlah kolom tambahan yang dipreallocate untuk append
+            assume_sorted: history_df sudah urut by group_cols + date (diverifikasi)
+        """
+        hist = _sorted_history(history_df, group_cols, assume_sorted)
+        series_idx = (pd.MultiIndex.from_frame(combos[list(group_cols)])
+                      .get_indexer(pd.MultiIndex.from_frame(hist[list(group_cols)])))
+        keep = series_idx >= 0
+        series_idx = series_idx[keep]
+        values = hist[target_col].to_numpy(dtype=np.float64)[keep]
+
+        lengths = np.bincount(series_idx, minlength=len(combos))
+        width = int(lengths.max()) if len(lengths) else 0
+
+        store = cls(combos[list(group_cols)], width + extra_days, dtype=dtype)
+        pos = pd.Series(series_idx).groupby(series_idx).cumcount().to_numpy()
+        store.values[series_idx, width - lengths[series_idx] + pos] = values
+        store.end = width
+        return store
+
+    def append(self, values):
+        """Append satu hari (satu nilai per series, urutan sama dengan `series`)"""
+        if self.end >= self.values.shape[1]:
+            grow = np.full_like(self.values, np.nan)
+            self.values = np.concatenate([self.values, grow], axis=1)
+        self.values[:, self.end] = values
+        self.end += 1
+
+    def lag(self, L):
+        """Lag L dari baris terakhir tiap series (NaN jika belum tersedia)"""
+        col = self.end - 1 - L
+        if col < 0:
+            return np.full(len(self.series), np.nan)
+        return self.values[:, col].astype(np.float64)
+
+    def rollmean(self, W):
+        """Rolling mean W hari sebelum baris terakhir (NaN jika window belum penuh)"""
+        start = self.end - 1 - W
+        if start < 0:
+            return np.full(len(self.series), np.nan)
+        window = self.values[:, start:self.end - 1].astype(np.float64)
+        total = np.zeros(len(self.series), dtype=np.float64)
+        for j in range(W):
+            total += window[:, j]
+        return total / W
+
+    def latest_features(self, lags, roll_windows):
+        """Lag/rolling features baris terakhir per series sebagai DataFrame"""
+        latest = self.series.copy()
+        for L in lags:
+            latest[f'lag_{L}'] = self.lag(L)
+        for W in roll_windows:
+            latest[f'rollmean_{W}'] = self.rollmean(W)
+        return latest
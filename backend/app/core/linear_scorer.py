@@ -0,0 +1,158 @@
+# backend/app/core/linear_scorer.py
+"""
+Compiled scorer untuk pipeline linear (Ridge_log)
+Pipeline(ColumnTransformer[OneHotEncoder + passthrough] -> TTR(Ridge)) ekuivalen dengan:
+    inverse(intercept + sum_c coef_c[category] + X_num @ coef_num)
+sehingga inference tidak perlu OHE / sparse matrix
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+from .sparse_design import SparseDesignMatrix
+
+
+# inverse_func TTR yang didukung (nama -> ufunc)
+_INVERSE_FUNCS = {
+    'identity': None,
+    'expm1': np.expm1,
+}
+
+
+class LinearScorer:
+    """
+    Lookup-table scorer hasil compile dari fitted linear pipeline
+
+    Attributes:
+        intercept: float
+        cat_coefs: {kolom: pd.Series coef index = category}
+        num_cols: list nama kolom numeric (urutan coef_num)
+        coef_num: np.ndarray coef numeric
+        inverse: nama inverse transform target ('identity' / 'expm1')
+    """
+
+    def __init__(self, intercept, cat_coefs, num_cols, coef_num, inverse='identity'):
+        self.intercept = float(intercept)
+        self.cat_coefs = cat_coefs
+        self.num_cols = list(num_cols)
+        self.coef_num = np.asarray(coef_num, dtype=np.float64)
+        self.inverse = inverse
+
+        # Category lookup index dibuat sekali
+        self._cat_index = {col: pd.Index(coefs.index) for col, coefs in cat_coefs.items()}
+
+    @classmethod
+    def from_pipeline(cls, model):
+        """
+        Compile fitted pipeline; return None jika model bukan linear yang didukung
+
+        Didukung: Pipeline([('prep', ColumnTransformer), ('reg', TTR(linear) | linear)])
+        dengan transformer OneHotEncoder (tanpa drop / infrequent), 'passthrough'
+        atau 'drop'; atau prep SparseDesignMatrix.
+        """
+        if not isinstance(model, Pipeline) or len(model.steps) != 2:
+            return None
+        prep, reg = model.steps[0][1], model.steps[1][1]
+        if isinstance(prep, SparseDesignMatrix):
+            if not hasattr(prep, 'categories_'):
+                return None
+        elif not isinstance(prep, ColumnTransformer) or not hasattr(prep, 'transformers_'):
+            return None
+
+        # Unwrap TransformedTargetRegressor
+        inverse = 'identity'
+        if hasattr(reg, 'regressor_'):
+            inverse = next((name for name, fn in _INVERSE_FUNCS.items()
+                            if fn is not None and reg.inverse_func is fn), None)
+            if inverse is None and reg.inverse_func is not None:
+                return None
+            inverse = inverse or 'identity'
+            reg = reg.regressor_
+
+        coef = getattr(reg, 'coef_', None)
+        if coef is None or np.ndim(coef) != 1:
+            return None
+        coef = np.asarray(coef, dtype=np.float64)
+        intercept = float(np.ravel(getattr(reg, 'intercept_', 0.0))[0])
+
+        if isinstance(prep, SparseDesignMatrix):
+            return cls._from_sparse_design(prep, coef, intercept, inverse)
+        
+        names_in = list(getattr(prep, 'feature_names_in_', []))
+
+        def col_names(cols):
+            cols = [cols] if isinstance(cols, (str, int, np.integer)) else list(cols)
+            return [names_in[c] if isinstance(c, (int, np.integer)) else c for c in cols]
+
+        cat_coefs, num_cols, num_coef = {}, [], []
+        pos = 0
+        for _, trans, cols in prep.transformers_:
+            cols = col_names(cols)
+            if trans == 'drop' or not cols:
+                continue
+            if trans == 'passthrough':
+                num_cols += cols
+                num_coef.append(coef[pos:pos + len(cols)])
+                pos += len(cols)
+            elif isinstance(trans, OneHotEncoder):
+                if getattr(trans, 'drop_idx_', None) is not None or \
+                        getattr(trans, '_infrequent_enabled', False):
+                    return None
+                for col, cats in zip(cols, trans.categories_):
+                    cat_coefs[col] = pd.Series(coef[pos:pos + len(cats)], index=cats)
+                    pos += len(cats)
+            else:
+                return None
+
+        if pos != len(coef):
+            return None
+
+        num_coef = np.concatenate(num_coef) if num_coef else np.zeros(0)
+        return cls(intercept, cat_coefs, num_cols, num_coef, inverse=inverse)
+
+    @classmethod
+    def _from_sparse_design(cls, prep, coef, intercept, inverse):
+        """Layout SparseDesignMatrix: [one-hot per cat_cols | num_cols_]"""
+        if prep.n_output_features_ != len(coef):
+            return None
+        
+        cat_coefs, pos = {}, 0
+        for col, cats in zip(prep.cat_cols, prep.categories_):
+            cat_coefs[col] = pd.Series(coef[pos:pos + len(cats)], index=cats)
+            pos += len(cats)
+        return cls(intercept, cat_coefs, prep.num_cols_, coef[pos:], inverse=inverse)
+    
+    def base_offsets(self, X):
+        """intercept + kontribusi categorical per baris (unknown category = 0)"""
+        base = np.full(len(X), self.intercept, dtype=np.float64)
+        for col, coefs in self.cat_coefs.items():
+            values = X[col]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                # Lookup per category sekali, lalu gather by codes (NaN code -1 -> unknown)
+                cat_idx = self._cat_index[col].get_indexer(values.cat.categories)
+                idx = np.r_[cat_idx, -1][values.cat.codes.to_numpy()]
+            else:
+                idx = self._cat_index[col].get_indexer(values)
+            base += np.where(idx >= 0, coefs.to_numpy()[idx], 0.0)
+        return base
+
+    def decision(self, X, base=None):
+        """
+        Linear score (sebelum inverse transform)
+
+        Args:
+            base: hasil base_offsets(X) yang sudah dihitung sebelumnya
+                  (misal per series sekali per forecast run); None = hitung
+        """
+        if base is None:
+            base = self.base_offsets(X)
+        X_num = X[self.num_cols].to_numpy(dtype=np.float64)
+        return base + X_num @ self.coef_num
+
+    def predict(self, X, base=None):
+        """Sama dengan pipeline.predict(X) dalam toleransi floating point (urutan penjumlahan beda)"""
+        score = self.decision(X, base)
+        return np.expm1(score) if self.inverse == 'expm1' else score
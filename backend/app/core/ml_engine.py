@@ -4,11 +4,14 @@ Main ML Forecasting Engine
 Refactored dari forecast11.ipynb
 """
 
+import copy
+import os
 import numpy as np
 import pandas as pd
 import joblib
 from pathlib import Path
 from datetime import timedelta
+from sklearn.base import clone
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 from sklearn.ensemble import RandomForestRegressor, ExtraTreesRegressor, GradientBoostingRegressor
@@ -17,10 +20,17 @@ from sklearn.linear_model import Ridge
 from .preprocessing import (
     add_calendar_features, 
     add_group_lags_rolls,
+    compact_feature_dtypes,
     prepare_features,
     get_feature_columns
 )
 from .utils import metrics, eval_with_rounding, round_series, make_ohe
+from .incremental import LagRingBuffer, HistoryStore
+from .model_cache import load_model_cached, invalidate_model_cache, make_mmap_friendly
+from .linear_scorer import LinearScorer
+from .sparse_design import SparseDesignMatrix
+from .ridge_stats import RidgeSufficientStats
+from .candidate_pool import fit_candidates
 
 # TransformedTargetRegressor fallback
 try:
@@ -54,6 +64,40 @@ class MLForecaster:
                 - zero_threshold: float (default 0.5)
                 - rounding_mode: str (default 'half_up')
                 - random_state: int (default 42)
+                - forecast_engine: str (default 'dataframe')
+                    'dataframe'   = recompute features dari history DataFrame tiap hari
+                    'incremental' = ring buffer per series (O(series) per hari)
+                - history_dtype: str (default 'float64')
+                    dtype HistoryStore engine 'dataframe'; 'float32' = setengah
+                    memory, tapi nilai clip p99 pecahan ikut dibulatkan ke float32
+                - model_format: str (default 'pickle')
+                    'mmap' = category arrays disimpan sebagai numpy buffer
+                    uncompressed supaya bisa di-load dengan mmap_mode='r'
+                - compiled_scorer: bool (default True)
+                    predict model linear via LinearScorer (lookup table, tanpa
+                    OHE / sparse matrix); selisih dengan pipeline < 1e-9
+                - assume_sorted: bool (default True)
+                    history sudah urut by partnumber, site_code, date (output
+                    preprocess_data); dicek O(n), sort hanya jika tidak urut
+                - compact_dtypes: bool (default False)
+                    feature frame compact: calendar int8/int16, lag/rolling
+                    float32 (design matrix sparse & solver Ridge tetap float64)
+                - sparse_training: bool (default False)
+                    design matrix dibangun langsung sebagai CSR dari df_fe
+                    (SparseDesignMatrix); memory training ~ jumlah nonzero
+                - sparse_solver: str (default 'sparse_cg')
+                    solver Ridge untuk sparse_training: 'sparse_cg', 'sag', 'lsqr'
+                - ridge_refit: str (default 'full')
+                    'incremental' = Ridge_log di-solve dari X'X / X'y yang
+                    disimpan bersama model; training berikutnya hanya
+                    menambahkan baris train baru (lihat RidgeSufficientStats)
+                - candidate_selection: str (default 'ridge_only')
+                    'parallel' = RF_log, ET_log, GBR_log dan Ridge_log (seperti
+                    notebook) di-fit paralel di process terpisah; best by
+                    MAPE% rounded. Selalu refit penuh (ridge_refit diabaikan)
+                - candidate_budget_seconds: float (default 600)
+                    wall-clock budget per candidate; yang lewat di-drop
+                - candidate_workers: int atau None (default None = min(candidate, CPU))
         """
         self.config = config
         self.forecast_horizon = config.get('forecast_horizon', 7)
@@ -61,6 +105,18 @@ class MLForecaster:
         self.zero_threshold = config.get('zero_threshold', 0.5)
         self.rounding_mode = config.get('rounding_mode', 'half_up')
         self.random_state = config.get('random_state', 42)
+        self.forecast_engine = config.get('forecast_engine', 'dataframe')
+        self.history_dtype = np.dtype(config.get('history_dtype', 'float64'))
+        self.model_format = config.get('model_format', 'pickle')
+        self.compiled_scorer = config.get('compiled_scorer', True)
+        self.assume_sorted = config.get('assume_sorted', True)
+        self.compact_dtypes = config.get('compact_dtypes', False)
+        self.sparse_training = config.get('sparse_training', False)
+        self.sparse_solver = config.get('sparse_solver', 'sparse_cg')
+        self.ridge_refit = config.get('ridge_refit', 'full')
+        self.candidate_selection = config.get('candidate_selection', 'ridge_only')
+        self.candidate_budget_seconds = config.get('candidate_budget_seconds', 600)
+        self.candidate_workers = config.get('candidate_workers')
         
         self.group_cols = ['partnumber', 'site_code']
         self.feature_cols_cat, self.feature_cols_num = get_feature_columns()
@@ -68,85 +124,399 @@ class MLForecaster:
         self.best_model = None
         self.best_model_name = None
         self.metrics_history = {}
+        self.linear_scorer = None
+        self.ridge_stats = None
     
-    def _build_candidate_models(self):
-        """Build candidate models - Simplified to Ridge_log only (as per latest notebook)"""
-        preprocess_sparse = ColumnTransformer(
-            transformers=[('cat', make_ohe(dense=False), self.feature_cols_cat)],
-            remainder='passthrough'
-        )
-        
-        candidates = {
+    def _compile_scorer(self):
+        """Compile best_model ke LinearScorer (None jika bukan linear / disabled)"""
+        self.linear_scorer = (LinearScorer.from_pipeline(self.best_model)
+                              if self.compiled_scorer and self.best_model is not None else None)
+        if self.linear_scorer is not None:
+            print(f"Using compiled linear scorer for {self.best_model_name}")
+        return self.linear_scorer
+    
+    def _predict(self, X, base_offsets=None):
+        """
+        Predict via compiled scorer jika tersedia, otherwise sklearn pipeline
+        
+        base_offsets (dari series_offsets) hanya dipakai oleh compiled scorer;
+        harus sejajar dengan baris X.
+        """
+        if self.linear_scorer is not None:
+            return self.linear_scorer.predict(X, base=base_offsets)
+        return self.best_model.predict(X)
+    
+    def linear_decomposition(self):
+        """
+        Dekomposisi best_model linear:
+            score = intercept + sum_c categorical[c][category] + X[numeric.index] @ numeric
+            yhat  = inverse(score)
+        
+        Returns:
+            dict {'intercept', 'categorical': {kolom: Series}, 'numeric': Series,
+            'inverse': 'identity' | 'expm1'}, atau None untuk model non-linear
+        """
+        scorer = self.linear_scorer or (LinearScorer.from_pipeline(self.best_model)
+                                        if self.best_model is not None else None)
+        if scorer is None:
+            return None
+        
+        return {
+            'intercept': scorer.intercept,
+            'categorical': {col: coefs.copy() for col, coefs in scorer.cat_coefs.items()},
+            'numeric': pd.Series(scorer.coef_num.copy(), index=scorer.num_cols),
+            'inverse': scorer.inverse
+        }
+    
+    def series_offsets(self, combos):
+        """
+        Base offset per series: intercept + kontribusi categorical
+        
+        Konstan selama horizon, jadi cukup dihitung sekali per forecast run.
+        None jika compiled scorer tidak tersedia.
+        """
+        if self.linear_scorer is None:
+            return None
+        return self.linear_scorer.base_offsets(combos[self.group_cols])
+    
+    def _design_frame(self, df, rows=None):
+        """
+        Feature matrix [cat + num] dalam satu copy (tanpa concat dua selection)
+        
+        Args:
+            rows: posisi baris (None = semua)
+        """
+        cols = df.columns.get_indexer(self.feature_cols_cat + self.feature_cols_num)
+        X = df.iloc[slice(None) if rows is None else rows, cols]
+        return compact_feature_dtypes(X) if self.compact_dtypes else X
+    
+    def _fit_sparse(self, est, df_fe, train_idx, valid_idx, y_train):
+        """
+        Fit Pipeline([SparseDesignMatrix, reg]) tanpa dense feature frame
+        
+        Categories di-fit dari baris train (sama dengan OHE), CSR dibangun
+        sekali dari seluruh df_fe lalu di-slice per split. Return prediksi valid.
+        """
+        prep, reg = est.steps[0][1], est.steps[-1][1]
+        cat_pos = df_fe.columns.get_indexer(self.feature_cols_cat)
+        prep.fit(df_fe.iloc[train_idx, cat_pos])
+        
+        X_all = prep.transform(df_fe)
+        X_valid = X_all[valid_idx]
+        X_train = X_all[train_idx]
+        del X_all
+        print(f"Sparse design matrix: {X_train.shape[0]} x {X_train.shape[1]}, "
+              f"nnz={X_train.nnz} ({X_train.nnz / max(1, np.prod(X_train.shape)):.2%})")
+        
+        reg.fit(X_train, y_train)
+        return reg.predict(X_valid)
+    
+    def _series_checksum(self, df_fe, rows):
+        """
+        Checksum per series atas baris train: sum demand_qty + lag/rolling
+        
+        Lag/rolling baris pertama yang lolos dropna mencakup hari-hari awal
+        yang tidak ikut train, jadi perubahan nilai lama mana pun (misal batas
+        clip p99 yang bergeser) mengubah checksum series tersebut.
+        """
+        cols = ['demand_qty'] + [c for c in self.feature_cols_num if c.startswith(('lag_', 'rollmean_'))]
+        sums = df_fe.iloc[rows].groupby(self.group_cols, observed=True, sort=True)[cols].sum()
+        sums.index = pd.MultiIndex.from_arrays(
+            [sums.index.get_level_values(c).astype(str) for c in self.group_cols], names=self.group_cols)
+        return sums.astype(np.float64)
+    
+    def _fit_incremental(self, est, df_fe, train_idx, valid_idx, y, cutoff, stats=None, clip_bounds=None):
+        """
+        Fit Ridge_log dari sufficient statistics (ridge_refit='incremental')
+        
+        stats (dari model yang di-load) dilanjutkan jika layout feature dan
+        alpha sama dan baris train lama (date <= train_through) tidak berubah
+        menurut checksum per series; hanya baris train baru yang ditambahkan.
+        Jika baris lama berubah (hari lama di-upload ulang, atau df_fe tidak
+        di-preprocess dengan stats.clip_bounds sehingga batas p99 bergeser)
+        statistik di-rebuild penuh. clip_bounds (batas yang dipakai untuk
+        df_fe) disimpan di statistik. Return prediksi valid.
+        """
+        ttr = est.named_steps['reg']
+        alpha = ttr.regressor.alpha
+        if (stats is not None and stats.compatible(self.feature_cols_cat, self.feature_cols_num, alpha)
+                and stats.train_through <= cutoff):
+            is_new = (df_fe['date'].iloc[train_idx] > stats.train_through).to_numpy()
+            checksum = self._series_checksum(df_fe, train_idx[~is_new])
+            if stats.matches_history(checksum):
+                stats = copy.copy(stats)
+                new_idx = train_idx[is_new]
+            else:
+                print("Incremental Ridge refit: accumulated rows changed (re-upload / clip bounds not reused), "
+                      "rebuilding")
+                stats = None
+        else:
+            stats = None
+        
+        if stats is None:
+            stats = RidgeSufficientStats(self.feature_cols_cat, self.feature_cols_num, alpha=alpha)
+            checksum = None
+            new_idx = train_idx
+        
+        print(f"Incremental Ridge refit: +{len(new_idx)} rows "
+              f"({stats.n_rows} already accumulated)")
+        stats.update(self._design_frame(df_fe, new_idx), ttr.func(y[new_idx]))
+        stats.train_through = cutoff
+        stats.clip_bounds = clip_bounds
+        added = self._series_checksum(df_fe, new_idx)
+        stats.checksum = added if checksum is None else checksum.add(added, fill_value=0.0)
+        
+        X_valid = self._design_frame(df_fe, valid_idx)
+        self._install_ridge_solution(est, stats, X_valid, y[valid_idx])
+        return est.predict(X_valid)
+    
+    def _install_ridge_solution(self, est, stats, X_sample, y_sample):
+        """Solve stats lalu pasang hasilnya ke Pipeline Ridge_log (prep -> SparseDesignMatrix)"""
+        prep, coef, intercept = stats.solve()
+        
+        # TTR di-fit pada 2 baris hanya untuk membentuk fitted attributes; coef diganti hasil solve
+        ttr = est.named_steps['reg']
+        ttr.fit(prep.transform(X_sample.iloc[:2]), y_sample[:2])
+        ttr.regressor_.coef_ = coef
+        ttr.regressor_.intercept_ = intercept
+        est.steps[0] = ('prep', prep)
+        self.ridge_stats = stats
+        return est
+    
+    def clip_bounds(self):
+        """
+        Batas clip per series dari statistik incremental model yang di-load
+        
+        Berikan ke preprocess_data(clip_bounds=...) sebelum refit incremental
+        supaya baris lama tidak berubah; None jika tidak ada (clip p99 biasa).
+        """
+        if self.ridge_refit != 'incremental' or self.ridge_stats is None:
+            return None
+        return getattr(self.ridge_stats, 'clip_bounds', None)
+    
+    def training_cutoff(self, max_date):
+        """Tanggal terakhir baris train (split train/valid sama dengan notebook)"""
+        return pd.Timestamp(max_date) - pd.Timedelta(days=max(28, 2 * self.forecast_horizon))
+    
+    def accumulate_ridge_stats(self, df_fe, cutoff):
+        """
+        Map step training Ridge_log terdistribusi (satu partition)
+        
+        cutoff harus global (training_cutoff dari tanggal max seluruh data),
+        bukan per partition.
+        
+        Returns:
+            (stats, df_valid): RidgeSufficientStats baris date <= cutoff, dan
+            feature frame baris validasi (+ demand_qty) untuk fit_from_ridge_stats
+        """
+        self.feature_cols_cat, self.feature_cols_num = get_feature_columns(df_fe)
+        alpha = self._build_candidate_models()['Ridge_log'].named_steps['reg'].regressor.alpha
+        
+        is_train = (df_fe['date'] <= cutoff).to_numpy()
+        train_idx, valid_idx = np.flatnonzero(is_train), np.flatnonzero(~is_train)
+        y = df_fe['demand_qty'].to_numpy(dtype=float)
+        
+        stats = RidgeSufficientStats(self.feature_cols_cat, self.feature_cols_num, alpha=alpha)
+        stats.update(self._design_frame(df_fe, train_idx), np.log1p(y[train_idx]))
+        stats.train_through = pd.Timestamp(cutoff)
+        stats.checksum = self._series_checksum(df_fe, train_idx)
+        
+        df_valid = self._design_frame(df_fe, valid_idx).assign(demand_qty=y[valid_idx])
+        return stats, df_valid
+    
+    def fit_from_ridge_stats(self, stats, df_valid):
+        """
+        Reduce step: solve Ridge_log dari statistik gabungan semua partition
+        
+        Args:
+            stats: RidgeSufficientStats hasil merge
+            df_valid: feature frame validasi gabungan (dari accumulate_ridge_stats)
+        """
+        if len(df_valid) == 0:
+            raise ValueError("Data terlalu sedikit untuk split train/validation!")
+        
+        self.feature_cols_cat, self.feature_cols_num = list(stats.cat_cols), list(stats.num_cols)
+        est = self._build_candidate_models()['Ridge_log']
+        X_valid = self._design_frame(df_valid)
+        y_valid = df_valid['demand_qty'].to_numpy(dtype=float)
+        
+        print(f"Solving Ridge_log from merged statistics ({stats.n_rows} train rows)")
+        self._install_ridge_solution(est, stats, X_valid, y_valid)
+        return self._set_trained_model({'Ridge_log': (est, est.predict(X_valid))}, y_valid)
+    
+    def _build_candidate_models(self, include_trees=False):
+        """
+        Build candidate models - Ridge_log only (as per latest notebook)
+        
+        include_trees: tambahkan RF_log, ET_log, GBR_log dari forecast11.ipynb
+        (n_jobs=1: paralelisme di level candidate, lihat candidate_pool)
+        """
+        if self.sparse_training:
+            preprocess_sparse = SparseDesignMatrix(cat_cols=list(self.feature_cols_cat),
+                                                   num_cols=list(self.feature_cols_num))
+            ridge_params = {'alpha': 1.0, 'solver': self.sparse_solver}
+        else:
+            preprocess_sparse = ColumnTransformer(
+                transformers=[('cat', make_ohe(dense=False), self.feature_cols_cat)],
+                remainder='passthrough'
+            )
+            ridge_params = {'alpha': 1.0}
+        if 'random_state' in Ridge().get_params():
+            ridge_params['random_state'] = self.random_state
+        
+        candidates = {}
+        if include_trees:
+            tree_params = {'n_estimators': 800, 'max_depth': None, 'min_samples_leaf': 2,
+                           'n_jobs': 1, 'random_state': self.random_state}
+            trees = {
+                "RF_log": RandomForestRegressor(**tree_params),
+                "ET_log": ExtraTreesRegressor(**tree_params),
+                "GBR_log": GradientBoostingRegressor(random_state=self.random_state),
+            }
+            for name, regressor in trees.items():
+                candidates[name] = Pipeline([
+                    ("prep", clone(preprocess_sparse)),
+                    ("reg", TTR(regressor=regressor, func=np.log1p, inverse_func=np.expm1))
+                ])
+        
+        candidates.update({
             # Using Ridge_log only as per forecast11_ridge_only.ipynb
             "Ridge_log": Pipeline([
                 ("prep", preprocess_sparse),
                 ("reg", TTR(
-                    regressor=Ridge(alpha=1.0, random_state=self.random_state) if 'random_state' in Ridge().get_params() else Ridge(alpha=1.0),
+                    regressor=Ridge(**ridge_params),
                     func=np.log1p, inverse_func=np.expm1
                 ))
             ]),
-        }
+        })
         
         return candidates
     
-    def train_and_select_model(self, df_fe):
-        """Train Ridge_log model (simplified from notebook)"""
+    def train_and_select_model(self, df_fe, clip_bounds=None):
+        """
+        Train Ridge_log model (simplified from notebook)
+        
+        Args:
+            clip_bounds: batas clip per series yang dipakai preprocess_data
+                (return_bounds=True); untuk ridge_refit='incremental' disimpan
+                bersama statistik supaya refit berikutnya bisa memakai batas
+                yang sama (lihat clip_bounds())
+        """
         
         # Update feature columns dynamically from actual data
         from .preprocessing import get_feature_columns
         self.feature_cols_cat, self.feature_cols_num = get_feature_columns(df_fe)
         
         # Split train/valid dengan cutoff yang sama persis dengan notebook
-        cutoff = df_fe['date'].max() - pd.Timedelta(days=max(28, 2 * self.forecast_horizon))
+        cutoff = self.training_cutoff(df_fe['date'].max())
         
-        train = df_fe[df_fe['date'] <= cutoff].copy()
-        valid = df_fe[df_fe['date'] > cutoff].copy()
+        is_train = (df_fe['date'] <= cutoff).to_numpy()
+        train_idx, valid_idx = np.flatnonzero(is_train), np.flatnonzero(~is_train)
         
         # Handle small datasets - use 80/20 split
-        if len(train) < 10 or len(valid) < 3:
+        small_split = len(train_idx) < 10 or len(valid_idx) < 3
+        if small_split:
             print(f"⚠️  Small dataset, using 80/20 split instead")
             split_idx = int(len(df_fe) * 0.8)
-            train = df_fe.iloc[:split_idx].copy()
-            valid = df_fe.iloc[split_idx:].copy()
+            train_idx = np.arange(split_idx)
+            valid_idx = np.arange(split_idx, len(df_fe))
         
-        if len(train) == 0 or len(valid) == 0:
+        if len(train_idx) == 0 or len(valid_idx) == 0:
             raise ValueError("Data terlalu sedikit untuk split train/validation!")
         
-        X_train = pd.concat([train[self.feature_cols_cat], train[self.feature_cols_num]], axis=1)
-        X_valid = pd.concat([valid[self.feature_cols_cat], valid[self.feature_cols_num]], axis=1)
-        y_train = train['demand_qty'].astype(float).values
-        y_valid = valid['demand_qty'].astype(float).values
+        y = df_fe['demand_qty'].to_numpy(dtype=float)
+        y_train, y_valid = y[train_idx], y[valid_idx]
+        
+        # Statistik hanya disimpan untuk model hasil refit incremental
+        prior_stats, self.ridge_stats = self.ridge_stats, None
+        
+        if self.candidate_selection == 'parallel':
+            return self._select_parallel(df_fe, train_idx, valid_idx, y_train, y_valid)
         
         # Build and train Ridge_log model
         candidates = self._build_candidate_models()
-        results = {}
-        fitted = {}
         
         print("Training Ridge_log model...")
         name = "Ridge_log"
         est = candidates[name]
         
-        est.fit(X_train, y_train)
-        y_pred = est.predict(X_valid)
-        
-        # Raw metrics - use same format as notebook
-        m_raw = metrics(y_valid, y_pred)                       # <— tanpa as_percent
-        
-        # Rounded metrics - use exact same formula as notebook
-        m_rnd = eval_with_rounding(y_valid, y_pred, thr=self.zero_threshold)
-        
-        results[name] = {
-            'raw': m_raw,
-            'rounded': m_rnd
-        }
-        fitted[name] = est
+        if self.ridge_refit == 'incremental' and not small_split:
+            y_pred = self._fit_incremental(est, df_fe, train_idx, valid_idx, y, cutoff, prior_stats,
+                                           clip_bounds)
+        elif self.sparse_training:
+            y_pred = self._fit_sparse(est, df_fe, train_idx, valid_idx, y_train)
+        else:
+            # Satu copy per split langsung dari df_fe (tanpa train/valid frame + concat)
+            X_train = self._design_frame(df_fe, train_idx)
+            X_valid = self._design_frame(df_fe, valid_idx)
+            est.fit(X_train, y_train)
+            y_pred = est.predict(X_valid)
+            del X_train, X_valid
+        
+        return self._set_trained_model({name: (est, y_pred)}, y_valid)
+    
+    def _select_parallel(self, df_fe, train_idx, valid_idx, y_train, y_valid):
+        """
+        candidate_selection='parallel': semua candidate di-fit paralel
         
-        print(f"    MAPE% (rounded): {m_rnd['MAPE%']:.4f}")
+        Semua candidate memakai prep yang sama, jadi prep di-fit sekali dan
+        design matrix train/valid (sparse) dibangun sekali; process candidate
+        hanya fit regressor (TTR) di atas matrix yang di-share read-only.
+        """
+        candidates = self._build_candidate_models(include_trees=True)
+        prep = candidates['Ridge_log'].steps[0][1]
+        if self.sparse_training:
+            prep.fit(df_fe.iloc[train_idx, df_fe.columns.get_indexer(self.feature_cols_cat)])
+            X_all = prep.transform(df_fe)
+            X_train, X_valid = X_all[train_idx], X_all[valid_idx]
+            del X_all
+        else:
+            X_train = prep.fit_transform(self._design_frame(df_fe, train_idx))
+            X_valid = prep.transform(self._design_frame(df_fe, valid_idx))
+        
+        regressors = {name: est.steps[-1][1] for name, est in candidates.items()}
+        print(f"Training {len(regressors)} candidates in parallel "
+              f"(budget {self.candidate_budget_seconds}s each): {', '.join(regressors)}")
+        fitted, dropped = fit_candidates(regressors, X_train, y_train, X_valid,
+                                         budget_s=self.candidate_budget_seconds,
+                                         workers=self.candidate_workers)
+        for name, reason in dropped.items():
+            print(f"  ✗ {name} dropped: {reason}")
+        if not fitted:
+            raise RuntimeError(f"Tidak ada candidate yang selesai dalam budget: {dropped}")
+        
+        return self._set_trained_model({
+            name: (Pipeline([("prep", prep), ("reg", fitted[name][0])]), fitted[name][1])
+            for name in regressors if name in fitted
+        }, y_valid)
+    
+    def _set_trained_model(self, fitted, y_valid):
+        """
+        Hitung metrics validasi per candidate dan set yang terbaik sebagai best_model
         
-        # Set as best model
-        self.best_model = fitted[name]
+        Args:
+            fitted: {nama: (fitted pipeline, y_pred valid)}
+        """
+        results = {}
+        for name, (est, y_pred) in fitted.items():
+            # Raw metrics - use same format as notebook
+            m_raw = metrics(y_valid, y_pred)                       # <— tanpa as_percent
+            
+            # Rounded metrics - use exact same formula as notebook
+            m_rnd = eval_with_rounding(y_valid, y_pred, thr=self.zero_threshold)
+            
+            results[name] = {
+                'raw': m_raw,
+                'rounded': m_rnd
+            }
+            print(f"  {name:10s} MAPE% (rounded): {m_rnd['MAPE%']:.4f}")
+        
+        # Best model by MAPE% rounded (sama dengan notebook)
+        name = min(results, key=lambda n: results[n]['rounded']['MAPE%'])
+        self.best_model = fitted[name][0]
         self.best_model_name = name
         self.metrics_history = results
+        self._compile_scorer()
         
         print(f"\nModel trained: {name}")
         print(f"MAPE% (rounded): {results[name]['rounded']['MAPE%']:.4f}")
@@ -156,69 +526,57 @@ class MLForecaster:
     def save_model(self, path='models/best_model.pkl'):
         """Save trained model"""
         Path(path).parent.mkdir(parents=True, exist_ok=True)
+        
+        # Tulis ke tmp lalu replace supaya worker lain tidak membaca file setengah jadi
+        tmp = Path(path).with_name(f"{Path(path).name}.{os.getpid()}.tmp")
+        model = self.best_model
+        if self.model_format == 'mmap':
+            # Convert copy-nya saja; best_model in memory tidak berubah oleh save
+            model = make_mmap_friendly(copy.deepcopy(model))
         joblib.dump({
-            'model': self.best_model,
+            'model': model,
             'model_name': self.best_model_name,
             'config': self.config,
-            'metrics': self.metrics_history
-        }, path)
+            'metrics': self.metrics_history,
+            'ridge_stats': self.ridge_stats,
+            'feature_spec': dict(zip(('lags', 'roll_windows'), map(list, self._lag_spec()))),
+            'format': self.model_format
+        }, tmp, compress=0)
+        os.replace(tmp, path)
+        invalidate_model_cache(path)
         print(f"Model saved to {path}")
     
-    def load_model(self, path='models/best_model.pkl'):
-        """Load trained model"""
+    def load_model(self, path='models/best_model.pkl', use_cache=True):
+        """Load trained model (default via process-wide model cache)"""
         if not Path(path).exists():
             raise FileNotFoundError(f"Model not found: {path}")
         
-        data = joblib.load(path)
+        data = load_model_cached(path) if use_cache else joblib.load(path)
         self.best_model = data['model']
         self.best_model_name = data.get('model_name', 'Unknown')
         self.metrics_history = data.get('metrics', {})
+        self.ridge_stats = data.get('ridge_stats')
+        spec = data.get('feature_spec')
+        if spec is not None:
+            self.feature_cols_cat, self.feature_cols_num = get_feature_columns(
+                spec=(spec['lags'], spec['roll_windows']))
         print(f"Model loaded: {self.best_model_name}")
+        self._compile_scorer()
         return self.best_model
     
-    def one_day_forecast(self, history_df, df_sites, fdate):
-        """Generate forecast for one day"""
-        
-        # Detect lags from feature columns (use same as training)
+    def _lag_spec(self):
+        """Detect lags & rolling windows from feature columns (use same as training)"""
         lag_features = [c for c in self.feature_cols_num if c.startswith('lag_')]
         roll_features = [c for c in self.feature_cols_num if c.startswith('rollmean_')]
         
         # Extract lag numbers
         lags = tuple(sorted([int(c.split('_')[1]) for c in lag_features])) if lag_features else (1,)
         roll_windows = tuple(sorted([int(c.split('_')[1]) for c in roll_features])) if roll_features else ()
-        
-        # Prepare features from history
-        hist = add_calendar_features(history_df)
-        hist = add_group_lags_rolls(
-            hist, 
-            self.group_cols, 
-            target_col='demand_qty',
-            lags=lags, 
-            roll_windows=roll_windows
-        )
-        
-        # Get latest lag/rolling features
-        latest = (hist.sort_values('date')
-                  .groupby(self.group_cols, as_index=False)
-                  .tail(1)[[*self.group_cols] + [c for c in hist.columns
-                                                  if c.startswith('lag_') or c.startswith('rollmean_')]])
-        
-        # Create forecast date combinations
-        combos = df_sites[self.group_cols].drop_duplicates().reset_index(drop=True)
-        combos['date'] = fdate
-        combos = add_calendar_features(combos).merge(latest, on=self.group_cols, how='left')
-        
-        # Fill NaN lag/rolling features with 0
-        lagroll_cols = [c for c in self.feature_cols_num 
-                       if c.startswith('lag_') or c.startswith('rollmean_')]
-        for c in lagroll_cols:
-            if c in combos:
-                combos[c] = combos[c].fillna(0)
-        
-        # Predict - exact same logic as notebook
-        Xf = pd.concat([combos[['partnumber','site_code']],
-                        combos[['year','month','day','dayofweek','weekofyear','is_month_start','is_month_end'] + lagroll_cols]], axis=1)
-        raw_model = np.maximum(0, self.best_model.predict(Xf))              # raw >= 0
+        return lags, roll_windows
+    
+    def _finalize_predictions(self, combos, raw_pred, fdate):
+        """Clip, threshold dan half-up rounding - exact same logic as notebook"""
+        raw_model = np.maximum(0, raw_pred)                                 # raw >= 0
         raw_thr   = np.where(raw_model < self.zero_threshold, 0, raw_model)     # threshold to zero
         yhat      = np.floor(raw_thr + 0.5).astype(int)             # half-up rounding
         
@@ -230,19 +588,73 @@ class MLForecaster:
         return combos[['partnumber', 'site_code', 'date',
                       'yhat_raw', 'yhat_thr', 'yhat_round']]
     
-    def forecast(self, df_full, start_date=None, start_offset_days=1):
+    def one_day_forecast(self, history_df, df_sites, fdate, base_offsets=None, combos=None):
         """
-        Generate multi-day forecast
+        Generate forecast for one day
         
         Args:
-            df_full: Full historical data
-            start_date: Start date for forecast (None = auto from data, or DD/MM/YYYY string)
-            start_offset_days: Offset days from last historical date
-        
-        Returns:
-            DataFrame with forecast results
+            history_df: History DataFrame, atau HistoryStore (lag dibaca dengan slicing store)
+            df_sites: Data sites yang di-forecast
+            fdate: Tanggal forecast
+            base_offsets: series_offsets() untuk unique series df_sites (optional)
+            combos: unique series df_sites yang sudah dihitung (forecast() sekali per run);
+                None = dari HistoryStore.series, atau drop_duplicates atas df_sites
         """
         
+        lags, roll_windows = self._lag_spec()
+        store = isinstance(history_df, HistoryStore)
+        if combos is None:
+            combos = (history_df.series if store
+                      else df_sites[self.group_cols].drop_duplicates().reset_index(drop=True))
+        
+        if store:
+            # Get latest lag/rolling features langsung dari store
+            latest = history_df.latest_features(lags, roll_windows)
+        else:
+            # Prepare features from history
+            hist = add_calendar_features(history_df)
+            hist = add_group_lags_rolls(
+                hist, 
+                self.group_cols, 
+                target_col='demand_qty',
+                lags=lags, 
+                roll_windows=roll_windows,
+                assume_sorted=self.assume_sorted
+            )
+            
+            # Get latest lag/rolling features
+            # (hist keluar dari add_group_lags_rolls sudah urut by group + date)
+            lagroll = [c for c in hist.columns if c.startswith('lag_') or c.startswith('rollmean_')]
+            ordered = hist if self.assume_sorted else hist.sort_values('date')
+            latest = (ordered.groupby(self.group_cols, as_index=False, sort=False, observed=True)
+                      .tail(1)[[*self.group_cols] + lagroll])
+        
+        # Create forecast date combinations
+        combos = combos[self.group_cols].reset_index(drop=True)
+        aligned = store and latest[self.group_cols].equals(combos)
+        combos['date'] = fdate
+        combos = add_calendar_features(combos, compact=self.compact_dtypes)
+        if aligned:
+            # Store di-build dari combos yang sama (urutan series sama) - O(series), tanpa merge
+            for c in latest.columns.difference(self.group_cols, sort=False):
+                combos[c] = latest[c].to_numpy()
+        else:
+            combos = combos.merge(latest, on=self.group_cols, how='left')
+        
+        # Fill NaN lag/rolling features with 0
+        lagroll_cols = [c for c in self.feature_cols_num 
+                       if c.startswith('lag_') or c.startswith('rollmean_')]
+        for c in lagroll_cols:
+            if c in combos:
+                combos[c] = combos[c].fillna(0)
+        
+        # Predict - exact same logic as notebook
+        Xf = self._design_frame(combos)
+        return self._finalize_predictions(combos, self._predict(Xf, base_offsets), fdate)
+    
+    def _prepare_forecast(self, df_full, start_date=None, start_offset_days=1):
+        """Resolve forecast sites, start date and initial history"""
+        
         # Filter sites if specified
         df_sites = df_full if self.forecast_site_codes is None else \
                    df_full[df_full['site_code'].isin(self.forecast_site_codes)].copy()
@@ -270,12 +682,42 @@ class MLForecaster:
         history = df_sites[df_sites['date'] <= start_date - pd.Timedelta(days=1)].copy() \
                   if start_date <= max_hist else df_sites.copy()
         
+        return df_sites, start_date, history
+    
+    def forecast(self, df_full, start_date=None, start_offset_days=1):
+        """
+        Generate multi-day forecast
+        
+        Args:
+            df_full: Full historical data
+            start_date: Start date for forecast (None = auto from data, or DD/MM/YYYY string)
+            start_offset_days: Offset days from last historical date
+        
+        Returns:
+            DataFrame with forecast results
+        """
+        if self.forecast_engine == 'incremental':
+            return self.forecast_incremental(df_full, start_date, start_offset_days)
+        
+        df_sites, start_date, history_df = self._prepare_forecast(df_full, start_date, start_offset_days)
+        
+        # Preallocate history store: series x (history + warm-up gap + horizon)
+        gap = history_df['date'].max() + pd.Timedelta(days=1)
+        gap_days = max(0, (start_date - gap).days) if pd.notna(gap) else 0
+        combos = df_sites[self.group_cols].drop_duplicates().reset_index(drop=True)
+        history = HistoryStore.from_history(history_df, combos, self.group_cols,
+                                            target_col='demand_qty',
+                                            extra_days=gap_days + self.forecast_horizon,
+                                            dtype=self.history_dtype,
+                                            assume_sorted=self.assume_sorted)
+        
+        # Kontribusi partnumber/site_code konstan selama horizon - hitung sekali
+        base = self.series_offsets(combos)
+        
         # Warm-up if there's a gap - use yhat_round like notebook
-        gap = history['date'].max() + pd.Timedelta(days=1)
         while gap < start_date:
-            tmp = self.one_day_forecast(history, df_sites, gap)
-            add_back = tmp.rename(columns={'yhat_round':'demand_qty'})[['partnumber','site_code','date','demand_qty']].copy()
-            history = pd.concat([history, add_back], ignore_index=True)
+            tmp = self.one_day_forecast(history, df_sites, gap, base_offsets=base, combos=combos)
+            history.append(tmp['yhat_round'].to_numpy())
             gap += pd.Timedelta(days=1)
         
         # Main forecast loop
@@ -284,12 +726,68 @@ class MLForecaster:
             d = start_date + pd.Timedelta(days=i)
             print(f"  Forecasting {d.date()}...")
             
-            out = self.one_day_forecast(history, df_sites, d)
+            out = self.one_day_forecast(history, df_sites, d, base_offsets=base, combos=combos)
             forecasts.append(out)
             
             # append rounded predictions back as history for iterative features - exact same as notebook
-            add_back = out.rename(columns={'yhat_round':'demand_qty'})[['partnumber','site_code','date','demand_qty']].copy()
-            history = pd.concat([history, add_back], ignore_index=True)
+            history.append(out['yhat_round'].to_numpy())
+        
+        forecast_df = (pd.concat(forecasts, ignore_index=True)
+                       .sort_values(['partnumber', 'site_code', 'date'])
+                       .reset_index(drop=True))
+        
+        return forecast_df
+    
+    def forecast_incremental(self, df_full, start_date=None, start_offset_days=1):
+        """
+        Multi-day forecast dengan incremental recursive engine
+        
+        Lag/rolling state per series disimpan di LagRingBuffer, sehingga
+        setiap hari hanya membaca window terakhir per series dan semua
+        series diprediksi dalam satu batched predict. yhat_round sama dengan
+        forecast() engine 'dataframe'; yhat_raw sama dalam toleransi floating
+        point (rolling mean pandas vs jumlah langsung dari buffer).
+        """
+        df_sites, start_date, history = self._prepare_forecast(df_full, start_date, start_offset_days)
+        
+        lags, roll_windows = self._lag_spec()
+        lagroll_cols = [c for c in self.feature_cols_num 
+                       if c.startswith('lag_') or c.startswith('rollmean_')]
+        
+        combos = df_sites[self.group_cols].drop_duplicates().reset_index(drop=True)
+        state = LagRingBuffer.from_history(history, combos, self.group_cols,
+                                           target_col='demand_qty',
+                                           lags=lags, roll_windows=roll_windows,
+                                           assume_sorted=self.assume_sorted)
+        
+        # Kontribusi partnumber/site_code konstan selama horizon - hitung sekali
+        base = self.series_offsets(combos)
+        
+        def step(fdate):
+            day = combos.copy()
+            day['date'] = fdate
+            day = add_calendar_features(day, compact=self.compact_dtypes)
+            feats = state.features()
+            for c in lagroll_cols:
+                day[c] = feats[c]
+            
+            Xf = self._design_frame(day)
+            out = self._finalize_predictions(day, self._predict(Xf, base), fdate)
+            state.push(out['yhat_round'].to_numpy())
+            return out
+        
+        # Warm-up if there's a gap - use yhat_round like notebook
+        gap = history['date'].max() + pd.Timedelta(days=1)
+        while gap < start_date:
+            step(gap)
+            gap += pd.Timedelta(days=1)
+        
+        # Main forecast loop
+        forecasts = []
+        for i in range(self.forecast_horizon):
+            d = start_date + pd.Timedelta(days=i)
+            print(f"  Forecasting {d.date()}...")
+            forecasts.append(step(d))
         
         forecast_df = (pd.concat(forecasts, ignore_index=True)
                        .sort_values(['partnumber', 'site_code', 'date'])
@@ -0,0 +1,106 @@
+# backend/app/core/model_cache.py
+"""
+Process-wide cache untuk model artifact (models/best_model.pkl)
+Setiap worker process cukup unpickle model sekali; entry otomatis
+invalid jika file berubah (size / mtime berbeda)
+
+Model di-load dengan joblib mmap_mode='r': numpy array non-object
+(coef_, category arrays dari format 'mmap') di-memory-map sehingga
+beberapa worker process share page yang sama.
+"""
+
+import threading
+from pathlib import Path
+
+import joblib
+from sklearn.preprocessing import OneHotEncoder
+
+from .sparse_design import SparseDesignMatrix
+
+
+# path -> (size, mtime_ns, data)
+_MODEL_CACHE = {}
+_LOCK = threading.Lock()
+
+
+def _iter_estimators(est):
+    """Walk fitted Pipeline / ColumnTransformer / TransformedTargetRegressor"""
+    yield est
+    children = []
+    if hasattr(est, 'steps'):
+        children += [step for _, step in est.steps]
+    if hasattr(est, 'transformers_'):
+        children += [t for _, t, _ in est.transformers_]
+    if hasattr(est, 'regressor_'):
+        children.append(est.regressor_)
+    for child in children:
+        if child is not None and not isinstance(child, str):
+            yield from _iter_estimators(child)
+
+
+def make_mmap_friendly(model):
+    """
+    Convert category arrays OneHotEncoder / SparseDesignMatrix dari object ke fixed-width unicode
+
+    Object array selalu di-pickle per elemen; '<U' array disimpan joblib
+    sebagai buffer mentah sehingga bisa di-load dengan mmap_mode='r'.
+    Transform tetap identik (np.str_ hash/eq sama dengan str).
+    In place; return model.
+    """
+    for est in _iter_estimators(model):
+        if not isinstance(est, (OneHotEncoder, SparseDesignMatrix)) or not hasattr(est, 'categories_'):
+            continue
+        est.categories_ = [
+            cats.astype(str) if cats.dtype == object and all(isinstance(v, str) for v in cats)
+            else cats
+            for cats in est.categories_
+        ]
+    return model
+
+
+def _cache_key(path):
+    return str(Path(path).resolve())
+
+
+def load_model_cached(path):
+    """
+    joblib.load dengan cache per process
+
+    Key = resolved path; entry dipakai ulang selama size & mtime file
+    sama. Model yang dikembalikan di-share antar MLForecaster, jadi
+    jangan di-fit ulang in place.
+    """
+    p = Path(path)
+    if not p.exists():
+        raise FileNotFoundError(f"Model not found: {path}")
+
+    st = p.stat()
+    key = _cache_key(p)
+
+    with _LOCK:
+        entry = _MODEL_CACHE.get(key)
+        if entry is not None and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+            return entry[2]
+
+        data = joblib.load(p, mmap_mode='r')
+        _MODEL_CACHE[key] = (st.st_size, st.st_mtime_ns, data)
+        return data
+
+
+def invalidate_model_cache(path=None):
+    """Hapus entry untuk path (atau semua entry jika path None)"""
+    with _LOCK:
+        if path is None:
+            _MODEL_CACHE.clear()
+        else:
+            _MODEL_CACHE.pop(_cache_key(path), None)
+
+
+def warm_model_cache(path='models/best_model.pkl'):
+    """Preload model ke cache (dipanggil saat worker process start)"""
+    try:
+        if Path(path).exists():
+            load_model_cached(path)
+            print(f"Model cache warmed: {path}")
+    except Exception as e:
+        print(f"Model cache warm-up failed ({path}): {e}")
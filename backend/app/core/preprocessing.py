@@ -7,10 +7,31 @@ Refactored dari forecast11.ipynb
 import pandas as pd
 import numpy as np
 
+# guess_datetime_format public sejak pandas 2.2
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:
+    from pandas._libs.tslibs.parsing import guess_datetime_format
 
-def add_calendar_features(df):
-    """Add calendar-based features"""
-    df = df.copy()
+
+CALENDAR_COLS = ['year', 'month', 'day', 'dayofweek', 'weekofyear',
+                 'is_month_start', 'is_month_end']
+
+# Compact dtype mode (opt-in): calendar int8/int16, lag/rolling float32
+CALENDAR_COMPACT_DTYPES = {
+    'year': np.int16, 'month': np.int8, 'day': np.int8, 'dayofweek': np.int8,
+    'weekofyear': np.int8, 'is_month_start': np.int8, 'is_month_end': np.int8,
+}
+LAGROLL_COMPACT_DTYPE = np.float32
+
+# Calendar dimension table (satu baris per hari), di-cache per process:
+# (hari pertama sebagai int days since epoch, DataFrame)
+_CALENDAR_TABLE = (None, None)
+_CALENDAR_PAD_DAYS = 366
+
+
+def _calendar_accessors(df):
+    """Calendar features via .dt accessors (per row)"""
     df['year'] = df['date'].dt.year
     df['month'] = df['date'].dt.month
     df['day'] = df['date'].dt.day
@@ -21,37 +42,391 @@ def add_calendar_features(df):
     return df
 
 
+def calendar_table(first_day, last_day):
+    """
+    Calendar features per hari untuk range first_day..last_day (int days since epoch)
+    
+    Table di-cache dan hanya di-rebuild (dengan padding) jika range yang
+    diminta di luar cache, jadi training + seluruh horizon forecast
+    memakai table yang sama.
+    
+    Returns:
+        (start, table): table.iloc[d - start] = features hari d
+    """
+    global _CALENDAR_TABLE
+    start, table = _CALENDAR_TABLE
+    if table is not None and first_day >= start and last_day < start + len(table):
+        return start, table
+    
+    if table is not None:
+        first_day, last_day = min(first_day, start), max(last_day, start + len(table) - 1)
+    first_day -= _CALENDAR_PAD_DAYS
+    last_day += _CALENDAR_PAD_DAYS
+    
+    days = pd.DataFrame({'date': pd.to_datetime(np.arange(first_day, last_day + 1), unit='D')})
+    table = _calendar_accessors(days)[CALENDAR_COLS].reset_index(drop=True)
+    _CALENDAR_TABLE = (first_day, table)
+    return first_day, table
+
+
+def add_calendar_features(df, compact=False):
+    """
+    Add calendar-based features
+    
+    Features dibaca dari calendar_table via integer day index (tanpa
+    .dt accessor per row); dtype sama dengan versi accessor.
+    
+    Args:
+        compact: dtype CALENDAR_COMPACT_DTYPES (table di-cast dulu, gather
+            langsung ke int8/int16)
+    """
+    df = df.copy()
+    dates = df['date']
+    if (dates.dtype != 'datetime64[ns]' or dates.isna().any()) or len(df) == 0:
+        df = _calendar_accessors(df)
+        return df.astype(CALENDAR_COMPACT_DTYPES) if compact else df
+    
+    day_idx = dates.to_numpy().astype('datetime64[D]').astype(np.int64)
+    start, table = calendar_table(int(day_idx.min()), int(day_idx.max()))
+    pos = day_idx - start
+    for col in CALENDAR_COLS:
+        values = table[col].to_numpy()
+        if compact:
+            values = values.astype(CALENDAR_COMPACT_DTYPES[col])
+        df[col] = values[pos]
+    return df
+
+
+def compact_feature_dtypes(df):
+    """
+    Downcast feature columns: calendar int8/int16, lag_*/rollmean_* float32
+    
+    Kolom yang sudah compact tidak di-copy (astype copy=False).
+    """
+    dtypes = {col: dtype for col, dtype in CALENDAR_COMPACT_DTYPES.items() if col in df.columns}
+    dtypes.update({col: LAGROLL_COMPACT_DTYPE for col in df.columns
+                   if col.startswith('lag_') or col.startswith('rollmean_')})
+    return df.astype(dtypes, copy=False)
+
+
+def _stable_argsort(key):
+    """Stable argsort untuk int64 key non-negatif (LSD radix, digit 16-bit)"""
+    order = np.arange(len(key))
+    top = int(key.max()) if len(key) else 0
+    shift = 0
+    while True:
+        digit = ((key[order] >> shift) & 0xFFFF).astype(np.uint16)
+        order = order[np.argsort(digit, kind='stable')]
+        shift += 16
+        if top >> shift == 0:
+            return order
+
+
+def _key_values(s):
+    """Array untuk perbandingan urutan: codes untuk categorical (urutan category)"""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s.cat.codes.to_numpy()
+    return s.to_numpy()
+
+
+def is_sorted_by(df, cols):
+    """
+    Cek murah (O(n), tanpa sort) apakah df sudah urut lexicographic by cols
+    
+    True berarti df.sort_values(cols) tidak mengubah urutan baris. Kolom
+    dengan NaN dianggap tidak urut (sort_values menaruh NaN di akhir).
+    """
+    if len(df) < 2:
+        return True
+    
+    greater = np.zeros(len(df) - 1, dtype=bool)  # baris berikut sudah lebih besar
+    equal = np.ones(len(df) - 1, dtype=bool)     # sama di semua kolom sejauh ini
+    try:
+        for col in cols:
+            if df[col].hasnans:
+                return False
+            v = _key_values(df[col])
+            greater |= equal & (v[1:] > v[:-1])
+            equal &= v[1:] == v[:-1]
+    except TypeError:  # mixed types, tidak bisa dibandingkan
+        return False
+    return bool((greater | equal).all())
+
+
+def _sort_by_group_date(df, group_cols, assume_sorted=False):
+    """
+    Sort df by group_cols + date (sama dengan sort_values: stable, NaN di akhir)
+    
+    Returns:
+        (df_sorted, key_arrays, key_na): key_arrays per group col (sejajar
+        df_sorted) untuk group boundary; key_na = baris dengan key NaN
+    """
+    cols = group_cols + ['date']
+    if assume_sorted and is_sorted_by(df, cols):
+        df = df.reset_index(drop=True)
+        return df, [_key_values(df[c]) for c in group_cols], np.zeros(len(df), dtype=bool)
+    
+    # Sort sekali via factorized codes; codes yang sama dipakai untuk group boundary
+    codes, key_na = [], np.zeros(len(df), dtype=bool)
+    for col in cols:
+        c, uniques = pd.factorize(df[col], sort=True)
+        if col != 'date':
+            key_na |= c < 0
+        codes.append(np.where(c < 0, len(uniques), c))
+    
+    # Satu composite int64 key + radix argsort (lebih cepat dari lexsort) jika muat
+    sizes = [int(c.max()) + 1 if len(c) else 1 for c in codes]
+    if np.prod(np.array(sizes, dtype=np.float64)) < 2.0 ** 62:
+        key = np.zeros(len(df), dtype=np.int64)
+        for c, size in zip(codes, sizes):
+            key = key * size + c
+        order = _stable_argsort(key)
+    else:
+        order = np.lexsort(codes[::-1])
+    
+    df = df.take(order).reset_index(drop=True)
+    return df, [c[order] for c in codes[:-1]], key_na[order]
+
+
 def add_group_lags_rolls(df, group_cols, target_col='demand_qty',
-                         lags=(1, 7, 14, 28), roll_windows=(7, 14, 28)):
-    """Add lag and rolling features per group"""
-    df = df.sort_values(group_cols + ['date']).reset_index(drop=True)
-    g = df.groupby(group_cols, group_keys=False)
+                         lags=(1, 7, 14, 28), roll_windows=(7, 14, 28), assume_sorted=False):
+    """
+    Add lag and rolling features per group
+    
+    Sort sekali, group boundary dihitung sekali, dan semua rolling mean
+    diturunkan dari satu prefix sum per group. Semantik sama dengan
+    g.shift(L) dan g.shift(1).rolling(W).mean():
+        lag_L      = y[i-L]                 (NaN jika posisi dalam group < L)
+        rollmean_W = mean(y[i-W : i])       (NaN jika posisi < W atau window berisi NaN)
+    Lag sama persis; rolling mean sama persis untuk demand integer, dan untuk
+    nilai pecahan (misal hasil clip p99) sama dalam toleransi floating point
+    (~1e-15, pandas memakai running Kahan sum atas seluruh kolom).
+    
+    Args:
+        assume_sorted: input (kemungkinan besar) sudah urut by group_cols + date;
+            diverifikasi dengan is_sorted_by, sort hanya dijalankan jika tidak urut
+    """
+    df, key_arrays, key_na = _sort_by_group_date(df, list(group_cols), assume_sorted)
+    n = len(df)
+    
+    values = df[target_col].to_numpy()
+    lag_dtype = values.dtype if values.dtype.kind == 'f' or n == 0 else np.float64
+    y = values.astype(np.float64)
+    
+    # Posisi baris dalam group (group contiguous setelah sort); key NaN = -1
+    idx = np.arange(n)
+    is_start = np.zeros(n, dtype=bool)
+    is_start[:1] = True
+    for c in key_arrays:
+        is_start[1:] |= c[1:] != c[:-1]
+    gid = np.cumsum(is_start) - 1
+    pos = idx - np.maximum.accumulate(np.where(is_start, idx, 0))
+    pos[key_na] = -1
     
     # Lag features
     for L in lags:
-        df[f'lag_{L}'] = g[target_col].shift(L)
+        lag = np.full(n, np.nan, dtype=lag_dtype)
+        valid = pos >= L
+        lag[valid] = values[idx[valid] - L]
+        df[f'lag_{L}'] = lag
+    
+    # Prefix (exclusive) per group: prefix[i] = sum y[start..i-1]
+    finite = ~np.isnan(y)
+    group_cumsum = pd.Series(np.where(finite, y, 0.0)).groupby(gid).cumsum().to_numpy()
+    prefix = np.zeros(n, dtype=np.float64)
+    prefix[1:] = np.where(pos[1:] >= 1, group_cumsum[:-1], 0.0)
+    
+    # Jumlah NaN / nilai negatif sebelum baris i (integer, exact)
+    nan_before = np.concatenate([[0], np.cumsum(~finite)])[:-1]
+    neg_before = np.concatenate([[0], np.cumsum(finite & (y < 0))])[:-1]
     
     # Rolling mean features
     for W in roll_windows:
-        df[f'rollmean_{W}'] = g[target_col].shift(1).rolling(W).mean()
+        roll = np.full(n, np.nan, dtype=np.float64)
+        valid = pos >= W
+        i = idx[valid]
+        mean = (prefix[i] - prefix[i - W]) / W
+        
+        # Sama dengan pandas: clamp sisa rounding ke 0 jika semua nilai satu tanda
+        neg = neg_before[i] - neg_before[i - W]
+        mean[(neg == 0) & (mean < 0)] = 0.0
+        mean[(neg == W) & (mean > 0)] = 0.0
+        mean[(nan_before[i] - nan_before[i - W]) > 0] = np.nan
+        
+        roll[valid] = mean
+        df[f'rollmean_{W}'] = roll
     
     return df
 
 
 def complete_calendar_daily(df, group_cols=('partnumber', 'site_code'), target='demand_qty'):
-    """Complete missing dates with zero demand - exact same as notebook"""
-    out = []
-    for keys, g in df.groupby(list(group_cols), sort=False):
-        gd = (g.groupby('date', as_index=False)[target].sum().sort_values('date'))
-        idx = pd.date_range(gd['date'].min(), gd['date'].max(), freq='D')
-        gd = gd.set_index('date').reindex(idx).fillna(0.0).rename_axis('date').reset_index()
-        for col, val in zip(group_cols, (keys if isinstance(keys, tuple) else (keys,))):
-            gd[col] = val
-        out.append(gd[[*group_cols, 'date', target]])
-    return pd.concat(out, ignore_index=True) if out else df
+    """
+    Complete missing dates with zero demand - exact same as notebook
+    
+    Vectorized: setiap series di-expand ke range min..max harian miliknya
+    (cross join series x day offset), lalu jumlah observed di-scatter ke
+    posisinya. Output identik dengan versi loop per group: urutan series
+    sesuai first appearance, tanggal urut, kolom [*group_cols, 'date', target].
+    """
+    completed = _complete_calendar(df, list(group_cols), target)
+    return completed['df'] if completed is not None else df
+
+
+def _complete_calendar(df, group_cols, target):
+    """Calendar completion; return dict dengan output frame + array per series"""
+    gid = df.groupby(group_cols, sort=False, observed=True).ngroup().to_numpy()
+    valid = (gid >= 0) & df['date'].notna().to_numpy()
+    if not valid.any():
+        return None
+    
+    # Daily sums per (series, date) - same summation as g.groupby('date').sum()
+    obs = (pd.DataFrame({'gid': gid[valid], 'date': df['date'].to_numpy()[valid],
+                         target: df[target].to_numpy()[valid]})
+           .groupby(['gid', 'date'], sort=True, as_index=False)[target].sum())
+    
+    series_gid, obs_sid = np.unique(obs['gid'].to_numpy(), return_inverse=True)
+    obs_date = obs['date'].to_numpy()
+    obs_val = obs[target].to_numpy()
+    
+    # Per-series calendar range (min..max, freq='D')
+    starts = np.flatnonzero(np.r_[True, obs_sid[1:] != obs_sid[:-1]])
+    ends = np.r_[starts[1:], len(obs_sid)] - 1
+    gmin = obs_date[starts]
+    one_day = np.timedelta64(1, 'D')
+    lengths = ((obs_date[ends] - gmin) // one_day).astype(np.int64) + 1
+    
+    # Cross join series x own day offsets
+    offsets = np.r_[0, np.cumsum(lengths)[:-1]]
+    total = int(lengths.sum())
+    row_sid = np.repeat(np.arange(len(series_gid)), lengths)
+    dates = np.repeat(gmin, lengths) + (np.arange(total) - np.repeat(offsets, lengths)) * one_day
+    
+    # Scatter observed sums (tanggal di luar grid harian hilang, sama seperti reindex)
+    delta = obs_date - gmin[obs_sid]
+    on_grid = (delta % one_day) == np.timedelta64(0)
+    pos = offsets[obs_sid] + (delta // one_day).astype(np.int64)
+    
+    if on_grid.sum() == total:
+        # Tidak ada tanggal yang di-fill -> dtype hasil sum dipertahankan
+        values = obs_val
+    else:
+        values = np.zeros(total, dtype=np.float64)
+        values[pos[on_grid]] = obs_val[on_grid]
+    
+    # Group keys (assignment scalar per group -> dtype di-infer dari nilai key)
+    first_idx = (pd.Series(np.flatnonzero(valid)).groupby(gid[valid], sort=True).min()
+                 .loc[series_gid].to_numpy())
+    out = {}
+    for col in group_cols:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            # Categorical key tetap encoded (codes di-gather, categories sama)
+            codes = df[col].cat.codes.to_numpy()[first_idx]
+            out[col] = pd.Categorical.from_codes(codes[row_sid], dtype=df[col].dtype)
+            continue
+        keys = pd.Series(df[col].to_numpy()[first_idx].tolist())
+        out[col] = keys.take(row_sid).reset_index(drop=True)
+    out['date'] = dates
+    out[target] = values
+    
+    return {
+        'df': pd.DataFrame(out),
+        'row_sid': row_sid,
+        'lengths': lengths,
+        'obs_sid': obs_sid[on_grid],
+        'obs_val': obs_val[on_grid],
+    }
+
+
+def groupwise_quantile(values, group_ids, n_groups, q=0.99, implicit_zeros=None):
+    """
+    Quantile per group tanpa Python callback per group
+    
+    Sort sekali by (group, value) lalu index arithmetic. Interpolasi
+    linear identik dengan `Series.quantile` (np.percentile method='linear'),
+    termasuk rumus lerp numpy untuk gamma >= 0.5. NaN di-skip.
+    
+    Args:
+        values: array nilai
+        group_ids: array group id (0..n_groups-1) per nilai
+        n_groups: jumlah group
+        q: quantile (0-1)
+        implicit_zeros: optional array jumlah nilai 0.0 tambahan per group
+            yang tidak ada di `values` (mis. hari yang di-fill kalender)
+    
+    Returns:
+        np.ndarray float64 quantile per group (NaN untuk group kosong)
+    """
+    values = np.asarray(values)
+    group_ids = np.asarray(group_ids)
+    if values.dtype.kind == 'f':
+        keep = ~np.isnan(values)
+        values, group_ids = values[keep], group_ids[keep]
+    
+    order = np.lexsort((values, group_ids))
+    sorted_vals = values[order].astype(np.float64)
+    counts = np.bincount(group_ids, minlength=n_groups)
+    starts = np.r_[0, np.cumsum(counts)[:-1]]
+    zeros = (np.zeros(n_groups, dtype=np.int64) if implicit_zeros is None
+             else np.asarray(implicit_zeros, dtype=np.int64))
+    n = counts + zeros
+    
+    # Same as numpy: virtual index (n - 1) * q, clamp ke elemen terakhir
+    quantiles = np.asarray([q * 100.0]) / 100
+    virtual = (n - 1) * quantiles[0]
+    above = virtual >= n - 1
+    prev_idx = np.where(above, n - 1, np.floor(virtual)).astype(np.int64)
+    next_idx = np.where(above, n - 1, prev_idx + 1)
+    gamma = virtual - np.where(above, -1, prev_idx)
+    
+    # Order statistic pada (values + implicit zeros): zeros disisipkan setelah nilai negatif
+    negatives = np.bincount(group_ids[order][sorted_vals < 0], minlength=n_groups)
+    last = max(len(sorted_vals) - 1, 0)
+    
+    def order_stat(idx):
+        in_zeros = (idx >= negatives) & (idx < negatives + zeros)
+        src = np.where(idx >= negatives + zeros, idx - zeros, idx)
+        picked = sorted_vals[np.clip(starts + src, 0, last)] if len(sorted_vals) else 0.0
+        return np.where(in_zeros, 0.0, picked)
+    
+    a = order_stat(prev_idx)
+    b = order_stat(next_idx)
+    diff_b_a = b - a
+    result = a + diff_b_a * gamma
+    result = np.where(gamma >= 0.5, b - diff_b_a * (1 - gamma), result)
+    return np.where(n > 0, result, np.nan)
+
+
+def normalize_key_column(s, categorical=True):
+    """
+    Normalize partnumber/site_code: str + strip, hasil category dtype
+    
+    str/strip hanya dijalankan pada unique values lalu di-map balik lewat
+    factorize codes. Categories urut (lexicographic) sehingga sort dan
+    groupby by codes menghasilkan urutan yang sama dengan string biasa.
+    
+    Args:
+        categorical: False = kembalikan object string (perilaku lama)
+    """
+    codes, uniques = pd.factorize(s)
+    stripped = pd.Index(uniques).astype(str).str.strip()
+    
+    # Missing values: str() per baris seperti astype(str) ('nan' / 'None')
+    na = codes < 0
+    if na.any():
+        na_str = s[na].astype(str).str.strip()
+        na_uniques = pd.Index(na_str.unique())
+        codes[na] = len(stripped) + na_uniques.get_indexer(na_str)
+        stripped = stripped.append(na_uniques)
+    if not categorical:
+        return pd.Series(stripped.to_numpy()[codes], index=s.index, name=s.name)
+    
+    # Unique yang sama setelah strip (mis. 'A' dan ' A') digabung
+    cat_codes, categories = pd.factorize(stripped, sort=True)
+    return pd.Series(pd.Categorical.from_codes(cat_codes[codes], categories=categories),
+                     index=s.index, name=s.name)
 
 
-def load_and_normalize(file_path, dayfirst=True):
+def load_and_normalize(file_path, dayfirst=True, categorical_keys=True):
     """
     Load and normalize data from CSV with enhanced date parsing
     
@@ -60,11 +435,16 @@ def load_and_normalize(file_path, dayfirst=True):
     - 03/03/2025 (with leading zero)
     - 2025-03-03 (ISO format)
     - 3-3-2025 (dash separator)
+    
+    Args:
+        categorical_keys: partnumber/site_code sebagai category dtype (hemat
+            memory, groupby/merge by integer codes); di-decode saat to_csv
     """
     from .utils import robust_read_table
     
     # Load
     df = robust_read_table(file_path)
+    read_path = df.attrs.get('read_path', 'python')
     
     # Normalize columns
     df.columns = [c.strip().lower() for c in df.columns]
@@ -76,8 +456,8 @@ def load_and_normalize(file_path, dayfirst=True):
         raise ValueError(f"Kolom wajib hilang: {miss}. Header: {list(df.columns)}")
     
     # Normalize data types
-    df['partnumber'] = df['partnumber'].astype(str).str.strip()
-    df['site_code'] = df['site_code'].astype(str).str.strip()
+    df['partnumber'] = normalize_key_column(df['partnumber'], categorical_keys)
+    df['site_code'] = normalize_key_column(df['site_code'], categorical_keys)
     
     # Enhanced date parsing dengan multiple strategies
     df['date'] = parse_dates_flexible(df['date'], dayfirst=dayfirst)
@@ -89,7 +469,140 @@ def load_and_normalize(file_path, dayfirst=True):
     # Normalize demand_qty
     df['demand_qty'] = pd.to_numeric(df['demand_qty'], errors='coerce').fillna(0)
     df = df.sort_values(['partnumber', 'site_code', 'date']).reset_index(drop=True)
+    df.attrs['read_path'] = read_path
+    
+    return df
+
+
+# Kolom hasil fold per chunk: integer codes ke vocabulary (raw date belum di-parse)
+_FOLD_KEYS = ['partnumber', 'site_code', 'date']
+
+
+def _encode_with_vocab(values, vocab):
+    """
+    values -> codes ke vocab; value baru di-append (urutan first appearance)
+    
+    Returns:
+        (codes int64, vocab baru)
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    idx = vocab.get_indexer(uniques)
+    new = idx < 0
+    if new.any():
+        idx[new] = len(vocab) + np.arange(new.sum())
+        vocab = vocab.append(pd.Index(uniques[new], dtype=object))
+    return idx.astype(np.int64)[codes], vocab
+
+
+def _fold_chunk(chunk, vocabs):
+    """Normalize satu chunk lalu aggregate ke (partnumber, site_code, raw date) codes -> sum, n_rows"""
+    chunk.columns = [c.strip().lower() for c in chunk.columns]
+    req = {'demand_qty', 'date', 'partnumber', 'site_code'}
+    miss = req - set(chunk.columns)
+    if miss:
+        raise ValueError(f"Kolom wajib hilang: {miss}. Header: {list(chunk.columns)}")
+    
+    part = {}
+    for col in _FOLD_KEYS:
+        values = (np.asarray(chunk[col], dtype=object) if col == 'date'
+                  else normalize_key_column(chunk[col], categorical=False).to_numpy())
+        part[col], vocabs[col] = _encode_with_vocab(values, vocabs[col])
+    part['demand_qty'] = pd.to_numeric(chunk['demand_qty'], errors='coerce').fillna(0).to_numpy()
+    part['n_rows'] = np.ones(len(chunk), dtype=np.int64)
+    return _combine_folds([pd.DataFrame(part)])
+
+
+def _combine_folds(parts):
+    """Gabungkan partial aggregate (urutan first appearance dipertahankan)"""
+    df = parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)
+    return (df.groupby(_FOLD_KEYS, sort=False, as_index=False)
+            .agg(demand_qty=('demand_qty', 'sum'), n_rows=('n_rows', 'sum')))
+
+
+def _sorted_vocab_codes(codes, vocab):
+    """Remap codes ke urutan lexicographic vocab; return (codes baru, sorted vocab)"""
+    order = np.argsort(vocab.to_numpy(dtype=object), kind='stable')
+    rank = np.empty(len(vocab), dtype=np.int64)
+    rank[order] = np.arange(len(vocab))
+    return rank[codes], vocab.take(order)
+
+
+def load_and_aggregate_chunked(file_path, dayfirst=True, chunk_rows=500_000, categorical_keys=True):
+    """
+    Streaming loader: baca file per chunk dan fold ke aggregate harian
+    
+    Peak memory dibatasi oleh jumlah key unik (partnumber, site_code,
+    raw date), bukan ukuran file: setiap chunk di-encode ke integer codes
+    (vocabulary per kolom) lalu di-aggregate. Output sudah teraggregate
+    per (partnumber, site_code, date) dengan kolom [partnumber, site_code,
+    date, demand_qty]; setelah preprocess_data hasilnya sama dengan input
+    load_and_normalize: persis untuk quantity integer, dalam toleransi
+    floating point untuk quantity pecahan (urutan penjumlahan per chunk).
+    
+    Date di-parse sekali di akhir pada unique raw values dengan bobot
+    jumlah baris, sehingga deteksi format sama dengan parse_dates_flexible.
+    Kolom selain kolom wajib tidak ikut.
+    """
+    from .utils import table_chunk_sources
     
+    # Error encoding / parser bisa muncul di tengah file -> ulang dari awal dengan reader berikutnya
+    error = None
+    for read_path, make_chunks in table_chunk_sources(file_path, chunk_rows):
+        vocabs = {col: pd.Index([], dtype=object) for col in _FOLD_KEYS}
+        agg, parts, pending, n_chunks = None, [], 0, 0
+        try:
+            for chunk in make_chunks():
+                parts.append(_fold_chunk(chunk, vocabs))
+                pending += len(parts[-1])
+                n_chunks += 1
+                # Compact jika partial aggregate sudah sebesar aggregate berjalan
+                if pending >= max(chunk_rows, 0 if agg is None else len(agg)):
+                    agg = _combine_folds(([] if agg is None else [agg]) + parts)
+                    parts, pending = [], 0
+            if parts:
+                agg = _combine_folds(([] if agg is None else [agg]) + parts)
+            break
+        except Exception as e:
+            if isinstance(e, ValueError) and 'Kolom wajib hilang' in str(e):
+                raise
+            error = e
+            print(f"Chunked read via {read_path} failed ({e}), trying next reader")
+    else:
+        raise error
+    
+    if agg is None or len(agg) == 0:
+        raise ValueError("File tidak berisi data")
+    print(f"Folded {int(agg['n_rows'].sum())} rows in {n_chunks} chunks into {len(agg)} keys ({read_path})")
+    
+    # Parse unique raw dates sekali (vocab = urutan first appearance, bobot = jumlah baris asli)
+    date_codes = agg['date'].to_numpy()
+    n_rows = agg['n_rows'].to_numpy()
+    raw_dates = vocabs['date']
+    counts = np.bincount(date_codes, weights=n_rows, minlength=len(raw_dates)).astype(np.int64)
+    valid = ~pd.isna(raw_dates)
+    parsed = _parse_unique_dates(pd.Series(np.asarray(raw_dates)[valid]), counts[valid],
+                                 int(n_rows.sum()), dayfirst)
+    values = np.full(len(raw_dates), np.datetime64('NaT'), dtype='datetime64[ns]')
+    values[valid] = parsed.to_numpy(dtype='datetime64[ns]')
+    dates = values[date_codes]
+    
+    if np.isnat(dates).any():
+        na_count = int(n_rows[np.isnat(dates)].sum())
+        raise ValueError(f"Ada {na_count} tanggal gagal parse. Cek format kolom 'date'.")
+    
+    # Raw date berbeda bisa jadi tanggal yang sama ('3/3/2025' vs '03/03/2025');
+    # codes di-remap ke urutan string supaya hasil urut seperti sort_values
+    pn_codes, pn_vocab = _sorted_vocab_codes(agg['partnumber'].to_numpy(), vocabs['partnumber'])
+    site_codes, site_vocab = _sorted_vocab_codes(agg['site_code'].to_numpy(), vocabs['site_code'])
+    df = (pd.DataFrame({'partnumber': pn_codes, 'site_code': site_codes, 'date': dates,
+                        'demand_qty': agg['demand_qty'].to_numpy()})
+          .groupby(_FOLD_KEYS, sort=True, as_index=False)
+          .agg(demand_qty=('demand_qty', 'sum')))
+    
+    for col, vocab in (('partnumber', pn_vocab), ('site_code', site_vocab)):
+        keys = pd.Categorical.from_codes(df[col].to_numpy(), categories=vocab)
+        df[col] = keys if categorical_keys else np.asarray(keys, dtype=object)
+    df.attrs['read_path'] = f"{read_path}-chunked"
     return df
 
 
@@ -104,24 +617,66 @@ def parse_dates_flexible(date_series, dayfirst=True):
     - 3-3-2025 (dash)
     - Mixed formats dalam satu column
     
+    Parsing hanya dilakukan pada unique values (biasanya ratusan tanggal
+    untuk jutaan baris), lalu hasilnya di-map balik lewat factorize codes.
+    Success rate tiap strategy tetap dihitung per baris.
+    
     Args:
-        date_series: pandas Series dengan tanggal
+        date_series: pandas Series dengan tanggal (object atau category)
         dayfirst: True untuk DD/MM/YYYY, False untuk MM/DD/YYYY
     
     Returns:
         pandas Series dengan datetime objects
     """
+    codes, uniques = pd.factorize(date_series)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    uniques = pd.Series(np.asarray(uniques, dtype=object))
+    
+    parsed = _parse_unique_dates(uniques, counts, len(date_series), dayfirst)
+    
+    values = parsed.to_numpy(dtype='datetime64[ns]')
+    result = np.full(len(codes), np.datetime64('NaT'), dtype='datetime64[ns]')
+    result[codes >= 0] = values[codes[codes >= 0]]
+    return pd.Series(result, index=date_series.index, name=date_series.name)
+
+
+def _to_datetime_detected(values, dayfirst):
+    """
+    pd.to_datetime dengan format eksplisit yang dideteksi sekali dari
+    nilai pertama (sama dengan inference pandas), fallback tanpa format
+    """
+    non_null = values.dropna()
+    fmt = None
+    if len(non_null) and isinstance(non_null.iloc[0], str):
+        fmt = guess_datetime_format(non_null.iloc[0], dayfirst=dayfirst)
+    if fmt is not None:
+        return pd.to_datetime(values, format=fmt, errors='coerce')
+    return pd.to_datetime(values, dayfirst=dayfirst, errors='coerce')
+
+
+def _parse_unique_dates(uniques, counts, total, dayfirst=True):
+    """
+    Jalankan strategy parsing pada unique date values
+    
+    Args:
+        uniques: Series unique date values
+        counts: jumlah baris per unique value (untuk success rate per baris)
+        total: jumlah baris asli (termasuk NaN)
+        dayfirst: True untuk DD/MM/YYYY, False untuk MM/DD/YYYY
+    """
+    def success_rate(parsed):
+        return counts[parsed.notna().to_numpy()].sum() / total if total else np.nan
     
     # Strategy 1: Standard pandas parsing dengan dayfirst
     try:
-        parsed = pd.to_datetime(date_series, dayfirst=dayfirst, errors='coerce')
+        parsed = _to_datetime_detected(uniques, dayfirst)
         
         # Jika success rate > 80%, assume format benar
-        if parsed.notna().mean() > 0.8:
+        if success_rate(parsed) > 0.8:
             # Fill remaining NaT dengan strategy lain
             if parsed.isna().any():
                 mask = parsed.isna()
-                parsed[mask] = pd.to_datetime(date_series[mask], dayfirst=not dayfirst, errors='coerce')
+                parsed[mask] = _to_datetime_detected(uniques[mask], not dayfirst)
             
             return parsed
     except Exception as e:
@@ -129,8 +684,8 @@ def parse_dates_flexible(date_series, dayfirst=True):
     
     # Strategy 2: Try opposite dayfirst
     try:
-        parsed = pd.to_datetime(date_series, dayfirst=not dayfirst, errors='coerce')
-        if parsed.notna().mean() > 0.8:
+        parsed = _to_datetime_detected(uniques, not dayfirst)
+        if success_rate(parsed) > 0.8:
             return parsed
     except Exception as e:
         print(f"Opposite dayfirst parsing failed: {e}")
@@ -148,18 +703,18 @@ def parse_dates_flexible(date_series, dayfirst=True):
     
     for fmt in formats_to_try:
         try:
-            parsed = pd.to_datetime(date_series, format=fmt, errors='coerce')
-            success_rate = parsed.notna().mean()
+            parsed = pd.to_datetime(uniques, format=fmt, errors='coerce')
+            rate = success_rate(parsed)
             
-            if success_rate > 0.8:
-                print(f"Date parsing successful with format: {fmt} (success rate: {success_rate:.1%})")
+            if rate > 0.8:
+                print(f"Date parsing successful with format: {fmt} (success rate: {rate:.1%})")
                 
                 # Try to fill remaining NaT with other formats
                 if parsed.isna().any():
                     mask = parsed.isna()
                     for alt_fmt in formats_to_try:
                         if alt_fmt != fmt and mask.any():
-                            parsed[mask] = pd.to_datetime(date_series[mask], format=alt_fmt, errors='coerce')
+                            parsed[mask] = pd.to_datetime(uniques[mask], format=alt_fmt, errors='coerce')
                             mask = parsed.isna()
                 
                 return parsed
@@ -168,8 +723,8 @@ def parse_dates_flexible(date_series, dayfirst=True):
     
     # Strategy 4: Infer format (last resort)
     try:
-        parsed = pd.to_datetime(date_series, infer_datetime_format=True, errors='coerce')
-        if parsed.notna().mean() > 0.5:
+        parsed = pd.to_datetime(uniques, infer_datetime_format=True, errors='coerce')
+        if success_rate(parsed) > 0.5:
             print(f"Date parsing successful with infer_datetime_format")
             return parsed
     except Exception as e:
@@ -177,53 +732,125 @@ def parse_dates_flexible(date_series, dayfirst=True):
     
     # Final fallback: Return with coerce (akan ada NaT)
     print("WARNING: Using fallback date parsing - some dates may be NaT")
-    return pd.to_datetime(date_series, dayfirst=dayfirst, errors='coerce')
+    return pd.to_datetime(uniques, dayfirst=dayfirst, errors='coerce')
+
 
+def series_key_index(keys, group_cols):
+    """MultiIndex group key sebagai str (index clip bounds / checksum per series)"""
+    return pd.MultiIndex.from_arrays([keys[c].astype(str).to_numpy() for c in group_cols],
+                                     names=list(group_cols))
 
-def preprocess_data(df, group_cols=('partnumber', 'site_code')):
-    """Complete preprocessing pipeline - exact same as notebook"""
+
+def preprocess_data(df, group_cols=('partnumber', 'site_code'), fused_clip=False, assume_sorted=False,
+                    clip_bounds=None, return_bounds=False):
+    """
+    Complete preprocessing pipeline - exact same as notebook
+    
+    Output selalu urut by partnumber, site_code, date.
+    
+    Args:
+        fused_clip: If True, hitung batas clip p99 di pass yang sama dengan
+            calendar completion (dari nilai observed + jumlah hari yang di-fill),
+            sehingga completed frame hanya di-scan sekali saat clip
+        assume_sorted: input sudah urut by partnumber, site_code, date (seperti
+            output load_and_normalize); diverifikasi, groupby tidak perlu sort
+        clip_bounds: optional Series batas clip per series (index
+            series_key_index) dari run sebelumnya; series yang ada di sini
+            di-clip dengan batas tersimpan (baris lama tidak berubah saat hari
+            baru masuk), series lain dengan p99 data sekarang
+        return_bounds: If True, return (df, clip_bounds) dengan batas clip
+            yang dipakai untuk setiap series di df
+    """
+    group_cols = list(group_cols)
+    keys = ['partnumber', 'site_code', 'date']
     
     # Aggregate daily, complete calendar, clip outliers per series (p99) - same as notebook
-    df = (df.groupby(['partnumber', 'site_code', 'date'], as_index=False)
+    # (pada input urut, urutan first appearance = urutan sorted)
+    presorted = assume_sorted and is_sorted_by(df, keys)
+    df = (df.groupby(keys, as_index=False, sort=not presorted, observed=True)
           .agg(demand_qty=('demand_qty', 'sum')))
-    df = complete_calendar_daily(df, group_cols=group_cols, target='demand_qty')
-    p99 = df.groupby(list(group_cols))['demand_qty'].transform(lambda s: s.quantile(0.99))
-    df['demand_qty'] = df['demand_qty'].clip(lower=0, upper=p99)
     
+    completed = _complete_calendar(df, group_cols, 'demand_qty')
+    if completed is None:
+        empty = pd.Series([], index=series_key_index(df.iloc[:0], group_cols), name='p99', dtype=np.float64)
+        return (df, empty) if return_bounds else df
+    df = completed['df']
+    n_series = len(completed['lengths'])
+    
+    if fused_clip:
+        p99 = groupwise_quantile(completed['obs_val'], completed['obs_sid'], n_series, q=0.99,
+                                 implicit_zeros=completed['lengths'] - np.bincount(
+                                     completed['obs_sid'], minlength=n_series))
+    else:
+        p99 = groupwise_quantile(df['demand_qty'].to_numpy(), completed['row_sid'], n_series, q=0.99)
+    
+    if clip_bounds is not None or return_bounds:
+        starts = np.r_[0, np.cumsum(completed['lengths'])[:-1]]
+        keys = series_key_index(df.iloc[starts], group_cols)
+        if clip_bounds is not None and len(clip_bounds):
+            pos = clip_bounds.index.get_indexer(keys)
+            stored = clip_bounds.to_numpy(dtype=np.float64)[np.maximum(pos, 0)]
+            p99 = np.where(pos >= 0, stored, p99)
+    
+    df['demand_qty'] = df['demand_qty'].clip(lower=0, upper=pd.Series(p99[completed['row_sid']], index=df.index))
+    
+    if return_bounds:
+        return df, pd.Series(p99, index=keys, name='p99')
     return df
 
 
-def prepare_features(df, group_cols, lags=(1, 7, 14, 28), roll_windows=(7, 14, 28), auto_adjust=True):
+def feature_spec(df, group_cols, lags=(1, 7, 14, 28), roll_windows=(7, 14, 28)):
+    """
+    Lags & rolling windows yang muat di data (auto_adjust prepare_features)
+    
+    Untuk training terdistribusi spec ini ditentukan sekali dari seluruh
+    upload lalu dipakai semua partition dengan auto_adjust=False, supaya
+    layout feature sama (partition dengan series pendek tidak memilih
+    lags lebih sedikit).
+    
+    Returns:
+        tuple: (lags, roll_windows)
+    """
+    # Check max days span per group
+    dates = df.groupby(group_cols, observed=True)['date']
+    max_days = (dates.max() - dates.min()).max().days
+    
+    print(f"Data span: {max_days} days")
+    
+    # Adjust lags based on available data
+    if max_days < 56:  # Not enough for lag_28 + rollmean_28
+        # Use only lags that fit in data
+        lags = tuple([l for l in [1, 7, 14, 28] if l < max_days - 7])
+        roll_windows = tuple([w for w in [7, 14] if w < max_days - 7])
+        
+        if not lags:  # Very small dataset
+            lags = (1,)
+            roll_windows = ()
+        
+        print(f"⚠️  Small dataset! Adjusted lags: {lags}, windows: {roll_windows}")
+    
+    return tuple(lags), tuple(roll_windows)
+
+
+def prepare_features(df, group_cols, lags=(1, 7, 14, 28), roll_windows=(7, 14, 28), auto_adjust=True,
+                     assume_sorted=False, compact_dtypes=False):
     """
     Prepare all features for modeling
     
     Args:
         auto_adjust: If True, automatically adjust lags based on data availability
+        assume_sorted: df sudah urut by group_cols + date (seperti output
+            preprocess_data); re-sort di add_group_lags_rolls di-skip jika valid
+        compact_dtypes: calendar int8/int16 dan lag/rolling float32
+            (lihat compact_feature_dtypes)
     """
     
     # Auto-adjust lags untuk small datasets
     if auto_adjust:
-        # Check max days span per group
-        max_days = (df.groupby(group_cols)['date']
-                   .apply(lambda x: (x.max() - x.min()).days)
-                   .max())
-        
-        print(f"Data span: {max_days} days")
-        
-        # Adjust lags based on available data
-        if max_days < 56:  # Not enough for lag_28 + rollmean_28
-            # Use only lags that fit in data
-            lags = tuple([l for l in [1, 7, 14, 28] if l < max_days - 7])
-            roll_windows = tuple([w for w in [7, 14] if w < max_days - 7])
-            
-            if not lags:  # Very small dataset
-                lags = (1,)
-                roll_windows = ()
-            
-            print(f"⚠️  Small dataset! Adjusted lags: {lags}, windows: {roll_windows}")
+        lags, roll_windows = feature_spec(df, group_cols, lags, roll_windows)
     
     # Add calendar features
-    df_fe = add_calendar_features(df)
+    df_fe = add_calendar_features(df, compact=compact_dtypes)
     
     # Add lag and rolling features
     df_fe = add_group_lags_rolls(
@@ -231,9 +858,14 @@ def prepare_features(df, group_cols, lags=(1, 7, 14, 28), roll_windows=(7, 14, 2
         group_cols, 
         target_col='demand_qty',
         lags=lags, 
-        roll_windows=roll_windows
+        roll_windows=roll_windows,
+        assume_sorted=assume_sorted
     )
     
+    # Downcast sebelum filter supaya copy hasil filter sudah compact
+    if compact_dtypes:
+        df_fe = compact_feature_dtypes(df_fe)
+    
     # Remove rows with null lag/roll features
     need = [c for c in df_fe.columns 
             if c.startswith('lag_') or c.startswith('rollmean_')]
@@ -254,12 +886,13 @@ def prepare_features(df, group_cols, lags=(1, 7, 14, 28), roll_windows=(7, 14, 2
     return df_fe
 
 
-def get_feature_columns(df_fe=None):
+def get_feature_columns(df_fe=None, spec=None):
     """
     Get feature column names (dynamic if df provided)
     
     Args:
         df_fe: DataFrame with features (optional). If provided, auto-detect lag/roll columns
+        spec: (lags, roll_windows) optional, misal feature spec model tersimpan
     
     Returns:
         tuple: (categorical_cols, numerical_cols)
@@ -278,6 +911,10 @@ def get_feature_columns(df_fe=None):
         roll_cols = sorted([c for c in df_fe.columns if c.startswith('rollmean_')])
         feature_cols_num = calendar_features + lag_cols + roll_cols
         print(f"Dynamic features: {len(lag_cols)} lags, {len(roll_cols)} rolling means")
+    elif spec is not None:
+        lags, roll_windows = spec
+        feature_cols_num = (calendar_features + sorted(f'lag_{l}' for l in lags)
+                            + sorted(f'rollmean_{w}' for w in roll_windows))
     else:
         # Default full feature set
         feature_cols_num = calendar_features + [
@@ -0,0 +1,289 @@
+# backend/app/core/ridge_stats.py
+"""
+Sufficient statistics Ridge (X'X, X'y) untuk refit incremental
+Fit Ridge dengan intercept sepenuhnya ditentukan oleh X'X dan X'y atas
+design [one-hot cat_cols | num_cols | 1], sehingga retraining cukup
+menambahkan statistik baris baru lalu solve ulang.
+
+Kolom categorical pertama (partnumber) menjadi block diagonal: setiap
+baris punya paling banyak satu partnumber, jadi block partnumber x
+partnumber cukup disimpan sebagai count per category. Solve memakai
+Schur complement atas block tersebut; sistem dense hanya sebesar
+kolom lain (site one-hot + numeric + intercept).
+
+Numeric di-akumulasi setelah dikurangi shift (mean batch pertama).
+Intercept yang tidak di-penalize menyerap shift, jadi solusi tidak
+berubah; tanpa shift kolom seperti year (hampir konstan, sejajar
+dengan intercept) membuat sistem sangat ill-conditioned.
+
+Refit incremental hanya valid selama baris yang sudah diakumulasi tidak
+berubah. Batas clip p99 per series ikut bergeser saat hari baru masuk,
+jadi batas yang dipakai disimpan (clip_bounds) dan diberikan lagi ke
+preprocess_data pada refit berikutnya. Checksum per series atas baris
+train lama mendeteksi perubahan lain (upload ulang hari lama, lihat
+matches_history).
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from .sparse_design import SparseDesignMatrix
+
+
+def _observed_categories(values):
+    """Category unik (non-null) yang muncul di values"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+        return values.cat.categories.take(np.unique(codes[codes >= 0]))
+    return pd.Index(pd.unique(values.dropna().to_numpy()))
+
+
+class RidgeSufficientStats:
+    """
+    Akumulasi X'X / X'y untuk Ridge(alpha) dengan intercept (tidak di-penalize)
+
+    Layout internal: block = one-hot cat_cols[0]; rest = [one-hot
+    cat_cols[1:] | num_cols | intercept]. Category baru ditambahkan di
+    akhir block kolomnya (baris lama bernilai 0 di kolom baru, jadi
+    statistik lama tetap valid).
+
+    Attributes:
+        categories: list array category per cat_col (urutan kemunculan)
+        block_count: count per category block (diagonal X'X block)
+        block_cross: X'X block x rest (dense, n_block x m)
+        gram: X'X rest x rest (dense, m x m)
+        block_xty, rest_xty: X'y
+        shift: offset numeric (mean batch pertama)
+        n_rows: jumlah baris yang sudah diakumulasi
+        train_through: tanggal terakhir baris train yang sudah diakumulasi
+        checksum: DataFrame sum per series (index group key) atas baris yang
+            sudah diakumulasi; None jika tidak diketahui
+        clip_bounds: Series batas clip p99 per series (index group key) yang
+            dipakai preprocess_data untuk baris yang diakumulasi; None jika
+            batas dihitung ulang dari data
+    """
+
+    def __init__(self, cat_cols, num_cols, alpha=1.0):
+        if not cat_cols:
+            raise ValueError("RidgeSufficientStats membutuhkan minimal satu kolom categorical")
+        self.cat_cols = list(cat_cols)
+        self.num_cols = list(num_cols)
+        self.alpha = float(alpha)
+        self.categories = [np.empty(0, dtype=object) for _ in self.cat_cols]
+        m = len(self.num_cols) + 1
+        self.block_count = np.zeros(0)
+        self.block_cross = np.zeros((0, m))
+        self.gram = np.zeros((m, m))
+        self.block_xty = np.zeros(0)
+        self.rest_xty = np.zeros(m)
+        self.shift = None
+        self.n_rows = 0
+        self.train_through = None
+        self.checksum = None
+        self.clip_bounds = None
+
+    def compatible(self, cat_cols, num_cols, alpha):
+        """Statistik bisa dilanjutkan untuk layout feature & alpha ini"""
+        return (self.cat_cols == list(cat_cols) and self.num_cols == list(num_cols)
+                and self.alpha == float(alpha))
+
+    def matches_history(self, checksum, rtol=1e-9):
+        """
+        Baris yang sudah diakumulasi masih sama di data sekarang
+
+        Args:
+            checksum: checksum per series atas baris data sekarang dengan
+                date <= train_through (layout sama dengan self.checksum)
+
+        Returns:
+            False jika ada series yang hilang/baru atau sum-nya berubah
+            (misal batas clip p99 bergeser); statistik harus di-rebuild
+        """
+        stored = getattr(self, 'checksum', None)
+        if stored is None or checksum is None or len(stored) != len(checksum) \
+                or not stored.columns.equals(checksum.columns):
+            return False
+        current = checksum.reindex(stored.index).to_numpy(dtype=np.float64)
+        return bool(np.allclose(current, stored.to_numpy(dtype=np.float64), rtol=rtol, atol=rtol))
+
+    def _add_categories(self, observed):
+        """
+        Tambahkan category baru (urut) dan perbesar statistik dengan baris/kolom nol
+
+        Args:
+            observed: list category yang muncul, satu per cat_col
+        """
+        rest_pos = 0
+        for j, values in enumerate(observed):
+            known = pd.Index(self.categories[j])
+            values = pd.Index(values)
+            new = np.sort(np.asarray(values[known.get_indexer(values) < 0], dtype=object))
+            rest_pos += len(known) if j > 0 else 0
+            if not len(new):
+                continue
+
+            self.categories[j] = np.concatenate([self.categories[j], new])
+            k = len(new)
+            if j == 0:
+                self.block_count = np.r_[self.block_count, np.zeros(k)]
+                self.block_xty = np.r_[self.block_xty, np.zeros(k)]
+                self.block_cross = np.vstack([self.block_cross, np.zeros((k, self.block_cross.shape[1]))])
+            else:
+                at = [rest_pos] * k
+                self.gram = np.insert(np.insert(self.gram, at, 0.0, axis=0), at, 0.0, axis=1)
+                self.block_cross = np.insert(self.block_cross, at, 0.0, axis=1)
+                self.rest_xty = np.insert(self.rest_xty, at, 0.0)
+                rest_pos += k
+
+    def _design(self, categories=None):
+        return SparseDesignMatrix(cat_cols=self.cat_cols, num_cols=self.num_cols).set_layout(
+            self.categories if categories is None else categories, self.num_cols)
+
+    def update(self, X, y):
+        """
+        Tambahkan baris baru
+
+        Array statistik diganti (bukan diubah in place), jadi shallow copy
+        dari instance yang di-share (model cache) aman untuk di-update.
+
+        Args:
+            X: DataFrame dengan cat_cols + num_cols
+            y: target (sudah ditransformasi, misal log1p)
+        """
+        y = np.asarray(y, dtype=np.float64)
+        if not len(y):
+            return self
+        self._add_categories([_observed_categories(X[col]) for col in self.cat_cols])
+        if self.shift is None:
+            self.shift = np.nan_to_num(X[self.num_cols].to_numpy(dtype=np.float64).mean(axis=0))
+        X = X.assign(**{col: X[col].to_numpy(dtype=np.float64) - c
+                        for col, c in zip(self.num_cols, self.shift)})
+
+        Xa = sparse.hstack([self._design().transform(X),
+                            np.ones((len(y), 1))], format='csr')
+        if not np.isfinite(Xa.data).all() or not np.isfinite(y).all():
+            raise ValueError("Input contains NaN or infinity")
+
+        nb = len(self.categories[0])
+        A = (Xa.T @ Xa).tocsr()
+        b = Xa.T @ y
+        self.block_count = self.block_count + A.diagonal()[:nb]
+        self.block_cross = self.block_cross + A[:nb, nb:].toarray()
+        self.gram = self.gram + A[nb:, nb:].toarray()
+        self.block_xty = self.block_xty + b[:nb]
+        self.rest_xty = self.rest_xty + b[nb:]
+        self.n_rows += len(y)
+        return self
+
+    def _rest_positions(self, categories):
+        """Posisi kolom rest (layout self) untuk layout rest dengan categories lain"""
+        pos, offset = [], 0
+        for j in range(1, len(self.cat_cols)):
+            pos.append(offset + pd.Index(self.categories[j]).get_indexer(categories[j]))
+            offset += len(self.categories[j])
+        pos.append(offset + np.arange(len(self.num_cols) + 1))
+        return np.concatenate(pos)
+
+    def _reshifted(self, shift):
+        """
+        (block_cross, gram, rest_xty) untuk shift lain
+
+        Numeric dengan shift baru = numeric lama + (shift_lama - shift_baru) * intercept,
+        jadi statistik rest cukup ditransformasi linear: z' = T z.
+        """
+        m = self.gram.shape[0]
+        T = np.eye(m)
+        T[m - 1 - len(self.num_cols):m - 1, m - 1] = self.shift - shift
+        return self.block_cross @ T.T, T @ self.gram @ T.T, T @ self.rest_xty
+
+    def merge(self, other):
+        """
+        Tambahkan statistik partition lain (reduce step map-reduce training)
+
+        Block partnumber di-scatter by category. Partition by site berbagi
+        partnumber, jadi block kedua sisi tumpang tindih: count, X'y dan
+        cross partnumber yang sama dijumlahkan (indexing by category, bukan
+        concat). Rest di-transform ke shift self. Return self.
+        """
+        if not self.compatible(other.cat_cols, other.num_cols, other.alpha):
+            raise ValueError("RidgeSufficientStats tidak bisa di-merge: layout feature atau alpha berbeda "
+                             f"({self.num_cols} vs {other.num_cols})")
+        if other.n_rows == 0:
+            return self
+        other_checksum = getattr(other, 'checksum', None)
+        if self.n_rows == 0:
+            self.checksum = other_checksum
+        elif self.checksum is not None and other_checksum is not None:
+            self.checksum = self.checksum.add(other_checksum, fill_value=0.0)
+        else:
+            self.checksum = None
+        other_bounds = getattr(other, 'clip_bounds', None)
+        if self.n_rows == 0:
+            self.clip_bounds = other_bounds
+        elif self.clip_bounds is not None and other_bounds is not None:
+            combined = pd.concat([self.clip_bounds, other_bounds])
+            self.clip_bounds = combined[~combined.index.duplicated(keep='last')]
+        else:
+            self.clip_bounds = None
+        if self.shift is None:
+            self.shift = other.shift
+
+        self._add_categories(other.categories)
+        block_cross, gram, rest_xty = other._reshifted(self.shift)
+        ib = pd.Index(self.categories[0]).get_indexer(other.categories[0])
+        ir = self._rest_positions(other.categories)
+
+        self.block_count = self.block_count.copy()
+        self.block_count[ib] += other.block_count
+        self.block_xty = self.block_xty.copy()
+        self.block_xty[ib] += other.block_xty
+        self.block_cross = self.block_cross.copy()
+        self.block_cross[np.ix_(ib, ir)] += block_cross
+        self.gram = self.gram.copy()
+        self.gram[np.ix_(ir, ir)] += gram
+        self.rest_xty = self.rest_xty.copy()
+        self.rest_xty[ir] += rest_xty
+        self.n_rows += other.n_rows
+        if other.train_through is not None:
+            self.train_through = (other.train_through if self.train_through is None
+                                  else max(self.train_through, other.train_through))
+        return self
+
+    def solve(self):
+        """
+        Solve Ridge dari statistik
+
+        Returns:
+            (prep, coef, intercept): prep = SparseDesignMatrix fitted dengan
+            categories urut (layout sama dengan SparseDesignMatrix.fit / OHE),
+            coef sejajar dengan output prep
+        """
+        if self.n_rows == 0:
+            raise ValueError("RidgeSufficientStats kosong, tidak ada baris untuk di-solve")
+
+        m = self.gram.shape[0]
+        penalty = np.full(m, self.alpha)
+        penalty[-1] = 0.0  # intercept tidak di-penalize
+
+        # Eliminasi block diagonal: w_block = (xty_block - cross @ w_rest) / (count + alpha)
+        inv_diag = 1.0 / (self.block_count + self.alpha)
+        scaled = self.block_cross * inv_diag[:, None]
+        schur = self.gram + np.diag(penalty) - self.block_cross.T @ scaled
+        rhs = self.rest_xty - scaled.T @ self.block_xty
+        w_rest = np.linalg.solve(schur, rhs)
+        w_block = (self.block_xty - self.block_cross @ w_rest) * inv_diag
+
+        coef = np.r_[w_block, w_rest[:-1]]
+        intercept = float(w_rest[-1] - self.shift @ coef[len(coef) - len(self.num_cols):])
+
+        # Permutasi ke categories urut
+        sorted_cats, order, pos = [], [], 0
+        for cats in self.categories:
+            cats_sorted, idx = np.unique(cats, return_index=True)
+            sorted_cats.append(cats_sorted)
+            order.append(pos + idx)
+            pos += len(cats)
+        order.append(np.arange(pos, pos + len(self.num_cols)))
+
+        return self._design(sorted_cats), coef[np.concatenate(order)], intercept
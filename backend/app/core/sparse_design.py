@@ -0,0 +1,118 @@
+# backend/app/core/sparse_design.py
+"""
+Sparse design matrix untuk training model linear (sparse_training)
+OHE categorical + numeric features langsung ditulis ke CSR; nilai 0
+(mayoritas lag/rolling pada intermittent demand) tidak pernah disimpan
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.base import BaseEstimator, TransformerMixin
+
+
+def _category_positions(values, categories):
+    """Posisi category per baris (-1 = unknown / tidak ada di categories)"""
+    index = pd.Index(categories)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Lookup per category sekali, lalu gather by codes (NaN code -1 -> unknown)
+        lookup = np.r_[index.get_indexer(values.cat.categories), -1]
+        return lookup[values.cat.codes.to_numpy()]
+    return index.get_indexer(values)
+
+
+class SparseDesignMatrix(TransformerMixin, BaseEstimator):
+    """
+    DataFrame -> CSR [one-hot cat_cols | num_cols]
+
+    Layout kolom sama dengan ColumnTransformer([('cat', OneHotEncoder(
+    handle_unknown='ignore'), cat_cols)], remainder='passthrough'):
+    categories per kolom urut (seperti OHE 'auto'), unknown category
+    menjadi baris nol. CSR dibangun langsung per kolom dengan cursor per
+    baris, tanpa dense numeric block atau COO triplet sementara.
+
+    Args:
+        cat_cols: kolom categorical
+        num_cols: kolom numeric (None = semua kolom lain, urutan DataFrame)
+        dtype: dtype data CSR
+    """
+
+    def __init__(self, cat_cols=('partnumber', 'site_code'), num_cols=None, dtype=np.float64):
+        self.cat_cols = cat_cols
+        self.num_cols = num_cols
+        self.dtype = dtype
+
+    def fit(self, X, y=None):
+        cat_cols = list(self.cat_cols)
+        self.categories_ = []
+        for col in cat_cols:
+            values = X[col]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                codes = values.cat.codes.to_numpy()
+                observed = np.unique(codes[codes >= 0])
+                values = values.cat.categories.take(observed)
+            self.categories_.append(np.unique(np.asarray(values, dtype=object)))
+
+        num_cols = (list(self.num_cols) if self.num_cols is not None
+                    else [c for c in X.columns if c not in cat_cols])
+        return self.set_layout(self.categories_, num_cols)
+
+    def set_layout(self, categories, num_cols):
+        """
+        Set fitted layout langsung (tanpa data), misal dari RidgeSufficientStats
+
+        categories tidak harus urut; urutan menentukan posisi kolom one-hot.
+        """
+        self.categories_ = [np.asarray(cats, dtype=object) for cats in categories]
+        self.num_cols_ = list(num_cols)
+        self.feature_names_in_ = np.asarray(list(self.cat_cols) + self.num_cols_, dtype=object)
+        self.n_features_in_ = len(self.feature_names_in_)
+        return self
+
+    @property
+    def n_output_features_(self):
+        return sum(len(c) for c in self.categories_) + len(self.num_cols_)
+
+    def transform(self, X):
+        n = len(X)
+        n_out = self.n_output_features_
+
+        # Kolom output per baris untuk setiap categorical (-1 = tidak ada nonzero)
+        cat_pos, offset = [], 0
+        for col, cats in zip(self.cat_cols, self.categories_):
+            pos = _category_positions(X[col], cats)
+            cat_pos.append(np.where(pos >= 0, pos + offset, -1))
+            offset += len(cats)
+
+        num_vals = [X[col].to_numpy() for col in self.num_cols_]
+        num_nz = [v != 0 for v in num_vals]  # NaN tetap disimpan (ditolak Ridge, sama seperti dense)
+
+        row_nnz = np.zeros(n, dtype=np.int64)
+        for pos in cat_pos:
+            row_nnz += pos >= 0
+        for nz in num_nz:
+            row_nnz += nz
+
+        nnz = int(row_nnz.sum())
+        idx_dtype = np.int32 if max(nnz, n_out) < np.iinfo(np.int32).max else np.int64
+        indptr = np.zeros(n + 1, dtype=idx_dtype)
+        np.cumsum(row_nnz, out=indptr[1:])
+        indices = np.empty(nnz, dtype=idx_dtype)
+        data = np.empty(nnz, dtype=self.dtype)
+
+        # Isi kolom berurutan -> indices per baris sudah sorted (canonical CSR)
+        cursor = indptr[:-1].copy()
+        for pos in cat_pos:
+            rows = np.flatnonzero(pos >= 0)
+            at = cursor[rows]
+            indices[at] = pos[rows]
+            data[at] = 1.0
+            cursor[rows] += 1
+        for j, (values, nz) in enumerate(zip(num_vals, num_nz)):
+            rows = np.flatnonzero(nz)
+            at = cursor[rows]
+            indices[at] = offset + j
+            data[at] = values[rows]
+            cursor[rows] += 1
+
+        return sparse.csr_matrix((data, indices, indptr), shape=(n, n_out))
@@ -0,0 +1,125 @@
+# backend/app/core/upload_cache.py
+"""
+Content-addressed cache untuk hasil load_and_normalize
+Normalized frame disimpan sebagai Feather (Arrow IPC, uncompressed) di uploads/
+"""
+
+import os
+import hashlib
+from pathlib import Path
+
+from .preprocessing import load_and_normalize, load_and_aggregate_chunked
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # cache dinonaktifkan tanpa pyarrow
+    feather = None
+
+
+CACHE_DIR = os.getenv("NORMALIZED_CACHE_DIR", "uploads/.normalized")
+CACHE_MAX_BYTES = int(os.getenv("NORMALIZED_CACHE_MAX_MB", "2048")) * 1024 * 1024
+# Naikkan jika output load_and_normalize berubah (v2: partnumber/site_code category)
+CACHE_FORMAT_VERSION = 2
+
+# Hash per (path, size, mtime) supaya file yang sama tidak di-hash ulang dalam satu proses
+_HASH_MEMO = {}
+
+
+def file_sha256(file_path, chunk_size=1 << 20):
+    """SHA-256 dari isi file (di-memo per path/size/mtime)"""
+    p = Path(file_path)
+    st = p.stat()
+    memo_key = (str(p.resolve()), st.st_size, st.st_mtime_ns)
+    if memo_key in _HASH_MEMO:
+        return _HASH_MEMO[memo_key]
+
+    h = hashlib.sha256()
+    with open(p, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            h.update(block)
+
+    _HASH_MEMO[memo_key] = h.hexdigest()
+    return _HASH_MEMO[memo_key]
+
+
+def cache_path_for(file_path, dayfirst=True, cache_dir=None, aggregated=False):
+    """Path cache Feather untuk upload + setting dayfirst (+ hasil streaming aggregate)"""
+    key = f"{file_sha256(file_path)}_dayfirst{int(bool(dayfirst))}_v{CACHE_FORMAT_VERSION}"
+    if aggregated:
+        key += "_agg"
+    return Path(cache_dir or CACHE_DIR) / f"{key}.feather"
+
+
+def evict_lru(cache_dir=None, max_bytes=None, keep=None):
+    """Hapus cache entry paling lama dipakai sampai total size <= max_bytes"""
+    cache_dir = Path(cache_dir or CACHE_DIR)
+    max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+
+    entries = []
+    for p in cache_dir.glob('*.feather'):
+        try:
+            st = p.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, p))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, p in sorted(entries, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        if keep is not None and p == Path(keep):
+            continue
+        try:
+            p.unlink()
+            total -= size
+            print(f"Evicted normalized cache: {p.name}")
+        except FileNotFoundError:
+            pass
+
+
+def load_normalized_cached(file_path, dayfirst=True, cache_dir=None, max_bytes=None, chunk_rows=None):
+    """
+    load_and_normalize dengan content-addressed cache
+
+    Key = SHA-256 isi upload + dayfirst. Hit dibaca via memory map dari
+    Feather uncompressed (near zero-copy); miss menjalankan
+    load_and_normalize lalu menyimpan hasilnya. Eviction LRU by mtime
+    (di-touch setiap hit) dengan budget NORMALIZED_CACHE_MAX_MB.
+
+    Args:
+        chunk_rows: jika diisi, file dibaca streaming per chunk via
+            load_and_aggregate_chunked (output sudah teraggregate harian)
+    """
+    def load():
+        if chunk_rows:
+            return load_and_aggregate_chunked(file_path, dayfirst=dayfirst, chunk_rows=chunk_rows)
+        return load_and_normalize(file_path, dayfirst=dayfirst)
+
+    if feather is None:
+        return load()
+
+    path = cache_path_for(file_path, dayfirst, cache_dir, aggregated=bool(chunk_rows))
+
+    if path.exists():
+        try:
+            table = feather.read_table(str(path), memory_map=True)
+            df = table.to_pandas(split_blocks=True)
+            os.utime(path)  # LRU touch
+            df.attrs['read_path'] = 'cache'
+            print(f"Loaded normalized data from cache: {path.name}")
+            return df
+        except Exception as e:
+            print(f"Normalized cache unreadable ({e}), reloading")
+
+    df = load()
+
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        feather.write_feather(df, str(tmp), compression='uncompressed')
+        os.replace(tmp, path)
+        evict_lru(cache_dir, max_bytes, keep=path)
+    except Exception as e:
+        print(f"Failed to write normalized cache: {e}")
+
+    return df
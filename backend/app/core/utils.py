@@ -5,6 +5,7 @@ Refactored dari forecast11.ipynb
 """
 
 import os
+import csv
 import time
 from pathlib import Path
 import numpy as np
@@ -96,21 +97,175 @@ def make_ohe(dense=False):
         return OneHotEncoder(handle_unknown='ignore', sparse=not dense)
 
 
-def robust_read_table(path):
-    """Read CSV/Excel dengan auto-detect encoding"""
+# Fast-path CSV: hasil sniff format di-cache per (path, size, mtime)
+_SNIFF_SAMPLE_BYTES = 64 * 1024
+_FORMAT_CACHE = {}
+
+# Explicit dtypes untuk kolom wajib (nama kolom setelah strip().lower())
+_FAST_PATH_DTYPES = {
+    'partnumber': 'category',
+    'site_code': 'category',
+    'date': 'category',
+    'demand_qty': 'float64',
+}
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    from pandas._libs.parsers import STR_NA_VALUES
+    _FAST_ENGINE = 'pyarrow'
+except ImportError:
+    _FAST_ENGINE = 'c'
+
+
+def sniff_csv_format(path):
+    """
+    Sniff encoding, delimiter dan header dari beberapa KB pertama
+    
+    Returns:
+        dict {'encoding', 'sep', 'header'} atau None jika gagal
+    """
+    p = Path(path)
+    st = p.stat()
+    key = (str(p.resolve()), st.st_size, st.st_mtime_ns)
+    if key in _FORMAT_CACHE:
+        return _FORMAT_CACHE[key]
+    
+    with open(p, 'rb') as f:
+        sample = f.read(_SNIFF_SAMPLE_BYTES)
+    
+    # Potong di newline terakhir supaya tidak ada karakter multi-byte terpotong
+    if len(sample) == _SNIFF_SAMPLE_BYTES and b'\n' in sample:
+        sample = sample[:sample.rindex(b'\n')]
+    
+    fmt = None
+    for enc in ('utf-8-sig', 'cp1252', 'latin1'):
+        try:
+            text = sample.decode(enc)
+        except UnicodeDecodeError:
+            continue
+        lines = text.splitlines()
+        if not lines:
+            break
+        try:
+            dialect = csv.Sniffer().sniff('\n'.join(lines[:50]), delimiters=',;\t|')
+        except csv.Error:
+            break
+        header = next(csv.reader([lines[0]], delimiter=dialect.delimiter))
+        fmt = {'encoding': enc, 'sep': dialect.delimiter, 'header': header}
+        break
+    
+    _FORMAT_CACHE[key] = fmt
+    return fmt
+
+
+def _read_csv_pyarrow(path, fmt):
+    """
+    Read CSV langsung via pyarrow.csv dengan column types explicit
+    
+    pd.read_csv(engine='pyarrow') meng-infer tipe dulu lalu baru cast ke
+    dtype yang diminta, sehingga key seperti '00123' menjadi 123 (leading
+    zero hilang). Di sini key/date dibaca sebagai dictionary<string> dan
+    kolom lain sebagai string; missing values sama dengan pandas default.
+    """
+    arrow_types = {'category': pa.dictionary(pa.int32(), pa.string()), 'float64': pa.float64()}
+    column_types = {name: arrow_types.get(_FAST_PATH_DTYPES.get(name.strip().lower()), pa.string())
+                    for name in fmt['header']}
+    table = pa_csv.read_csv(
+        path,
+        read_options=pa_csv.ReadOptions(encoding=fmt['encoding']),
+        parse_options=pa_csv.ParseOptions(delimiter=fmt['sep']),
+        convert_options=pa_csv.ConvertOptions(column_types=column_types,
+                                              null_values=sorted(STR_NA_VALUES),
+                                              strings_can_be_null=True)
+    )
+    return table.to_pandas()
+
+
+def _read_csv_fast(path, fmt):
+    """Read CSV dengan pyarrow (atau C engine) dan explicit dtypes; key tetap string"""
+    if _FAST_ENGINE == 'pyarrow':
+        return _read_csv_pyarrow(path, fmt)
+    
+    dtypes = {}
+    for name in fmt['header']:
+        dtypes[name] = _FAST_PATH_DTYPES.get(name.strip().lower(), str)
+    
+    return pd.read_csv(path, sep=fmt['sep'], encoding=fmt['encoding'],
+                       dtype=dtypes, engine='c')
+
+
+def robust_read_table(path, fast=True):
+    """
+    Read CSV/Excel dengan auto-detect encoding
+    
+    Fast path: sniff delimiter & encoding dari sample awal file, lalu
+    read dengan C/pyarrow engine dan explicit dtypes (category untuk
+    partnumber/site_code/date, float untuk demand_qty). Path lama
+    (python engine + sep=None, retry per encoding) hanya dipakai jika
+    fast path gagal. Path yang dipakai dicatat di df.attrs['read_path'].
+    """
     if path.lower().endswith(('.xlsx', '.xls')):
-        return pd.read_excel(path, dtype=str)
+        df_ = pd.read_excel(path, dtype=str)
+        df_.attrs['read_path'] = 'excel'
+        return df_
+    
+    if fast:
+        try:
+            fmt = sniff_csv_format(path)
+            if fmt is not None:
+                df_ = _read_csv_fast(path, fmt)
+                df_.attrs['read_path'] = f"fast-{_FAST_ENGINE}"
+                print(f"Loaded with encoding={fmt['encoding']} sep={fmt['sep']!r} (fast path: {_FAST_ENGINE} engine)")
+                return df_
+        except Exception as e:
+            print(f"Fast path failed ({e}), falling back to python engine")
     
     for enc in ('utf-8-sig', 'cp1252', 'latin1', 'iso-8859-1'):
         try:
             df_ = pd.read_csv(path, sep=None, engine='python', dtype=str, encoding=enc)
-            print(f"Loaded with encoding={enc}")
+            df_.attrs['read_path'] = 'python'
+            print(f"Loaded with encoding={enc} (python engine)")
             return df_
         except Exception:
             continue
     
     # fallback
-    return pd.read_csv(path, sep=None, engine='python', dtype=str, encoding='latin1')
+    df_ = pd.read_csv(path, sep=None, engine='python', dtype=str, encoding='latin1')
+    df_.attrs['read_path'] = 'python'
+    return df_
+
+
+def table_chunk_sources(path, chunk_rows, fast=True):
+    """
+    Reader alternatif untuk membaca file per chunk (urutan sama dengan robust_read_table)
+    
+    Error encoding bisa baru muncul di tengah file, jadi caller harus bisa
+    mengulang dari awal dengan source berikutnya.
+    
+    Yields:
+        (read_path, make_chunks): make_chunks() -> iterator DataFrame chunk
+    """
+    if path.lower().endswith(('.xlsx', '.xls')):
+        # Excel tidak bisa di-stream: satu chunk
+        yield 'excel', lambda: iter([pd.read_excel(path, dtype=str)])
+        return
+    
+    if fast:
+        try:
+            fmt = sniff_csv_format(path)
+        except Exception as e:
+            print(f"Sniff failed ({e}), falling back to python engine")
+            fmt = None
+        if fmt is not None:
+            dtypes = {name: _FAST_PATH_DTYPES.get(name.strip().lower(), str) for name in fmt['header']}
+            # pyarrow engine tidak mendukung chunksize -> C engine
+            yield 'fast-c', lambda: pd.read_csv(path, sep=fmt['sep'], encoding=fmt['encoding'],
+                                                dtype=dtypes, engine='c', chunksize=chunk_rows)
+    
+    for enc in ('utf-8-sig', 'cp1252', 'latin1'):
+        yield 'python', lambda enc=enc: pd.read_csv(path, sep=None, engine='python', dtype=str,
+                                                     encoding=enc, chunksize=chunk_rows)
 
 
 def safe_save_csv(df, path):
@@ -107,7 +107,7 @@ class BatchJob(Base):
     
     # Status tracking
     status = Column(String(50), default='QUEUED', index=True)
-    # Status: QUEUED, PROCESSING, COMPLETED, FAILED, ROLLED_BACK
+    # Status: QUEUED, PROCESSING, COMPLETED, FAILED, ROLLED_BACK, CANCELLED
     
     progress = Column(Integer, default=0)  # 0-100
     completed_partitions = Column(Integer, default=0)
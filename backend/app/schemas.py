@@ -17,6 +17,21 @@ class ForecastConfig(BaseModel):
     rounding_mode: str = Field(default='half_up', description="Rounding mode: half_up, round, ceil, floor")
     random_state: int = Field(default=42, description="Random state for reproducibility")
     dayfirst: bool = Field(default=True, description="Parse dates with day first (DD/MM/YYYY)")
+    forecast_engine: str = Field(default='dataframe', description="Recursive forecast engine: dataframe, incremental")
+    history_dtype: str = Field(default='float64', description="History store dtype for recursive forecast: float64, float32")
+    model_format: str = Field(default='pickle', description="Saved model artifact format: pickle, mmap")
+    compiled_scorer: bool = Field(default=True, description="Predict linear models via compiled lookup-table scorer")
+    assume_sorted: bool = Field(default=True, description="History is pre-sorted by partnumber, site_code, date (verified, skips re-sorts)")
+    compact_dtypes: bool = Field(default=False, description="Compact feature dtypes: int8/int16 calendar, float32 lag/rolling")
+    sparse_training: bool = Field(default=False, description="Build the training design matrix directly as CSR (memory scales with nonzeros)")
+    sparse_solver: str = Field(default='sparse_cg', description="Ridge solver for sparse_training: sparse_cg, sag, lsqr")
+    ingest_chunk_rows: Optional[int] = Field(default=None, ge=10000, description="Stream the upload in chunks of this many rows, folding into a daily aggregate (None = read whole file)")
+    ridge_refit: str = Field(default='full', description="Ridge_log training: full refit, or incremental from sufficient statistics stored with the model")
+    candidate_selection: str = Field(default='ridge_only', description="Model selection: ridge_only, or parallel (RF/ET/GBR/Ridge fitted concurrently, best by rounded MAPE)")
+    candidate_budget_seconds: float = Field(default=600, gt=0, description="Wall-clock budget per candidate for parallel selection; slower candidates are dropped")
+    candidate_workers: Optional[int] = Field(default=None, ge=1, description="Processes for parallel selection (None = min(candidates, CPUs))")
+    distributed_training: bool = Field(default=False, description="Batch: train Ridge_log map-reduce style over all partitions (otherwise on partition 0)")
+    history_store: bool = Field(default=False, description="Append the upload as a delta to the persistent per-site history store and forecast from the stored history")
     
     @validator('rounding_mode')
     def validate_rounding_mode(cls, v):
@@ -25,6 +40,48 @@ class ForecastConfig(BaseModel):
             raise ValueError(f"rounding_mode must be one of {allowed}")
         return v
     
+    @validator('forecast_engine')
+    def validate_forecast_engine(cls, v):
+        allowed = ['dataframe', 'incremental']
+        if v not in allowed:
+            raise ValueError(f"forecast_engine must be one of {allowed}")
+        return v
+    
+    @validator('history_dtype')
+    def validate_history_dtype(cls, v):
+        allowed = ['float64', 'float32']
+        if v not in allowed:
+            raise ValueError(f"history_dtype must be one of {allowed}")
+        return v
+    
+    @validator('model_format')
+    def validate_model_format(cls, v):
+        allowed = ['pickle', 'mmap']
+        if v not in allowed:
+            raise ValueError(f"model_format must be one of {allowed}")
+        return v
+    
+    @validator('sparse_solver')
+    def validate_sparse_solver(cls, v):
+        allowed = ['sparse_cg', 'sag', 'lsqr']
+        if v not in allowed:
+            raise ValueError(f"sparse_solver must be one of {allowed}")
+        return v
+    
+    @validator('ridge_refit')
+    def validate_ridge_refit(cls, v):
+        allowed = ['full', 'incremental']
+        if v not in allowed:
+            raise ValueError(f"ridge_refit must be one of {allowed}")
+        return v
+    
+    @validator('candidate_selection')
+    def validate_candidate_selection(cls, v):
+        allowed = ['ridge_only', 'parallel']
+        if v not in allowed:
+            raise ValueError(f"candidate_selection must be one of {allowed}")
+        return v
+    
     @validator('forecast_start_date')
     def validate_forecast_start_date(cls, v):
         if v is not None and v != '':
@@ -6,6 +6,7 @@ Batch processing task dengan auto-partition, timeout, dan rollback
 from celery import Task, group, chord
 from datetime import datetime, timedelta
 import traceback
+import joblib
 import pandas as pd
 from pathlib import Path
 from uuid import uuid4
@@ -16,10 +17,16 @@ from app.database import SessionLocal
 from app.models import BatchJob, ForecastJob
 from app.core.batch_processor import BatchProcessor
 from app.core.ml_engine import MLForecaster
-from app.core.preprocessing import load_and_normalize, preprocess_data, prepare_features
+from app.core.preprocessing import feature_spec, preprocess_data, prepare_features
+from app.core.upload_cache import load_normalized_cached
 from app.core.utils import safe_save_csv
 
 
+# Status akhir batch: subtask berhenti, callback / rollback tidak menimpanya
+# (CANCELLED di-set oleh endpoint /cancel saat chord masih jalan)
+TERMINAL_STATUSES = ('COMPLETED', 'FAILED', 'ROLLED_BACK', 'CANCELLED')
+
+
 class BatchForecastTask(Task):
     """Base task dengan error handling untuk batch"""
     
@@ -30,7 +37,7 @@ class BatchForecastTask(Task):
             db = SessionLocal()
             try:
                 batch_job = db.query(BatchJob).filter_by(batch_id=batch_id).first()
-                if batch_job:
+                if batch_job and batch_job.status != 'CANCELLED':
                     batch_job.status = 'FAILED'
                     batch_job.error_message = str(exc)
                     batch_job.completed_at = datetime.utcnow()
@@ -39,6 +46,95 @@ class BatchForecastTask(Task):
                 db.close()
 
 
+def _partition_dir(batch_id):
+    """Directory partitions.arrow + partitions.json untuk batch"""
+    return Path('uploads') / batch_id / 'partitions'
+
+
+def _training_dir(batch_id):
+    """Directory statistik Ridge per partition (distributed_training)"""
+    return Path('uploads') / batch_id / 'training'
+
+
+def _batch_config(batch_id):
+    """Config BatchJob (raise jika batch tidak ada)"""
+    db = SessionLocal()
+    try:
+        batch_job = db.query(BatchJob).filter_by(batch_id=batch_id).first()
+        if not batch_job:
+            raise ValueError(f"Batch job {batch_id} not found")
+        return batch_job.config
+    finally:
+        db.close()
+
+
+def _dispatch_partition_forecasts(batch_id, partitions):
+    """Fan out: satu subtask forecast per partition, combine di chord callback"""
+    header = group(
+        run_partition_forecast_task.s(batch_id, p['partition_id'], p['metadata'])
+        for p in partitions
+    )
+    callback = combine_batch_results_task.s(batch_id).on_error(
+        rollback_batch_task.s(batch_id)
+    )
+    return chord(header)(callback)
+
+
+def _record_partition_result(batch_id, result, counter):
+    """
+    Simpan hasil satu partition ke BatchJob secara atomik
+
+    Row batch di-lock (SELECT ... FOR UPDATE) supaya subtask yang selesai
+    bersamaan tidak saling menimpa partition_results / counter.
+    """
+    db = SessionLocal()
+    try:
+        batch_job = (db.query(BatchJob).filter_by(batch_id=batch_id)
+                     .with_for_update().first())
+        if not batch_job:
+            return
+
+        results = [r for r in (batch_job.partition_results or [])
+                   if r.get('partition_id') != result['partition_id']]
+        results.append(result)
+        batch_job.partition_results = sorted(results, key=lambda r: r['partition_id'])
+        setattr(batch_job, counter, (getattr(batch_job, counter) or 0) + 1)
+
+        done = ((batch_job.completed_partitions or 0) + (batch_job.skipped_partitions or 0)
+                + (batch_job.failed_partitions or 0))
+        total = max(1, batch_job.total_partitions or 1)
+        if batch_job.status == 'PROCESSING':
+            batch_job.progress = 15 + (done * 70 // total)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _rollback_batch(batch_id, reason):
+    """Mark batch sebagai ROLLED_BACK (idempotent)"""
+    db = SessionLocal()
+    try:
+        batch_job = (db.query(BatchJob).filter_by(batch_id=batch_id)
+                     .with_for_update().first())
+        if batch_job and batch_job.status not in TERMINAL_STATUSES:
+            batch_job.status = 'ROLLED_BACK'
+            batch_job.error_message = f"Rolled back due to: {reason}"
+            batch_job.completed_at = datetime.utcnow()
+            db.commit()
+    finally:
+        db.close()
+
+    # Clean up partition files if needed
+    try:
+        partition_dir = Path('uploads') / batch_id
+        if partition_dir.exists():
+            print(f"[Batch {batch_id}] Cleaning up partition files...")
+            # Optional: delete partition files to save space
+            # shutil.rmtree(partition_dir)
+    except:
+        pass
+
+
 @celery_app.task(base=BatchForecastTask, bind=True, name='batch.run_batch_forecast', 
                  time_limit=3600, soft_time_limit=3300)
 def run_batch_forecast_task(self, batch_id: str):
@@ -47,10 +143,13 @@ def run_batch_forecast_task(self, batch_id: str):
     
     Features:
     - Auto partition data by site or size
-    - Parallel processing
+    - Parallel processing (chord: satu subtask per partition di worker pool)
     - Timeout monitoring (max 5 minutes per partition)
     - Auto rollback if any partition fails
-    - Combine results
+    - Combine results (chord callback)
+    
+    Task ini hanya load, partition dan dispatch; slot worker langsung
+    dilepas sehingga partition bisa jalan paralel di worker lain.
     """
     db = SessionLocal()
     
@@ -60,10 +159,18 @@ def run_batch_forecast_task(self, batch_id: str):
         if not batch_job:
             raise ValueError(f"Batch job {batch_id} not found")
         
+        if batch_job.status == 'CANCELLED':
+            print(f"[Batch {batch_id}] Cancelled before start")
+            return {'status': 'cancelled', 'batch_id': batch_id}
+        
         # Update status
         batch_job.status = 'PROCESSING'
         batch_job.started_at = datetime.utcnow()
         batch_job.progress = 5
+        batch_job.completed_partitions = 0
+        batch_job.skipped_partitions = 0
+        batch_job.failed_partitions = 0
+        batch_job.partition_results = []
         db.commit()
         
         print(f"[Batch {batch_id}] Starting batch forecast")
@@ -71,194 +178,349 @@ def run_batch_forecast_task(self, batch_id: str):
         
         # Load data
         print(f"[Batch {batch_id}] Loading data from {batch_job.original_file_path}")
-        df = load_and_normalize(batch_job.original_file_path, 
-                               dayfirst=batch_job.config.get('dayfirst', True))
+        df = load_normalized_cached(batch_job.original_file_path, 
+                                    dayfirst=batch_job.config.get('dayfirst', True),
+                                    chunk_rows=batch_job.config.get('ingest_chunk_rows'))
         
         batch_job.progress = 10
         db.commit()
         self.update_state(state='PROGRESS', meta={'progress': 10, 'status': 'Analyzing data'})
         
-        # Initialize batch processor
-        processor = BatchProcessor(
-            max_rows_per_job=batch_job.config.get('max_rows_per_partition', 2000),
-            partition_by=batch_job.partition_strategy,
-            max_partitions=batch_job.config.get('max_partitions', 20)
-        )
+        # Reuse partition plan dari submit jika ada, otherwise plan ulang
+        plan = BatchProcessor.load_plan(Path('uploads') / batch_id / 'plan.json')
         
-        # Analyze and create partitions
-        print(f"[Batch {batch_id}] Creating partitions...")
-        partitions = processor.create_partitions(df)
+        if plan is not None:
+            print(f"[Batch {batch_id}] Reusing partition plan from submit")
+            processor = BatchProcessor.from_plan(plan)
+        else:
+            # Initialize batch processor
+            processor = BatchProcessor(
+                max_rows_per_job=batch_job.config.get('max_rows_per_partition', 2000),
+                partition_by=batch_job.partition_strategy,
+                max_partitions=batch_job.config.get('max_partitions', 20)
+            )
+            
+            # Analyze and create partitions
+            print(f"[Batch {batch_id}] Creating partitions...")
+            plan = processor.build_plan(df)
+        
+        partitions = plan['partitions']
+        time_estimate = plan['time_estimate']
         
         batch_job.total_partitions = len(partitions)
-        batch_job.progress = 15
         db.commit()
         
         print(f"[Batch {batch_id}] Created {len(partitions)} partitions")
         
         # Estimate time
-        time_estimate = processor.estimate_processing_time(partitions)
         print(f"[Batch {batch_id}] Estimated time: {time_estimate['parallel_total_seconds']}s " 
               f"(speedup: {time_estimate['speedup_factor']}x)")
         
+        # Write partitions sekali (satu Arrow file, slice contiguous per partition);
+        # subtask memory-map file ini dan hanya membaca row range miliknya
+        partition_dir = _partition_dir(batch_id)
+        processor.write_partitions(df, plan, partition_dir)
+        max_date = df['date'].max()
+        model_path = Path('models/best_model.pkl')
+        distributed = not model_path.exists() and batch_job.config.get('distributed_training', False)
+        if distributed:
+            # Lag/rolling spec dari seluruh upload, sama untuk semua partition
+            lags, roll_windows = feature_spec(df, ['partnumber', 'site_code'])
+        del df
+        
+        # Train model sekali sebelum fan-out (subtask paralel tidak boleh
+        # race menulis models/best_model.pkl). Sama dengan versi sequential:
+        # model di-train dari partition pertama jika belum ada.
+        if distributed:
+            # Map-reduce: statistik Ridge per partition, reducer solve sekali lalu fan-out forecast
+            cutoff = MLForecaster(batch_job.config).training_cutoff(max_date)
+            print(f"[Batch {batch_id}] Distributed training on {len(partitions)} partitions "
+                  f"(train through {cutoff.date()}, lags {lags}, windows {roll_windows})")
+            self.update_state(state='PROGRESS', meta={'progress': 10, 'status': 'Training model'})
+            header = group(
+                fit_partition_stats_task.s(batch_id, p['partition_id'], cutoff.isoformat(),
+                                           list(lags), list(roll_windows))
+                for p in partitions
+            )
+            callback = reduce_ridge_stats_task.s(batch_id).on_error(
+                rollback_batch_task.s(batch_id)
+            )
+            chord_result = chord(header)(callback)
+            
+            print(f"[Batch {batch_id}] Dispatched training for {len(partitions)} partitions "
+                  f"(chord {chord_result.id})")
+            return {
+                'status': 'dispatched',
+                'batch_id': batch_id,
+                'total_partitions': len(partitions),
+                'chord_id': chord_result.id
+            }
+        
+        if not model_path.exists():
+            print(f"[Batch {batch_id}] Training new model on partition 0")
+            self.update_state(state='PROGRESS', meta={'progress': 10, 'status': 'Training model'})
+            df_first = BatchProcessor.read_partition(partition_dir, partitions[0]['partition_id'])
+            df_processed = preprocess_data(df_first, assume_sorted=True)
+            df_fe = prepare_features(df_processed, group_cols=['partnumber', 'site_code'], assume_sorted=True,
+                                     compact_dtypes=batch_job.config.get('compact_dtypes', False))
+            forecaster = MLForecaster(batch_job.config)
+            forecaster.train_and_select_model(df_fe)
+            forecaster.save_model(str(model_path))
+        
+        batch_job.progress = 15
+        db.commit()
+        
         self.update_state(state='PROGRESS', meta={'progress': 15, 'status': f'Processing {len(partitions)} partitions'})
         
-        # Save partitions and process
-        partition_dir = Path('uploads') / batch_id / 'partitions'
-        partition_dir.mkdir(parents=True, exist_ok=True)
+        # Fan out: satu subtask per partition, combine di chord callback
+        chord_result = _dispatch_partition_forecasts(batch_id, partitions)
         
-        partition_results = []
-        partition_files = []
-        max_exec_time = batch_job.max_execution_time
+        print(f"[Batch {batch_id}] Dispatched {len(partitions)} partitions (chord {chord_result.id})")
         
-        for i, partition in enumerate(partitions):
-            try:
-                progress = 15 + (i * 70 // len(partitions))
-                batch_job.progress = progress
+        return {
+            'status': 'dispatched',
+            'batch_id': batch_id,
+            'total_partitions': len(partitions),
+            'chord_id': chord_result.id
+        }
+        
+    except Exception as e:
+        print(f"[Batch {batch_id}] BATCH FAILED: {str(e)}")
+        print(traceback.format_exc())
+        
+        # Rollback
+        _rollback_batch(batch_id, str(e))
+        
+        raise
+        
+    finally:
+        db.close()
+
+
+@celery_app.task(bind=True, name='batch.fit_partition_stats',
+                 time_limit=3600, soft_time_limit=3300)
+def fit_partition_stats_task(self, batch_id: str, partition_id: int, cutoff: str,
+                             lags: list, roll_windows: list):
+    """
+    Map step distributed_training: X'X / X'y Ridge_log untuk satu partition
+    
+    lags / roll_windows ditentukan main task dari seluruh upload (tanpa
+    auto_adjust per partition) supaya layout feature semua partition sama.
+    Statistik + feature frame validasi disimpan ke training dir (hasil
+    chord harus JSON); return path-nya untuk reducer.
+    """
+    config = _batch_config(batch_id)
+    start_time = time.time()
+    df_partition = BatchProcessor.read_partition(_partition_dir(batch_id), partition_id)
+    df_processed = preprocess_data(df_partition, assume_sorted=True)
+    try:
+        df_fe = prepare_features(df_processed, group_cols=['partnumber', 'site_code'],
+                                 lags=tuple(lags), roll_windows=tuple(roll_windows), auto_adjust=False,
+                                 assume_sorted=True, compact_dtypes=config.get('compact_dtypes', False))
+    except ValueError as e:
+        print(f"  ⏭️  Partition {partition_id} has no training rows: {e}")
+        return {'partition_id': partition_id, 'status': 'SKIPPED'}
+    
+    forecaster = MLForecaster(config)
+    stats, df_valid = forecaster.accumulate_ridge_stats(df_fe, pd.Timestamp(cutoff))
+    
+    output = _training_dir(batch_id) / f"stats_{partition_id:03d}.pkl"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump({'stats': stats, 'valid': df_valid}, output, compress=0)
+    
+    print(f"  ✅ Partition {partition_id} stats: {stats.n_rows} train rows, "
+          f"{len(df_valid)} valid rows ({time.time() - start_time:.1f}s)")
+    return {'partition_id': partition_id, 'status': 'COMPLETED', 'stats_file': str(output)}
+
+
+@celery_app.task(bind=True, name='batch.reduce_ridge_stats',
+                 time_limit=3600, soft_time_limit=3300)
+def reduce_ridge_stats_task(self, stats_results, batch_id: str):
+    """
+    Reduce step distributed_training (chord callback)
+    
+    Merge statistik semua partition, solve Ridge_log sekali, save model,
+    lalu fan-out forecast per partition seperti run_batch_forecast_task.
+    """
+    try:
+        files = [r['stats_file'] for r in sorted(stats_results, key=lambda r: r['partition_id'])
+                 if r.get('status') == 'COMPLETED']
+        if not files:
+            raise ValueError("Tidak ada partition dengan data training")
+        
+        stats, valid = None, []
+        for path in files:
+            part = joblib.load(path)
+            stats = part['stats'] if stats is None else stats.merge(part['stats'])
+            valid.append(part['valid'])
+        
+        forecaster = MLForecaster(_batch_config(batch_id))
+        forecaster.fit_from_ridge_stats(stats, pd.concat(valid, ignore_index=True))
+        forecaster.save_model('models/best_model.pkl')
+        
+        db = SessionLocal()
+        try:
+            batch_job = db.query(BatchJob).filter_by(batch_id=batch_id).first()
+            if batch_job and batch_job.status == 'CANCELLED':
+                print(f"[Batch {batch_id}] Cancelled during training, forecasts not dispatched")
+                return {'status': 'cancelled', 'batch_id': batch_id}
+            if batch_job:
+                batch_job.progress = 15
                 db.commit()
+        finally:
+            db.close()
+        
+        partitions = BatchProcessor.read_partition_index(_partition_dir(batch_id))['partitions']
+        chord_result = _dispatch_partition_forecasts(batch_id, partitions)
+        print(f"[Batch {batch_id}] Model trained from {len(files)} partitions; "
+              f"dispatched {len(partitions)} forecasts (chord {chord_result.id})")
+        return {'status': 'dispatched', 'batch_id': batch_id, 'chord_id': chord_result.id}
+    
+    except Exception as e:
+        print(f"[Batch {batch_id}] DISTRIBUTED TRAINING FAILED: {str(e)}")
+        print(traceback.format_exc())
+        _rollback_batch(batch_id, str(e))
+        raise
+
+
+@celery_app.task(bind=True, name='batch.run_partition_forecast',
+                 time_limit=3600, soft_time_limit=3300)
+def run_partition_forecast_task(self, batch_id: str, partition_id: int, metadata: dict):
+    """
+    Forecast satu partition (header chord)
+    
+    Return dict hasil partition (COMPLETED / SKIPPED / CANCELLED).
+    FAILED / TIMEOUT di-record lalu raise supaya chord gagal dan batch
+    di-rollback; partition lain yang belum mulai akan CANCELLED.
+    """
+    db = SessionLocal()
+    try:
+        batch_job = db.query(BatchJob).filter_by(batch_id=batch_id).first()
+        if not batch_job:
+            raise ValueError(f"Batch job {batch_id} not found")
+        
+        # Batch sudah di-rollback / di-cancel - jangan buang waktu
+        if batch_job.status in TERMINAL_STATUSES:
+            print(f"[Batch {batch_id}] Partition {partition_id} cancelled (batch {batch_job.status})")
+            return {'partition_id': partition_id, 'status': 'CANCELLED', 'metadata': metadata}
+        
+        config = batch_job.config
+        max_exec_time = batch_job.max_execution_time
+    finally:
+        db.close()
+    
+    print(f"[Batch {batch_id}] Processing partition {partition_id}")
+    print(f"  Rows: {metadata['rows']}, Sites: {metadata['site_count']}, " 
+          f"Parts: {metadata['partnumbers_count']}")
+    
+    try:
+        # Process partition with timeout monitoring
+        start_time = time.time()
+        
+        # Preprocess partition data
+        df_partition = BatchProcessor.read_partition(_partition_dir(batch_id), partition_id)
+        df_processed = preprocess_data(df_partition, assume_sorted=True)
+        
+        # Check timeout
+        if time.time() - start_time > max_exec_time:
+            raise TimeoutError(f"Partition {partition_id} exceeded max execution time")
+        
+        # Load model (di-train oleh main task sebelum fan-out)
+        forecaster = MLForecaster(config)
+        forecaster.load_model('models/best_model.pkl')
+        
+        # Check timeout
+        if time.time() - start_time > max_exec_time:
+            raise TimeoutError(f"Partition {partition_id} exceeded max execution time")
+        
+        # Generate forecast (with graceful handling for empty data after filtering)
+        try:
+            forecast_df = forecaster.forecast(
+                df_processed,
+                start_date=config.get('forecast_start_date'),
+                start_offset_days=config.get('forecast_start_offset_days', 1)
+            )
+        except ValueError as e:
+            # Handle case: data filtered by forecast_site_codes results in empty dataset
+            if "No data for specified forecast_site_codes" in str(e):
+                print(f"  ⏭️  SKIPPED: Partition {partition_id} - Sites in this partition not in forecast_site_codes filter")
+                print(f"     Partition sites: {metadata['sites']}")
+                if config.get('forecast_site_codes'):
+                    print(f"     Filter sites: {config.get('forecast_site_codes')}")
                 
-                partition_id = partition['partition_id']
-                metadata = partition['metadata']
-                
-                print(f"[Batch {batch_id}] Processing partition {partition_id}/{len(partitions)-1}")
-                print(f"  Rows: {metadata['rows']}, Sites: {metadata['site_count']}, " 
-                      f"Parts: {metadata['partnumbers_count']}")
-                
-                # Update state dengan detail partition info
-                self.update_state(
-                    state='PROGRESS',
-                    meta={
-                        'progress': progress,
-                        'status': f'Partition {partition_id+1}/{len(partitions)}',
-                        'current_partition': {
-                            'id': partition_id,
-                            'rows': metadata['rows'],
-                            'sites': metadata['sites'],
-                            'partnumbers': metadata['partnumbers_count'],
-                            'status': 'PROCESSING'
-                        },
-                        'partition_progress': [
-                            {
-                                'partition_id': p['partition_id'],
-                                'status': p.get('status', 'PENDING')
-                            } for p in partition_results
-                        ]
-                    }
-                )
-                
-                # Process partition with timeout monitoring
-                start_time = time.time()
-                
-                # Preprocess partition data
-                df_partition = partition['data']
-                df_processed = preprocess_data(df_partition)
-                df_fe = prepare_features(df_processed, group_cols=['partnumber', 'site_code'])
-                
-                # Check timeout
-                if time.time() - start_time > max_exec_time:
-                    raise TimeoutError(f"Partition {partition_id} exceeded max execution time")
-                
-                # Train or load model
-                forecaster = MLForecaster(batch_job.config)
-                model_path = Path('models/best_model.pkl')
-                
-                if model_path.exists():
-                    print(f"  Loading existing model")
-                    forecaster.load_model(str(model_path))
-                else:
-                    print(f"  Training new model")
-                    forecaster.train_and_select_model(df_fe)
-                    forecaster.save_model(str(model_path))
-                
-                # Check timeout
-                if time.time() - start_time > max_exec_time:
-                    raise TimeoutError(f"Partition {partition_id} exceeded max execution time")
-                
-                # Generate forecast (with graceful handling for empty data after filtering)
-                try:
-                    forecast_df = forecaster.forecast(
-                        df_processed,
-                        start_date=batch_job.config.get('forecast_start_date'),
-                        start_offset_days=batch_job.config.get('forecast_start_offset_days', 1)
-                    )
-                except ValueError as e:
-                    # Handle case: data filtered by forecast_site_codes results in empty dataset
-                    if "No data for specified forecast_site_codes" in str(e):
-                        print(f"  ⏭️  SKIPPED: Partition {partition_id} - Sites in this partition not in forecast_site_codes filter")
-                        print(f"     Partition sites: {metadata['sites']}")
-                        if batch_job.config.get('forecast_site_codes'):
-                            print(f"     Filter sites: {batch_job.config.get('forecast_site_codes')}")
-                        
-                        # Mark partition as skipped (not an error, just filtered out)
-                        partition_results.append({
-                            'partition_id': partition_id,
-                            'status': 'SKIPPED',
-                            'reason': 'Sites not in forecast_site_codes filter',
-                            'metadata': metadata,
-                            'partition_sites': metadata['sites'],
-                            'filter_sites': batch_job.config.get('forecast_site_codes'),
-                            'execution_time': round(time.time() - start_time, 2)
-                        })
-                        
-                        # Increment skipped counter
-                        batch_job.skipped_partitions += 1
-                        db.commit()
-                        
-                        # Continue to next partition (not counted as failed)
-                        continue
-                    else:
-                        # Other ValueError - treat as error
-                        raise
-                
-                # Save partition result
-                output_file = f"outputs/{batch_id}/partition_{partition_id:03d}_forecast.csv"
-                saved_path = safe_save_csv(forecast_df, output_file)
-                partition_files.append(saved_path)
-                
-                elapsed_time = time.time() - start_time
-                
-                partition_results.append({
+                # Mark partition as skipped (not an error, just filtered out)
+                result = {
                     'partition_id': partition_id,
-                    'status': 'COMPLETED',
+                    'status': 'SKIPPED',
+                    'reason': 'Sites not in forecast_site_codes filter',
                     'metadata': metadata,
-                    'output_file': saved_path,
-                    'metrics': forecaster.get_metrics(),
-                    'execution_time': round(elapsed_time, 2)
-                })
-                
-                batch_job.completed_partitions += 1
-                db.commit()
-                
-                print(f"  ✅ Partition {partition_id} completed in {elapsed_time:.1f}s")
-                
-            except TimeoutError as e:
-                print(f"  ⏱️  TIMEOUT: Partition {partition_id} - {str(e)}")
-                partition_results.append({
-                    'partition_id': partition_id,
-                    'status': 'TIMEOUT',
-                    'error': str(e),
-                    'metadata': partition['metadata']
-                })
-                batch_job.failed_partitions += 1
-                db.commit()
-                
-                # Rollback: Stop processing dan mark sebagai failed
-                raise TimeoutError(f"Partition {partition_id} timeout - Rolling back batch")
-                
-            except Exception as e:
-                print(f"  ❌ ERROR: Partition {partition_id} - {str(e)}")
-                partition_results.append({
-                    'partition_id': partition_id,
-                    'status': 'FAILED',
-                    'error': str(e),
-                    'metadata': partition['metadata']
-                })
-                batch_job.failed_partitions += 1
-                db.commit()
-                
-                # Rollback: Stop jika ada failure
-                raise Exception(f"Partition {partition_id} failed - Rolling back batch: {str(e)}")
+                    'partition_sites': metadata['sites'],
+                    'filter_sites': config.get('forecast_site_codes'),
+                    'execution_time': round(time.time() - start_time, 2)
+                }
+                _record_partition_result(batch_id, result, 'skipped_partitions')
+                return result
+            else:
+                # Other ValueError - treat as error
+                raise
+        
+        # Save partition result
+        output_file = f"outputs/{batch_id}/partition_{partition_id:03d}_forecast.csv"
+        saved_path = safe_save_csv(forecast_df, output_file)
+        
+        elapsed_time = time.time() - start_time
+        
+        result = {
+            'partition_id': partition_id,
+            'status': 'COMPLETED',
+            'metadata': metadata,
+            'output_file': saved_path,
+            'metrics': forecaster.get_metrics(),
+            'execution_time': round(elapsed_time, 2)
+        }
+        _record_partition_result(batch_id, result, 'completed_partitions')
+        
+        print(f"  ✅ Partition {partition_id} completed in {elapsed_time:.1f}s")
+        return result
+        
+    except TimeoutError as e:
+        print(f"  ⏱️  TIMEOUT: Partition {partition_id} - {str(e)}")
+        _record_partition_result(batch_id, {
+            'partition_id': partition_id,
+            'status': 'TIMEOUT',
+            'error': str(e),
+            'metadata': metadata
+        }, 'failed_partitions')
+        
+        # Rollback: mark batch supaya partition lain berhenti
+        _rollback_batch(batch_id, f"Partition {partition_id} timeout")
+        raise TimeoutError(f"Partition {partition_id} timeout - Rolling back batch")
+        
+    except Exception as e:
+        print(f"  ❌ ERROR: Partition {partition_id} - {str(e)}")
+        _record_partition_result(batch_id, {
+            'partition_id': partition_id,
+            'status': 'FAILED',
+            'error': str(e),
+            'metadata': metadata
+        }, 'failed_partitions')
+        
+        # Rollback: mark batch supaya partition lain berhenti
+        _rollback_batch(batch_id, f"Partition {partition_id} failed: {str(e)}")
+        raise Exception(f"Partition {partition_id} failed - Rolling back batch: {str(e)}")
+
+
+@celery_app.task(bind=True, name='batch.combine_batch_results')
+def combine_batch_results_task(self, partition_results, batch_id: str):
+    """Chord callback: combine hasil semua partition (skip SKIPPED partitions)"""
+    db = SessionLocal()
+    try:
+        batch_job = db.query(BatchJob).filter_by(batch_id=batch_id).first()
+        if not batch_job:
+            raise ValueError(f"Batch job {batch_id} not found")
+        
+        partition_results = sorted(partition_results, key=lambda r: r['partition_id'])
         
-        # All partitions completed - combine results (skip SKIPPED partitions)
         skipped_count = sum(1 for p in partition_results if p.get('status') == 'SKIPPED')
         success_count = sum(1 for p in partition_results if p.get('status') == 'COMPLETED')
         
@@ -267,6 +529,14 @@ def run_batch_forecast_task(self, batch_id: str):
         print(f"  Skipped: {skipped_count}")
         print(f"  Failed: {batch_job.failed_partitions}")
         
+        if batch_job.status == 'CANCELLED':
+            print(f"[Batch {batch_id}] Batch cancelled, results not combined")
+            return {'status': 'cancelled', 'batch_id': batch_id,
+                    'partition_results': partition_results}
+        
+        if batch_job.status == 'ROLLED_BACK':
+            raise Exception(f"Batch already rolled back: {batch_job.error_message}")
+        
         if success_count == 0:
             raise Exception("No partitions produced forecasts. Check forecast_site_codes filter.")
         
@@ -275,12 +545,11 @@ def run_batch_forecast_task(self, batch_id: str):
         db.commit()
         
         # Combine only successful partition results (skip SKIPPED ones)
-        if partition_files:
-            combined_df = pd.concat([pd.read_csv(f) for f in partition_files], ignore_index=True)
-            combined_output = f"outputs/{batch_id}/combined_forecast.csv"
-            combined_path = safe_save_csv(combined_df, combined_output)
-        else:
-            raise Exception("No forecast files to combine")
+        partition_files = [p['output_file'] for p in partition_results
+                           if p.get('status') == 'COMPLETED']
+        combined_df = pd.concat([pd.read_csv(f) for f in partition_files], ignore_index=True)
+        combined_output = f"outputs/{batch_id}/combined_forecast.csv"
+        combined_path = safe_save_csv(combined_df, combined_output)
         
         # Update batch job
         batch_job.status = 'COMPLETED'
@@ -292,7 +561,7 @@ def run_batch_forecast_task(self, batch_id: str):
         db.commit()
         
         print(f"[Batch {batch_id}] Batch forecast completed successfully!")
-        print(f"  Total partitions: {len(partitions)}")
+        print(f"  Total partitions: {batch_job.total_partitions}")
         print(f"  Completed: {batch_job.completed_partitions}")
         print(f"  Skipped: {batch_job.skipped_partitions}")
         print(f"  Failed: {batch_job.failed_partitions}")
@@ -301,7 +570,7 @@ def run_batch_forecast_task(self, batch_id: str):
         return {
             'status': 'success',
             'batch_id': batch_id,
-            'total_partitions': len(partitions),
+            'total_partitions': batch_job.total_partitions,
             'completed': batch_job.completed_partitions,
             'skipped': batch_job.skipped_partitions,
             'failed': batch_job.failed_partitions,
@@ -312,25 +581,15 @@ def run_batch_forecast_task(self, batch_id: str):
     except Exception as e:
         print(f"[Batch {batch_id}] BATCH FAILED: {str(e)}")
         print(traceback.format_exc())
-        
-        # Rollback
-        batch_job.status = 'ROLLED_BACK'
-        batch_job.error_message = f"Rolled back due to: {str(e)}"
-        batch_job.completed_at = datetime.utcnow()
-        db.commit()
-        
-        # Clean up partition files if needed
-        try:
-            partition_dir = Path('uploads') / batch_id
-            if partition_dir.exists():
-                print(f"[Batch {batch_id}] Cleaning up partition files...")
-                # Optional: delete partition files to save space
-                # shutil.rmtree(partition_dir)
-        except:
-            pass
-        
+        _rollback_batch(batch_id, str(e))
         raise
         
     finally:
         db.close()
 
+
+@celery_app.task(name='batch.rollback_batch')
+def rollback_batch_task(request, exc, tb, batch_id: str):
+    """Chord error callback: rollback batch jika ada partition yang gagal"""
+    print(f"[Batch {batch_id}] Chord failed: {exc}")
+    _rollback_batch(batch_id, str(exc))
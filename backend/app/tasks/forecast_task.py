@@ -13,7 +13,9 @@ from app.celery_app import celery_app
 from app.database import SessionLocal
 from app.models import ForecastJob
 from app.core.ml_engine import MLForecaster
-from app.core.preprocessing import load_and_normalize, preprocess_data, prepare_features
+from app.core.history_store import append_and_load
+from app.core.preprocessing import preprocess_data, prepare_features
+from app.core.upload_cache import load_normalized_cached
 from app.core.utils import safe_save_csv
 
 
@@ -63,7 +65,8 @@ def run_forecast_task(self, job_id: int):
         
         # Load and normalize data
         print(f"[Job {job_id}] Loading data from {job.file_path}")
-        df = load_and_normalize(job.file_path, dayfirst=job.config.get('dayfirst', True))
+        df = load_normalized_cached(job.file_path, dayfirst=job.config.get('dayfirst', True),
+                                    chunk_rows=job.config.get('ingest_chunk_rows'))
         
         job.progress = 15
         db.commit()
@@ -71,7 +74,10 @@ def run_forecast_task(self, job_id: int):
         
         # Preprocess
         print(f"[Job {job_id}] Preprocessing data")
-        df_processed = preprocess_data(df)
+        if job.config.get('history_store'):
+            df_processed = append_and_load(df)
+        else:
+            df_processed = preprocess_data(df, assume_sorted=True)
         
         job.progress = 25
         db.commit()
@@ -79,7 +85,8 @@ def run_forecast_task(self, job_id: int):
         
         # Prepare features
         print(f"[Job {job_id}] Preparing features")
-        df_fe = prepare_features(df_processed, group_cols=['partnumber', 'site_code'])
+        df_fe = prepare_features(df_processed, group_cols=['partnumber', 'site_code'], assume_sorted=True,
+                                 compact_dtypes=job.config.get('compact_dtypes', False))
         
         job.progress = 35
         db.commit()
@@ -167,17 +174,29 @@ def train_model_task(file_path: str, config: dict):
     try:
         print(f"Training model with data from {file_path}")
         
-        # Load and preprocess
-        df = load_and_normalize(file_path, dayfirst=config.get('dayfirst', True))
-        df_processed = preprocess_data(df)
-        df_fe = prepare_features(df_processed, group_cols=['partnumber', 'site_code'])
+        model_path = config.get('model_path', 'models/best_model.pkl')
+        forecaster = MLForecaster(config)
+        if config.get('ridge_refit') == 'incremental' and Path(model_path).exists():
+            # Lanjutkan sufficient statistics dari model sebelumnya
+            forecaster.load_model(model_path, use_cache=False)
+        
+        # Load and preprocess (refit incremental: batas clip sama dengan run sebelumnya,
+        # supaya baris yang sudah diakumulasi tidak berubah)
+        df = load_normalized_cached(file_path, dayfirst=config.get('dayfirst', True),
+                                    chunk_rows=config.get('ingest_chunk_rows'))
+        if config.get('history_store'):
+            df_processed, clip_bounds = append_and_load(df, clip_bounds=forecaster.clip_bounds(),
+                                                        return_bounds=True)
+        else:
+            df_processed, clip_bounds = preprocess_data(df, assume_sorted=True, clip_bounds=forecaster.clip_bounds(),
+                                                        return_bounds=True)
+        df_fe = prepare_features(df_processed, group_cols=['partnumber', 'site_code'], assume_sorted=True,
+                                 compact_dtypes=config.get('compact_dtypes', False))
         
         # Train
-        forecaster = MLForecaster(config)
-        forecaster.train_and_select_model(df_fe)
+        forecaster.train_and_select_model(df_fe, clip_bounds=clip_bounds)
         
         # Save
-        model_path = config.get('model_path', 'models/best_model.pkl')
         forecaster.save_model(model_path)
         
         print(f"Model training completed and saved to {model_path}")
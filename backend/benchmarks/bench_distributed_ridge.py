@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark distributed_training: map-reduce Ridge_log atas partition by site vs satu process
+
+Map   : per partition preprocess + features + accumulate_ridge_stats (ProcessPoolExecutor)
+Reduce: merge statistik + fit_from_ridge_stats
+Baseline: train_and_select_model(ridge_refit='incremental') atas seluruh data
+(solusi exact yang sama, jadi prediksi sama dalam toleransi floating point).
+
+Jalankan dari folder backend:
+    python benchmarks/bench_distributed_ridge.py [n_series] [days] [workers]
+"""
+
+import contextlib
+import io
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND))
+
+import numpy as np
+import pandas as pd
+
+from bench_compact_dtypes import peak_rss_mb
+from synthetic import make_history
+
+CONFIG = {'forecast_horizon': 14}
+
+
+def features(df, spec=None):
+    """Feature frame; spec (lags, roll_windows) global seperti batch task, None = auto_adjust"""
+    from app.core.preprocessing import preprocess_data, prepare_features
+    kwargs = {} if spec is None else {'lags': spec[0], 'roll_windows': spec[1], 'auto_adjust': False}
+    with contextlib.redirect_stdout(io.StringIO()):
+        return prepare_features(preprocess_data(df, assume_sorted=True),
+                                ['partnumber', 'site_code'], assume_sorted=True, **kwargs)
+
+
+def map_partition(args):
+    """Worker: statistik satu partition; return (stats, df_valid, peak RSS MB)"""
+    from app.core.ml_engine import MLForecaster
+    df, cutoff, spec = args
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats, df_valid = MLForecaster(CONFIG).accumulate_ridge_stats(features(df, spec), cutoff)
+    return stats, df_valid, peak_rss_mb()
+
+
+if __name__ == "__main__":
+    from app.core.batch_processor import BatchProcessor
+    from app.core.ml_engine import MLForecaster
+    from app.core.preprocessing import feature_spec
+
+    n_series = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 365
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+    history = make_history(n_series, days)
+    partitions = BatchProcessor(max_rows_per_job=len(history) // 8, partition_by='site').create_partitions(history)
+    cutoff = MLForecaster(CONFIG).training_cutoff(history['date'].max())
+    with contextlib.redirect_stdout(io.StringIO()):
+        spec = feature_spec(history, ['partnumber', 'site_code'])
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers) as pool:
+        mapped = list(pool.map(map_partition, [(p['data'], cutoff, spec) for p in partitions]))
+    map_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    stats = mapped[0][0]
+    for part_stats, _, _ in mapped[1:]:
+        stats.merge(part_stats)
+    dist = MLForecaster(CONFIG)
+    with contextlib.redirect_stdout(io.StringIO()):
+        dist.fit_from_ridge_stats(stats, pd.concat([v for _, v, _ in mapped], ignore_index=True))
+    reduce_s = time.perf_counter() - start
+
+    df_fe = features(history)
+    single = MLForecaster({**CONFIG, 'ridge_refit': 'incremental'})
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        single.train_and_select_model(df_fe)
+    single_s = time.perf_counter() - start
+
+    X = single._design_frame(df_fe)
+    diff = np.abs(np.log1p(dist.best_model.predict(X)) - np.log1p(single.best_model.predict(X))).max()
+
+    print(f"series={n_series} days={days} rows={len(df_fe)} partitions={len(partitions)} workers={workers}")
+    print(f"map (features + stats, parallel): {map_s:7.2f}s  max worker peak RSS {max(m[2] for m in mapped):.0f} MB")
+    print(f"reduce (merge + solve)          : {reduce_s:7.2f}s")
+    print(f"single-process fit (features ready): {single_s:7.2f}s")
+    print(f"MAPE% distributed {dist.metrics_history['Ridge_log']['rounded']['MAPE%']:.4f} "
+          f"vs single {single.metrics_history['Ridge_log']['rounded']['MAPE%']:.4f}")
+    print(f"max |log score| diff: {diff:.2e}")
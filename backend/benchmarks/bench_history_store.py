@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark DemandHistoryStore: refresh harian (delta 1 hari) vs proses ulang seluruh history
+
+Full   : load_and_normalize(full.csv) + preprocess_data
+Store  : load_and_normalize(delta.csv) + append + load_preprocessed
+(history awal di-append sekali di luar timing)
+
+Jalankan dari folder backend:
+    python benchmarks/bench_history_store.py [n_series] [days]
+"""
+
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND))
+
+from synthetic import make_history
+
+
+def timed(fn):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        out = fn()
+    return out, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    from app.core.history_store import DemandHistoryStore
+    from app.core.preprocessing import load_and_normalize, preprocess_data
+
+    n_series = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 365
+
+    tmp = Path(tempfile.mkdtemp())
+    history = make_history(n_series, days)
+    history['date'] = history['date'].dt.strftime('%d/%m/%Y')
+    last_day = history['date'].iloc[days - 1]
+    delta_mask = history['date'] == last_day
+    history.to_csv(tmp / 'full.csv', index=False)
+    history[delta_mask].to_csv(tmp / 'delta.csv', index=False)
+
+    store = DemandHistoryStore(tmp / 'history')
+    _, seed_s = timed(lambda: store.append(load_and_normalize(str(tmp / 'full.csv'))
+                                           .query('date < date.max()')))
+    timed(store.load_preprocessed)
+
+    full, full_s = timed(lambda: preprocess_data(load_and_normalize(str(tmp / 'full.csv')), assume_sorted=True))
+
+    def refresh():
+        store.append(load_and_normalize(str(tmp / 'delta.csv')))
+        return store.load_preprocessed()
+
+    fresh, store_s = timed(refresh)
+
+    print(f"series={n_series} days={days} rows={len(full)} (initial append {seed_s:.2f}s)")
+    print(f"full reprocess : {full_s:7.2f}s")
+    print(f"store refresh  : {store_s:7.2f}s")
+    print(f"identical: {fresh.equals(full)}")
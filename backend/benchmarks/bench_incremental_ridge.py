@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark ridge_refit='incremental': retraining setelah 1 hari baru vs refit penuh
+
+Statistik di-seed dari feature frame tanpa hari terakhir (di luar timing),
+lalu kedua mode di-train pada feature frame lengkap. Lag/rolling hanya
+melihat ke belakang, jadi baris lama identik di kedua frame.
+
+Jalankan dari folder backend:
+    python benchmarks/bench_incremental_ridge.py [n_series] [days]
+"""
+
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND))
+
+import numpy as np
+
+from synthetic import make_history
+
+
+def timed(fn):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        out = fn()
+    return out, time.perf_counter() - start
+
+
+def log_scores(forecaster, df_fe):
+    """Prediksi skala log1p (linear score) untuk semua baris"""
+    return np.log1p(forecaster.best_model.predict(forecaster._design_frame(df_fe)))
+
+
+if __name__ == "__main__":
+    from app.core.ml_engine import MLForecaster
+    from app.core.preprocessing import preprocess_data, prepare_features
+
+    n_series = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 365
+    config = {'forecast_horizon': 14}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = preprocess_data(make_history(n_series, days), assume_sorted=True)
+        df_fe = prepare_features(df, ['partnumber', 'site_code'], assume_sorted=True)
+    df_prev = df_fe[df_fe['date'] < df_fe['date'].max()]
+
+    seed = MLForecaster({**config, 'ridge_refit': 'incremental'})
+    _, seed_s = timed(lambda: seed.train_and_select_model(df_prev))
+
+    full = MLForecaster(config)
+    _, full_s = timed(lambda: full.train_and_select_model(df_fe))
+
+    inc = MLForecaster({**config, 'ridge_refit': 'incremental'})
+    inc.ridge_stats = seed.ridge_stats
+    _, inc_s = timed(lambda: inc.train_and_select_model(df_fe))
+
+    scratch = MLForecaster({**config, 'ridge_refit': 'incremental'})
+    timed(lambda: scratch.train_and_select_model(df_fe))
+
+    print(f"series={n_series} days={days} rows={len(df_fe)} (seed stats {seed_s:.2f}s)")
+    print(f"full refit        : {full_s:7.2f}s  MAPE% {full.metrics_history['Ridge_log']['rounded']['MAPE%']:.4f}")
+    print(f"incremental refit : {inc_s:7.2f}s  MAPE% {inc.metrics_history['Ridge_log']['rounded']['MAPE%']:.4f}")
+    score = log_scores(inc, df_fe)
+    print(f"max |log score| diff vs from-scratch stats   : "
+          f"{np.abs(score - log_scores(scratch, df_fe)).max():.2e}")
+    print(f"max |log score| diff vs full refit (sparse_cg): "
+          f"{np.abs(score - log_scores(full, df_fe)).max():.2e}")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark cold-start load model: format 'pickle' vs 'mmap'
+
+Setiap load dijalankan di process baru (seperti worker Celery yang baru start);
+import sklearn tidak ikut dihitung.
+
+Jalankan dari folder backend:
+    python benchmarks/bench_model_load.py
+"""
+
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND))
+
+import numpy as np
+import pandas as pd
+
+from app.core.ml_engine import MLForecaster
+from app.core.preprocessing import get_feature_columns
+
+
+LOAD_SNIPPET = """
+import sys, time
+sys.path.insert(0, {backend!r})
+import joblib
+import sklearn.pipeline, sklearn.compose, sklearn.preprocessing, sklearn.linear_model
+t = time.perf_counter()
+data = joblib.load({path!r}, mmap_mode={mmap!r})
+print(time.perf_counter() - t)
+"""
+
+
+def make_features(n_parts, rows_per_part=2, n_sites=20, seed=42):
+    """Synthetic feature frame dengan n_parts unique partnumber"""
+    rng = np.random.default_rng(seed)
+    n = n_parts * rows_per_part
+    cat_cols, num_cols = get_feature_columns()
+    df = pd.DataFrame({
+        'partnumber': pd.Series(np.repeat(np.arange(n_parts), rows_per_part)).map('P{:07d}'.format),
+        'site_code': pd.Series(rng.integers(0, n_sites, size=n)).map('S{:03d}'.format),
+    })
+    for col in num_cols:
+        df[col] = rng.random(n)
+    y = rng.poisson(2.0, size=n).astype(float)
+    return df[cat_cols + num_cols], y
+
+
+def cold_load_seconds(path, mmap, repeats=3):
+    """Median waktu joblib.load di process baru"""
+    times = []
+    for _ in range(repeats):
+        out = subprocess.run(
+            [sys.executable, '-c', LOAD_SNIPPET.format(backend=str(BACKEND), path=str(path), mmap=mmap)],
+            capture_output=True, text=True, check=True
+        )
+        times.append(float(out.stdout.strip().splitlines()[-1]))
+    return float(np.median(times))
+
+
+if __name__ == "__main__":
+    tmp = Path(tempfile.mkdtemp())
+    print(f"{'parts':>8} {'format':>7} {'size_mb':>8} {'load_s':>8}")
+    for n_parts in (10_000, 100_000, 300_000):
+        X, y = make_features(n_parts)
+        forecaster = MLForecaster({})
+        model = forecaster._build_candidate_models()['Ridge_log']
+        model.fit(X, y)
+        reference = model.predict(X)
+
+        for fmt, mmap in (('pickle', None), ('mmap', 'r')):
+            forecaster = MLForecaster({'model_format': fmt})
+            forecaster.best_model = model
+            forecaster.best_model_name = 'Ridge_log'
+            path = tmp / f"model_{n_parts}_{fmt}.pkl"
+            forecaster.save_model(str(path))
+
+            # Prediksi harus identik (format mmap di-load via model cache / mmap_mode='r')
+            loaded = MLForecaster({})
+            loaded.load_model(str(path), use_cache=(fmt == 'mmap'))
+            assert np.array_equal(loaded.best_model.predict(X), reference)
+
+            size_mb = path.stat().st_size / 1e6
+            print(f"{n_parts:>8} {fmt:>7} {size_mb:8.1f} {cold_load_seconds(path, mmap):8.3f}")
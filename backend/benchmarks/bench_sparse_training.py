@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark sparse_training: peak RSS train_and_select_model (ColumnTransformer vs CSR langsung)
+
+Setiap mode dijalankan di process baru (lihat bench_compact_dtypes).
+
+Jalankan dari folder backend:
+    python benchmarks/bench_sparse_training.py [n_series] [days]
+"""
+
+import contextlib
+import io
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND))
+
+import numpy as np
+
+from bench_compact_dtypes import peak_rss_mb, reset_peak_rss
+from synthetic import make_history
+
+
+def run_mode(n_series, days, sparse_training):
+    """Preprocess + train satu mode; return peak RSS, waktu dan metrics"""
+    from app.core.ml_engine import MLForecaster
+    from app.core.preprocessing import preprocess_data, prepare_features
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = preprocess_data(make_history(n_series, days), assume_sorted=True)
+        df_fe = prepare_features(df, ['partnumber', 'site_code'], assume_sorted=True)
+        del df
+        forecaster = MLForecaster({'forecast_horizon': 14, 'sparse_training': sparse_training})
+
+        reset_ok = reset_peak_rss()
+        rss_before = peak_rss_mb()
+        start = time.perf_counter()
+        forecaster.train_and_select_model(df_fe)
+        seconds = time.perf_counter() - start
+        rss_peak = peak_rss_mb()
+
+    lagroll = [c for c in df_fe.columns if c.startswith('lag_') or c.startswith('rollmean_')]
+    return {
+        'rows': len(df_fe),
+        'lagroll_zero_share': float((df_fe[lagroll].to_numpy() == 0).mean()),
+        'train_s': seconds,
+        'train_delta_rss_mb': rss_peak - rss_before if reset_ok else None,
+        'coef': forecaster.best_model.steps[-1][1].regressor_.coef_.tolist(),
+        'metrics': forecaster.get_metrics()['all_models']['Ridge_log'],
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--mode':
+        _, _, mode, n_series, days = sys.argv
+        print(json.dumps(run_mode(int(n_series), int(days), mode == '1')))
+        sys.exit(0)
+
+    n_series = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 365
+
+    results = {}
+    for sparse_training in (False, True):
+        out = subprocess.run(
+            [sys.executable, __file__, '--mode', str(int(sparse_training)), str(n_series), str(days)],
+            capture_output=True, text=True, check=True
+        )
+        results[sparse_training] = json.loads(out.stdout.strip().splitlines()[-1])
+
+    first = results[False]
+    print(f"series={n_series} days={days} rows={first['rows']} "
+          f"lag/roll zero share={first['lagroll_zero_share']:.1%}")
+    print(f"{'mode':>18} {'train_s':>8} {'train_delta_mb':>15} {'MAPE_rnd':>9}")
+    for sparse_training, r in results.items():
+        delta = f"{r['train_delta_rss_mb']:15.1f}" if r['train_delta_rss_mb'] is not None else f"{'n/a':>15}"
+        print(f"{'SparseDesignMatrix' if sparse_training else 'ColumnTransformer':>18} {r['train_s']:8.2f} "
+              f"{delta} {r['metrics']['rounded']['MAPE%']:9.4f}")
+    coef_diff = np.abs(np.asarray(results[False]['coef']) - np.asarray(results[True]['coef'])).max()
+    print(f"max |coef diff| = {coef_diff:.2e}")
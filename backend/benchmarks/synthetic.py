@@ -0,0 +1,40 @@
+# backend/benchmarks/synthetic.py
+"""
+Synthetic demand history untuk benchmarks dan tests (satu helper bersama)
+
+tests/conftest.py menambahkan folder ini ke sys.path dan memakai
+make_history yang sama.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def make_history(n_series, days, seed=42, n_sites=8, missing=0.0, categorical=True, start='2023-01-01'):
+    """
+    Synthetic intermittent daily demand (spare parts): level kecil per series + weekly pattern
+
+    Args:
+        n_series: jumlah series (partnumber = series // n_sites, site = series % n_sites)
+        missing: fraksi baris yang di-drop (hari tidak tercatat, untuk calendar completion)
+        categorical: partnumber/site_code sebagai category (seperti load_and_normalize)
+
+    Returns:
+        DataFrame [partnumber, site_code, date, demand_qty], urut by series + date
+    """
+    rng = np.random.default_rng(seed)
+    sid = np.repeat(np.arange(n_series), days)
+    day = np.tile(np.arange(days), n_series)
+    level = rng.gamma(0.6, 1.5, size=n_series)[sid]
+    weekly = 1.0 + 0.3 * np.sin(2 * np.pi * day / 7)
+    partnumber = pd.Series(sid // n_sites).map('P{:06d}'.format)
+    site_code = pd.Series(sid % n_sites).map('S{:02d}'.format)
+    df = pd.DataFrame({
+        'partnumber': pd.Categorical(partnumber) if categorical else partnumber,
+        'site_code': pd.Categorical(site_code) if categorical else site_code,
+        'date': pd.Timestamp(start) + pd.to_timedelta(day, unit='D'),
+        'demand_qty': rng.poisson(level * weekly).astype(float),
+    })
+    if missing:
+        df = df[rng.random(len(df)) >= missing].reset_index(drop=True)
+    return df
@@ -0,0 +1,22 @@
+# backend/tests/conftest.py
+"""
+Shared fixtures untuk test backend (jalankan dari folder backend: python -m pytest tests)
+"""
+
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+for path in (BACKEND, BACKEND / 'benchmarks'):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from synthetic import make_history  # noqa: E402  (helper bersama dengan benchmarks)
+
+
+def write_upload(df, path):
+    """Tulis history sebagai upload CSV (date DD/MM/YYYY)"""
+    out = df.assign(date=df['date'].dt.strftime('%d/%m/%Y'))
+    out.to_csv(path, index=False)
+    return str(path)
+
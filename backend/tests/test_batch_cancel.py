@@ -0,0 +1,88 @@
+# backend/tests/test_batch_cancel.py
+"""Cancel di tengah chord: status CANCELLED tidak ditimpa subtask / callback"""
+
+import os
+from datetime import datetime
+
+import pytest
+
+# app.database membuat engine saat import; tanpa DATABASE_URL default-nya postgres
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.database import Base  # noqa: E402
+from app.models import BatchJob  # noqa: E402
+from app.tasks import batch_task  # noqa: E402
+
+BATCH_ID = 'batch-cancel'
+
+
+@pytest.fixture
+def session(monkeypatch):
+    engine = create_engine('sqlite://', connect_args={'check_same_thread': False},
+                           poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(batch_task, 'SessionLocal', Session)
+
+    db = Session()
+    db.add(BatchJob(batch_id=BATCH_ID, config={}, partition_strategy='site', total_partitions=3,
+                    status='PROCESSING', max_execution_time=300))
+    db.commit()
+    db.close()
+    return Session
+
+
+def status(Session):
+    db = Session()
+    try:
+        return db.query(BatchJob).filter_by(batch_id=BATCH_ID).first().status
+    finally:
+        db.close()
+
+
+def cancel(Session):
+    """Sama dengan POST /batch/cancel/{batch_id}"""
+    db = Session()
+    batch_job = db.query(BatchJob).filter_by(batch_id=BATCH_ID).first()
+    batch_job.status = 'CANCELLED'
+    batch_job.error_message = 'Cancelled by user'
+    batch_job.completed_at = datetime.utcnow()
+    db.commit()
+    db.close()
+
+
+def test_cancel_mid_chord_stays_cancelled(session):
+    metadata = {'rows': 10, 'site_count': 1, 'partnumbers_count': 1, 'sites': ['S00']}
+
+    # Partition 0 selesai sebelum cancel
+    done = {'partition_id': 0, 'status': 'COMPLETED', 'metadata': metadata,
+            'output_file': 'outputs/p0.csv'}
+    batch_task._record_partition_result(BATCH_ID, done, 'completed_partitions')
+    cancel(session)
+
+    # Partition yang belum mulai berhenti tanpa membaca data
+    skipped = batch_task.run_partition_forecast_task(BATCH_ID, 1, metadata)
+    assert skipped['status'] == 'CANCELLED'
+
+    # Partition yang sedang jalan gagal -> rollback tidak menimpa CANCELLED
+    batch_task._rollback_batch(BATCH_ID, 'Partition 2 failed')
+    assert status(session) == 'CANCELLED'
+
+    # Chord callback tidak combine / menandai COMPLETED
+    result = batch_task.combine_batch_results_task([done, skipped], BATCH_ID)
+    assert result['status'] == 'cancelled'
+    assert status(session) == 'CANCELLED'
+
+    # Error callback chord juga idempotent terhadap CANCELLED
+    batch_task.rollback_batch_task(None, Exception('chord failed'), None, BATCH_ID)
+    assert status(session) == 'CANCELLED'
+
+
+def test_cancel_before_start(session):
+    cancel(session)
+    assert batch_task.run_batch_forecast_task(BATCH_ID)['status'] == 'cancelled'
+    assert status(session) == 'CANCELLED'
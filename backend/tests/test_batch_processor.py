@@ -0,0 +1,28 @@
+# backend/tests/test_batch_processor.py
+"""BatchProcessor.build_plan: metadata dari selector vs partition data"""
+
+import pytest
+
+from app.core.batch_processor import BatchProcessor
+from conftest import make_history
+
+
+@pytest.mark.parametrize('categorical', [False, True])
+@pytest.mark.parametrize('settings', [
+    {'max_rows_per_job': 100_000},                                    # tanpa partition
+    {'max_rows_per_job': 500, 'partition_by': 'site'},                # satu site per partition
+    {'max_rows_per_job': 1500, 'partition_by': 'site', 'max_partitions': 4},  # site digabung
+    {'max_rows_per_job': 700, 'partition_by': 'auto', 'max_partitions': 5},   # by size
+])
+def test_plan_metadata_matches_partitions(settings, categorical):
+    df = make_history(135, 30, seed=2, n_sites=9, missing=0.15, categorical=False).sample(frac=1, random_state=0)
+    if categorical:
+        df = df.astype({'partnumber': 'category', 'site_code': 'category'})
+
+    processor = BatchProcessor(**settings)
+    plan = processor.build_plan(df)
+    partitions = processor.create_partitions(df)
+
+    assert [p['selector'] for p in plan['partitions']] == [p['selector'] for p in partitions]
+    assert [p['metadata'] for p in plan['partitions']] == [p['metadata'] for p in partitions]
+    assert plan['time_estimate'] == processor.estimate_processing_time(partitions)
@@ -0,0 +1,92 @@
+# backend/tests/test_candidate_pool.py
+"""Parallel candidate selection (candidate_pool.fit_candidates / candidate_selection='parallel')"""
+
+import multiprocessing as mp
+import time
+
+import numpy as np
+import pytest
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.linear_model import Ridge
+
+from app.core.candidate_pool import fit_candidates
+from app.core.ml_engine import MLForecaster
+from app.core.preprocessing import prepare_features, preprocess_data
+from conftest import make_history
+
+
+class SlowRegressor(BaseEstimator, RegressorMixin):
+    def __init__(self, seconds=30.0):
+        self.seconds = seconds
+
+    def fit(self, X, y):
+        time.sleep(self.seconds)
+        return self
+
+    def predict(self, X):
+        return np.zeros(len(X))
+
+
+class BrokenRegressor(SlowRegressor):
+    def fit(self, X, y):
+        raise RuntimeError("boom")
+
+
+def test_fit_candidates_budget_and_errors():
+    rng = np.random.default_rng(0)
+    X, y = rng.normal(size=(200, 5)), rng.normal(size=200)
+    candidates = {'ridge': Ridge(alpha=1.0), 'slow': SlowRegressor(), 'broken': BrokenRegressor()}
+
+    start = time.monotonic()
+    fitted, dropped = fit_candidates(candidates, X[:150], y[:150], X[150:], budget_s=2, workers=3)
+    assert time.monotonic() - start < 15
+
+    assert set(fitted) == {'ridge'} and set(dropped) == {'slow', 'broken'}
+    assert 'exceeded budget' in dropped['slow']
+    assert 'RuntimeError: boom' in dropped['broken']
+    est, y_pred, _ = fitted['ridge']
+    np.testing.assert_allclose(y_pred, Ridge(alpha=1.0).fit(X[:150], y[:150]).predict(X[150:]))
+    np.testing.assert_allclose(est.predict(X[150:]), y_pred)
+
+
+def _fit_in_daemon(conn):
+    """Seperti task di worker Celery prefork (process daemon)"""
+    rng = np.random.default_rng(0)
+    X, y = rng.normal(size=(200, 5)), rng.normal(size=200)
+    start = time.monotonic()
+    fitted, dropped = fit_candidates({'ridge': Ridge(alpha=1.0), 'slow': SlowRegressor()},
+                                     X[:150], y[:150], X[150:], budget_s=2, workers=2)
+    conn.send((sorted(fitted), dropped, time.monotonic() - start))
+    conn.close()
+
+
+@pytest.mark.skipif('fork' not in mp.get_all_start_methods(), reason="butuh fork")
+def test_budget_enforced_inside_daemon_process():
+    ctx = mp.get_context('fork')
+    recv_conn, send_conn = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_fit_in_daemon, args=(send_conn,), daemon=True)
+    proc.start()
+    send_conn.close()
+    assert recv_conn.poll(25), "fit_candidates di process daemon tidak selesai dalam budget"
+    fitted, dropped, elapsed = recv_conn.recv()
+    proc.join()
+
+    assert fitted == ['ridge'] and set(dropped) == {'slow'}
+    assert dropped['slow'] == 'exceeded budget (2s)'
+    assert elapsed < 15
+
+
+def test_parallel_selection_keeps_ridge_result():
+    df_fe = prepare_features(preprocess_data(make_history(12, 70, seed=6, n_sites=2, missing=0.15, categorical=False)),
+                             ['partnumber', 'site_code'], assume_sorted=True)
+    ridge = MLForecaster({'forecast_horizon': 7})
+    ridge.train_and_select_model(df_fe)
+    parallel = MLForecaster({'forecast_horizon': 7, 'candidate_selection': 'parallel',
+                             'candidate_budget_seconds': 20})
+    parallel.train_and_select_model(df_fe)
+
+    assert 'Ridge_log' in parallel.metrics_history and len(parallel.metrics_history) > 1
+    best = min(parallel.metrics_history, key=lambda n: parallel.metrics_history[n]['rounded']['MAPE%'])
+    assert parallel.best_model_name == best
+    assert parallel.metrics_history['Ridge_log']['rounded']['MAPE%'] == pytest.approx(
+        ridge.metrics_history['Ridge_log']['rounded']['MAPE%'], rel=1e-9)
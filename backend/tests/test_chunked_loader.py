@@ -0,0 +1,42 @@
+# backend/tests/test_chunked_loader.py
+"""load_and_aggregate_chunked vs load_and_normalize (whole file), setelah preprocess_data"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.preprocessing import load_and_aggregate_chunked, load_and_normalize, preprocess_data
+from conftest import make_history, write_upload
+
+
+def upload(tmp_path, fractional, seed=9):
+    """Upload acak dengan key duplikat (beberapa transaksi per hari) tersebar di banyak chunk"""
+    rng = np.random.default_rng(seed)
+    df = make_history(30, 45, seed=seed, n_sites=3, missing=0.15, categorical=False)
+    df = pd.concat([df, df.sample(frac=0.5, random_state=seed)], ignore_index=True)
+    if fractional:
+        df['demand_qty'] = df['demand_qty'] * rng.uniform(0.1, 1.7, len(df))
+    return write_upload(df.sample(frac=1.0, random_state=seed), tmp_path / 'upload.csv')
+
+
+@pytest.mark.parametrize('fractional', [False, True])
+@pytest.mark.parametrize('chunk_rows', [97, 1000, 500_000])
+def test_chunked_matches_whole_file(tmp_path, fractional, chunk_rows):
+    path = upload(tmp_path, fractional)
+    expected = preprocess_data(load_and_normalize(path), assume_sorted=True)
+    got = preprocess_data(load_and_aggregate_chunked(path, chunk_rows=chunk_rows), assume_sorted=True)
+
+    pd.testing.assert_frame_equal(got.drop(columns='demand_qty'), expected.drop(columns='demand_qty'))
+    if fractional:
+        # Urutan penjumlahan per chunk berbeda: sama dalam toleransi floating point
+        np.testing.assert_allclose(got['demand_qty'], expected['demand_qty'], rtol=1e-12, atol=1e-12)
+    else:
+        np.testing.assert_array_equal(got['demand_qty'], expected['demand_qty'])
+
+
+def test_chunked_raises_like_whole_file(tmp_path):
+    path = tmp_path / 'upload.csv'
+    path.write_text('partnumber,site_code,qty\nP1,S1,1\n')
+    for loader in (load_and_normalize, load_and_aggregate_chunked):
+        with pytest.raises(ValueError, match='Kolom wajib hilang'):
+            loader(str(path))
@@ -0,0 +1,102 @@
+# backend/tests/test_distributed_ridge.py
+"""distributed_training: map-reduce statistik Ridge_log vs fit satu process"""
+
+import numpy as np
+import pandas as pd
+
+from app.core.batch_processor import BatchProcessor
+from app.core.ml_engine import MLForecaster
+from app.core.preprocessing import feature_spec, prepare_features, preprocess_data
+from conftest import make_history
+
+CONFIG = {'forecast_horizon': 7}
+GROUP_COLS = ['partnumber', 'site_code']
+
+
+def upload():
+    """Site S02 hanya punya 40 hari terakhir (di bawah 56 hari auto_adjust)"""
+    df = make_history(30, 100, seed=5, n_sites=3, missing=0.15, categorical=False)
+    short = (df['site_code'] == 'S02') & (df['date'] < df['date'].max() - pd.Timedelta(days=39))
+    return df[~short].reset_index(drop=True)
+
+
+def map_reduce(df, spec, parts=None):
+    """Emulasi fit_partition_stats_task per partition (default per site) + reduce_ridge_stats_task"""
+    cutoff = MLForecaster(CONFIG).training_cutoff(df['date'].max())
+    stats, valid = None, []
+    if parts is None:
+        parts = [part for _, part in df.groupby('site_code', sort=True)]
+    for part in parts:
+        part_fe = prepare_features(preprocess_data(part.reset_index(drop=True)), GROUP_COLS,
+                                   lags=spec[0], roll_windows=spec[1], auto_adjust=False, assume_sorted=True)
+        part_stats, part_valid = MLForecaster(CONFIG).accumulate_ridge_stats(part_fe, cutoff)
+        stats = part_stats if stats is None else stats.merge(part_stats)
+        valid.append(part_valid)
+    model = MLForecaster(CONFIG)
+    model.fit_from_ridge_stats(stats, pd.concat(valid, ignore_index=True))
+    return model
+
+
+def single_process(df):
+    df_fe = prepare_features(preprocess_data(df), GROUP_COLS, assume_sorted=True)
+    single = MLForecaster({**CONFIG, 'ridge_refit': 'incremental'})
+    single.train_and_select_model(df_fe)
+    return single, df_fe
+
+
+def assert_same_model(dist, single, df_fe):
+    assert dist.feature_cols_num == single.feature_cols_num
+    assert dist.ridge_stats.n_rows == single.ridge_stats.n_rows
+    assert dist.ridge_stats.matches_history(single.ridge_stats.checksum)
+    X = single._design_frame(df_fe)
+    np.testing.assert_allclose(np.log1p(dist.best_model.predict(X)),
+                               np.log1p(single.best_model.predict(X)), rtol=0, atol=1e-8)
+
+
+def test_map_reduce_matches_single_process_fit():
+    df = upload()
+    spec = feature_spec(df, GROUP_COLS)
+    assert spec == ((1, 7, 14, 28), (7, 14, 28))
+
+    dist = map_reduce(df, spec)
+
+    single, df_fe = single_process(df)
+    assert_same_model(dist, single, df_fe)
+
+
+def test_auto_partitions_keep_series_whole(tmp_path):
+    df = upload().sort_values(GROUP_COLS + ['date']).reset_index(drop=True)
+    max_rows = 700
+    # Row range per max_rows baris akan memotong series di tengah
+    cut = np.arange(max_rows, len(df), max_rows)
+    assert (df['partnumber'].iloc[cut].to_numpy() == df['partnumber'].iloc[cut - 1].to_numpy()).any()
+
+    processor = BatchProcessor(max_rows_per_job=max_rows, partition_by='auto', max_partitions=20)
+    plan = processor.build_plan(df)
+    processor.write_partitions(df, plan, tmp_path)
+    parts = [BatchProcessor.read_partition(tmp_path, p['partition_id']) for p in plan['partitions']]
+    assert len(parts) > 1
+
+    owners = pd.concat([p[GROUP_COLS].drop_duplicates().assign(pid=i) for i, p in enumerate(parts)])
+    assert not owners.duplicated(GROUP_COLS).any()
+    assert sum(map(len, parts)) == len(df)
+
+    dist = map_reduce(df, feature_spec(df, GROUP_COLS), parts)
+    single, df_fe = single_process(df)
+    assert_same_model(dist, single, df_fe)
+
+
+def test_saved_model_records_feature_spec(tmp_path):
+    df = upload()
+    short = df[df['site_code'] == 'S02'].reset_index(drop=True)
+    spec = feature_spec(short, GROUP_COLS)
+    assert spec != ((1, 7, 14, 28), (7, 14, 28))
+
+    model = MLForecaster(CONFIG)
+    model.train_and_select_model(prepare_features(preprocess_data(short), GROUP_COLS, assume_sorted=True))
+    model.save_model(str(tmp_path / 'model.pkl'))
+
+    loaded = MLForecaster(CONFIG)
+    loaded.load_model(str(tmp_path / 'model.pkl'), use_cache=False)
+    assert loaded.feature_cols_num == model.feature_cols_num
+    assert loaded._lag_spec() == spec
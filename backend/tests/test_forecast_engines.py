@@ -0,0 +1,120 @@
+# backend/tests/test_forecast_engines.py
+"""Recursive forecast engines vs reference loop (concat history + groupby shift/rolling)"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.ml_engine import MLForecaster
+from app.core.preprocessing import add_calendar_features, prepare_features, preprocess_data
+from conftest import make_history
+
+GROUP_COLS = ['partnumber', 'site_code']
+CONFIG = {'forecast_horizon': 10}
+
+
+def reference_forecast(model, df_full, start_offset_days):
+    """Loop forecast versi awal: concat history per hari, feature via groupby, pipeline.predict"""
+    lags, roll_windows = model._lag_spec()
+    lagroll = [c for c in model.feature_cols_num if c.startswith(('lag_', 'rollmean_'))]
+    history = df_full[GROUP_COLS + ['date', 'demand_qty']].astype({c: str for c in GROUP_COLS})
+    combos = history[GROUP_COLS].drop_duplicates().reset_index(drop=True)
+    start = history['date'].max() + pd.Timedelta(days=start_offset_days)
+
+    def one_day(fdate):
+        hist = history.sort_values(GROUP_COLS + ['date']).reset_index(drop=True)
+        g = hist.groupby(GROUP_COLS)['demand_qty']
+        for L in lags:
+            hist[f'lag_{L}'] = g.shift(L)
+        for W in roll_windows:
+            hist[f'rollmean_{W}'] = g.transform(lambda s: s.shift(1).rolling(W).mean())
+        latest = hist.groupby(GROUP_COLS, as_index=False).tail(1)[GROUP_COLS + lagroll]
+        day = add_calendar_features(combos.assign(date=fdate)).merge(latest, on=GROUP_COLS, how='left')
+        day[lagroll] = day[lagroll].fillna(0)
+        raw = np.maximum(0, model.best_model.predict(day[model.feature_cols_cat + model.feature_cols_num]))
+        thr = np.where(raw < model.zero_threshold, 0, raw)
+        return day.assign(yhat_raw=raw, yhat_thr=thr, yhat_round=np.floor(thr + 0.5).astype(int))
+
+    out = []
+    fdate = history['date'].max() + pd.Timedelta(days=1)
+    while fdate < start + pd.Timedelta(days=model.forecast_horizon):
+        day = one_day(fdate)
+        if fdate >= start:
+            out.append(day)
+        history = pd.concat([history, day[GROUP_COLS + ['date']].assign(demand_qty=day['yhat_round'])],
+                            ignore_index=True)
+        fdate += pd.Timedelta(days=1)
+    return comparable(pd.concat(out, ignore_index=True))
+
+
+def comparable(df):
+    df = df[GROUP_COLS + ['date', 'yhat_raw', 'yhat_thr', 'yhat_round']].astype({c: str for c in GROUP_COLS})
+    return df.sort_values(GROUP_COLS + ['date']).reset_index(drop=True)
+
+
+@pytest.fixture(scope='module')
+def trained():
+    history = make_history(30, 80, seed=11, n_sites=3, missing=0.15, categorical=False)
+    # Series dengan panjang history berbeda (mulai belakangan)
+    late = (history['partnumber'] == 'P000003') & (history['date'] < history['date'].min() + pd.Timedelta(days=30))
+    df = preprocess_data(history[~late])
+    model = MLForecaster(CONFIG)
+    model.train_and_select_model(prepare_features(df, GROUP_COLS, assume_sorted=True))
+    return model, df
+
+
+def forecast(trained, start_offset_days, **config):
+    model, df = trained
+    engine = MLForecaster({**CONFIG, **config})
+    engine.best_model, engine.feature_cols_num = model.best_model, model.feature_cols_num
+    engine._compile_scorer()
+    return comparable(engine.forecast(df, start_offset_days=start_offset_days))
+
+
+def assert_same_forecast(got, expected):
+    # Nilai raw sama dalam toleransi floating point; yhat_round (hasil yang dipakai) harus sama persis
+    assert expected['yhat_round'].sum() > 0
+    pd.testing.assert_frame_equal(got.drop(columns=['yhat_raw', 'yhat_thr', 'yhat_round']),
+                                  expected.drop(columns=['yhat_raw', 'yhat_thr', 'yhat_round']))
+    np.testing.assert_allclose(got['yhat_raw'], expected['yhat_raw'], rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(got['yhat_thr'], expected['yhat_thr'], rtol=1e-9, atol=1e-12)
+    np.testing.assert_array_equal(got['yhat_round'], expected['yhat_round'])
+
+
+@pytest.mark.parametrize('start_offset_days', [1, 4])
+def test_incremental_engine_matches_reference(trained, start_offset_days):
+    expected = reference_forecast(trained[0], trained[1], start_offset_days)
+    assert_same_forecast(forecast(trained, start_offset_days, forecast_engine='incremental',
+                                  compiled_scorer=False), expected)
+
+
+@pytest.mark.parametrize('start_offset_days', [1, 4])
+def test_history_store_engine_matches_reference(trained, start_offset_days):
+    expected = reference_forecast(trained[0], trained[1], start_offset_days)
+    assert_same_forecast(forecast(trained, start_offset_days, forecast_engine='dataframe',
+                                  compiled_scorer=False), expected)
+
+
+@pytest.mark.parametrize('engine', ['dataframe', 'incremental'])
+def test_compiled_scorer_forecast_matches_reference(trained, engine):
+    expected = reference_forecast(trained[0], trained[1], 4)
+    assert_same_forecast(forecast(trained, 4, forecast_engine=engine, compiled_scorer=True), expected)
+
+
+def test_history_store_forecast_skips_per_day_series_scan(trained, monkeypatch):
+    """forecast() memakai combos sekali per run; one_day_forecast tidak scan df_sites per hari"""
+    expected = reference_forecast(trained[0], trained[1], 4)
+    calls = []
+    original = pd.DataFrame.drop_duplicates
+
+    def counting(self, *args, **kwargs):
+        calls.append(len(self))
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(pd.DataFrame, 'drop_duplicates', counting)
+    got = forecast(trained, 4, forecast_engine='dataframe', compiled_scorer=False)
+    monkeypatch.undo()
+
+    assert_same_forecast(got, expected)
+    # Hanya drop_duplicates di forecast() (satu kali atas history)
+    assert calls.count(len(trained[1])) == 1
@@ -0,0 +1,101 @@
+# backend/tests/test_history_store.py
+"""DemandHistoryStore: append delta + load_preprocessed vs preprocess_data atas upload penuh"""
+
+import numpy as np
+import pandas as pd
+
+from app.core.history_store import append_and_load
+from app.core.preprocessing import preprocess_data
+from conftest import make_history
+
+
+def as_upload(df):
+    """Keys category seperti output load_and_normalize"""
+    return df.astype({'partnumber': 'category', 'site_code': 'category'}).reset_index(drop=True)
+
+
+def comparable(df):
+    df = df[['partnumber', 'site_code', 'date', 'demand_qty']].astype(
+        {'partnumber': str, 'site_code': str, 'demand_qty': np.float64})
+    return df.sort_values(['partnumber', 'site_code', 'date']).reset_index(drop=True)
+
+
+def test_append_and_load_matches_full_preprocess(tmp_path):
+    history = make_history(24, 60, seed=7, n_sites=3, missing=0.15, categorical=False)
+    day = (history['date'] - history['date'].min()).dt.days
+
+    # Series baru muncul di delta ke-2, sebagian series kosong beberapa hari di antara delta
+    history = history[~((history['partnumber'] == 'P000005') & (day < 52))
+                      & ~((history['partnumber'] == 'P000002') & day.between(45, 54))]
+    day = (history['date'] - history['date'].min()).dt.days
+
+    resent = history[day == 57].assign(demand_qty=lambda d: d['demand_qty'] * 3 + 1)
+    extra = resent.iloc[:1].assign(partnumber='P000999')
+    deltas = [
+        history[day < 50],
+        # Baris duplikat dalam satu upload dijumlahkan
+        pd.concat([history[day.between(50, 54)], history[day == 52].iloc[:5]]),
+        history[(day >= 55) & (history['site_code'] != 'S02')],
+        history[(day >= 55) & (history['site_code'] == 'S02')],
+        # Upload ulang hari 57: nilai baru menggantikan nilai lama untuk key yang sama
+        pd.concat([resent, extra]),
+    ]
+
+    full = []
+    for delta in deltas:
+        delta = as_upload(delta)
+        full.append(delta)
+        got = append_and_load(delta, root=tmp_path / 'history')
+
+        # Upload penuh: per (partnumber, site_code, date) upload terakhir yang menang
+        daily = [d.groupby(['partnumber', 'site_code', 'date'], observed=True, as_index=False)['demand_qty'].sum()
+                 for d in full]
+        merged = (pd.concat([d.astype({'partnumber': str, 'site_code': str}) for d in daily], ignore_index=True)
+                  .drop_duplicates(['partnumber', 'site_code', 'date'], keep='last'))
+        expected = preprocess_data(as_upload(merged))
+        expected = expected[expected['site_code'].astype(str).isin(delta['site_code'].astype(str).unique())]
+
+        pd.testing.assert_frame_equal(comparable(got), comparable(expected), check_exact=False, rtol=1e-12)
+
+
+def test_refresh_appends_completed_segments(tmp_path, monkeypatch):
+    from app.core import history_store
+
+    monkeypatch.setattr(history_store, 'COMPACT_SEGMENTS', 3)
+    history = as_upload(make_history(12, 40, seed=3, n_sites=2, missing=0.15, categorical=False))
+    day = (history['date'] - history['date'].min()).dt.days
+    store = history_store.DemandHistoryStore(tmp_path / 'history')
+    site_dir = store.site_dir('S00')
+
+    store.append(history[day < 30])
+    store.load_preprocessed()
+    for d in range(30, 40):
+        before = {p.name: p.stat().st_mtime_ns for p in site_dir.glob('completed-*.feather')}
+        got = append_and_load(history[day == d], root=tmp_path / 'history')
+        after = {p.name: p.stat().st_mtime_ns for p in site_dir.glob('completed-*.feather')}
+
+        if len(before) < 3:
+            # Refresh harian: segment lama tidak ditulis ulang, satu segment baru
+            assert {k: after[k] for k in before} == before
+            assert len(after) == len(before) + 1
+        else:
+            # Compact setelah COMPACT_SEGMENTS segment
+            assert len(after) == 1 and not set(after) & set(before)
+
+        expected = preprocess_data(history[day <= d])
+        pd.testing.assert_frame_equal(comparable(got), comparable(expected), check_exact=False, rtol=1e-12)
+
+
+def test_load_preprocessed_with_clip_bounds(tmp_path):
+    history = as_upload(make_history(12, 40, seed=4, n_sites=2, missing=0.15, categorical=False))
+    day = (history['date'] - history['date'].min()).dt.days
+    _, bounds = preprocess_data(history[day < 35], return_bounds=True)
+    bounds = bounds.iloc[::2] * 0.5      # sebagian series memakai batas tersimpan
+
+    append_and_load(history[day < 35], root=tmp_path / 'history')
+    got, got_bounds = append_and_load(history[day >= 35], root=tmp_path / 'history',
+                                      clip_bounds=bounds, return_bounds=True)
+    expected, expected_bounds = preprocess_data(history, clip_bounds=bounds, return_bounds=True)
+
+    pd.testing.assert_frame_equal(comparable(got), comparable(expected), check_exact=False, rtol=1e-12)
+    pd.testing.assert_series_equal(got_bounds, expected_bounds.sort_index(), check_exact=False, rtol=1e-12)
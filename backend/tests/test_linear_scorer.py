@@ -0,0 +1,52 @@
+# backend/tests/test_linear_scorer.py
+"""LinearScorer (compiled Ridge_log) vs sklearn pipeline.predict"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.pipeline import Pipeline
+
+from app.core.linear_scorer import LinearScorer
+from app.core.ml_engine import MLForecaster
+from app.core.preprocessing import prepare_features, preprocess_data
+from conftest import make_history
+
+
+@pytest.fixture(scope='module')
+def df_fe():
+    return prepare_features(preprocess_data(make_history(36, 70, seed=4, n_sites=3, missing=0.15, categorical=False)),
+                            ['partnumber', 'site_code'], assume_sorted=True)
+
+
+def with_unknown_categories(X):
+    """Sebagian baris dengan partnumber / site yang tidak ada saat training"""
+    X = X.astype({'partnumber': object, 'site_code': object})
+    X.iloc[::7, X.columns.get_loc('partnumber')] = 'P_NEW'
+    X.iloc[::11, X.columns.get_loc('site_code')] = 'S_NEW'
+    return X
+
+
+@pytest.mark.parametrize('sparse_training', [False, True])
+@pytest.mark.parametrize('keys', [object, 'category'])
+def test_compiled_scorer_matches_pipeline(df_fe, sparse_training, keys):
+    model = MLForecaster({'forecast_horizon': 7, 'sparse_training': sparse_training})
+    model.train_and_select_model(df_fe)
+    scorer = model.linear_scorer
+    assert isinstance(scorer, LinearScorer) and scorer.inverse == 'expm1'
+
+    X = with_unknown_categories(model._design_frame(df_fe)).astype({'partnumber': keys, 'site_code': keys})
+    expected = model.best_model.predict(X)
+    np.testing.assert_allclose(scorer.predict(X), expected, rtol=1e-12, atol=1e-12)
+    # Offset per baris yang dihitung di muka memberi hasil yang sama
+    np.testing.assert_allclose(scorer.predict(X, base=scorer.base_offsets(X)), expected, rtol=1e-12, atol=1e-12)
+
+
+def test_non_linear_pipeline_is_not_compiled(df_fe):
+    model = MLForecaster({'forecast_horizon': 7})
+    model.feature_cols_cat, model.feature_cols_num = ['partnumber', 'site_code'], [
+        c for c in df_fe.columns if c not in ('partnumber', 'site_code', 'date', 'demand_qty')]
+    prep = model._build_candidate_models()['Ridge_log'].steps[0][1]
+    forest = Pipeline([('prep', prep), ('reg', RandomForestRegressor(n_estimators=2, random_state=0))])
+    forest.fit(model._design_frame(df_fe), df_fe['demand_qty'])
+    assert LinearScorer.from_pipeline(forest) is None
@@ -0,0 +1,35 @@
+# backend/tests/test_model_format.py
+"""save_model / load_model dengan model_format='mmap'"""
+
+import numpy as np
+
+from app.core.ml_engine import MLForecaster
+from app.core.model_cache import _iter_estimators
+from app.core.preprocessing import prepare_features, preprocess_data
+from conftest import make_history
+
+
+def category_dtypes(model):
+    return [cats.dtype for est in _iter_estimators(model) if hasattr(est, 'categories_')
+            for cats in est.categories_]
+
+
+def test_mmap_save_leaves_in_memory_model_unchanged(tmp_path):
+    df_fe = prepare_features(preprocess_data(make_history(36, 70, seed=0, n_sites=3, missing=0.15, categorical=False)), ['partnumber', 'site_code'],
+                             assume_sorted=True)
+    model = MLForecaster({'forecast_horizon': 7, 'model_format': 'mmap'})
+    model.train_and_select_model(df_fe)
+    before = category_dtypes(model.best_model)
+    X = model._design_frame(df_fe)
+    y_before = model.best_model.predict(X)
+
+    model.save_model(str(tmp_path / 'model.pkl'))
+
+    assert before and all(dtype == object for dtype in before)
+    assert category_dtypes(model.best_model) == before
+    np.testing.assert_array_equal(model.best_model.predict(X), y_before)
+
+    loaded = MLForecaster({'forecast_horizon': 7})
+    loaded.load_model(str(tmp_path / 'model.pkl'), use_cache=False)
+    assert all(dtype.kind == 'U' for dtype in category_dtypes(loaded.best_model))
+    np.testing.assert_array_equal(loaded.best_model.predict(X), y_before)
@@ -0,0 +1,82 @@
+# backend/tests/test_quantile_clip.py
+"""groupwise_quantile vs groupby().quantile dan fused_clip vs clip default"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.preprocessing import groupwise_quantile, preprocess_data
+from conftest import make_history
+
+
+def sample(kind, seed=0):
+    """values, group ids dan n_groups untuk satu skenario"""
+    rng = np.random.default_rng(seed)
+    n_groups = 40
+    sizes = rng.integers(1, 60, size=n_groups)
+    if kind == 'single_row':
+        sizes[::3] = 1
+    gid = np.repeat(np.arange(n_groups), sizes)
+    if kind == 'ties':
+        values = rng.integers(0, 3, size=len(gid)).astype(float)
+    else:
+        values = rng.gamma(0.8, 2.0, size=len(gid))
+    if kind == 'nan':
+        values[rng.random(len(gid)) < 0.2] = np.nan
+        values[gid == 5] = np.nan          # group seluruhnya NaN
+    order = rng.permutation(len(gid))
+    return values[order], gid[order], n_groups
+
+
+@pytest.mark.parametrize('q', [0.5, 0.99])
+@pytest.mark.parametrize('kind', ['continuous', 'ties', 'nan', 'single_row'])
+def test_groupwise_quantile_matches_groupby(kind, q):
+    values, gid, n_groups = sample(kind)
+    result = groupwise_quantile(values, gid, n_groups, q=q)
+    grouped = pd.Series(values).groupby(gid)
+
+    # Identik dengan implementasi notebook (Series.quantile per group)
+    notebook = grouped.transform(lambda s: s.quantile(q)).groupby(gid).first()
+    np.testing.assert_array_equal(result, notebook.reindex(range(n_groups)).to_numpy())
+
+    # groupby().quantile memakai rumus lerp sendiri: beda paling banyak 1 ulp,
+    # identik untuk nilai integer (demand_qty)
+    expected = grouped.quantile(q).reindex(range(n_groups)).to_numpy()
+    if kind == 'ties':
+        np.testing.assert_array_equal(result, expected)
+    else:
+        np.testing.assert_allclose(result, expected, rtol=1e-15, atol=0)
+
+
+@pytest.mark.parametrize('kind', ['continuous', 'ties', 'single_row'])
+def test_implicit_zeros_match_explicit(kind):
+    values, gid, n_groups = sample(kind, seed=1)
+    zeros = np.random.default_rng(2).integers(0, 10, size=n_groups)
+    explicit_vals = np.r_[values, np.zeros(zeros.sum())]
+    explicit_gid = np.r_[gid, np.repeat(np.arange(n_groups), zeros)]
+    expected = (pd.Series(explicit_vals).groupby(explicit_gid)
+                .apply(lambda s: s.quantile(0.99)).to_numpy())
+    result = groupwise_quantile(values, gid, n_groups, q=0.99, implicit_zeros=zeros)
+    np.testing.assert_array_equal(result, expected)
+
+
+@pytest.mark.parametrize('missing', [0.0, 0.15, 0.6])
+@pytest.mark.parametrize('categorical', [False, True])
+def test_fused_clip_matches_default(missing, categorical):
+    df = make_history(24, 60, seed=9, n_sites=3, missing=missing, categorical=categorical)
+    df.loc[df.sample(5, random_state=0).index, 'demand_qty'] = np.nan
+    df = df.sample(frac=1.0, random_state=1).reset_index(drop=True)
+
+    default = preprocess_data(df)
+    fused = preprocess_data(df, fused_clip=True)
+    pd.testing.assert_frame_equal(fused, default)
+
+    # default path = notebook: clip ke p99 per series dari completed frame
+    unclipped = default.copy()
+    raw = (df.groupby(['partnumber', 'site_code', 'date'], observed=True)['demand_qty']
+           .sum().rename('raw'))
+    unclipped = unclipped.merge(raw.reset_index(), on=['partnumber', 'site_code', 'date'], how='left')
+    unclipped['raw'] = unclipped['raw'].fillna(0.0)
+    p99 = unclipped.groupby(['partnumber', 'site_code'], observed=True)['raw'].transform('quantile', 0.99)
+    np.testing.assert_array_equal(default['demand_qty'].to_numpy(),
+                                  unclipped['raw'].clip(lower=0, upper=p99).to_numpy())
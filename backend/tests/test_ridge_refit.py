@@ -0,0 +1,94 @@
+# backend/tests/test_ridge_refit.py
+"""ridge_refit='incremental' vs refit penuh"""
+
+import numpy as np
+import pytest
+
+from app.core.ml_engine import MLForecaster
+from app.core.preprocessing import prepare_features, preprocess_data
+from conftest import make_history
+
+CONFIG = {'forecast_horizon': 7}
+GROUP_COLS = ['partnumber', 'site_code']
+
+
+def features(df):
+    return prepare_features(preprocess_data(df), GROUP_COLS, assume_sorted=True)
+
+
+def trained(df_fe, stats=None, clip_bounds=None, **config):
+    model = MLForecaster({**CONFIG, **config})
+    model.ridge_stats = stats
+    model.train_and_select_model(df_fe, clip_bounds=clip_bounds)
+    return model
+
+
+def log_scores(model, df_fe):
+    return np.log1p(model.best_model.predict(model._design_frame(df_fe)))
+
+
+@pytest.fixture(scope='module')
+def history():
+    df = make_history(36, 120, seed=3, n_sites=3, missing=0.15, categorical=False)
+    # Spike di hari terakhir menggeser batas clip p99 series tersebut
+    last = df['date'] == df['date'].max()
+    df.loc[last.idxmax(), 'demand_qty'] = 500.0
+    return df
+
+
+def test_incremental_matches_full_refit_when_clip_bound_moves(history, capsys):
+    seed = trained(features(history[history['date'] < history['date'].max()]), ridge_refit='incremental')
+    df_fe = features(history)
+
+    inc = trained(df_fe, seed.ridge_stats, ridge_refit='incremental')
+    assert 'rebuilding' in capsys.readouterr().out
+    scratch = trained(df_fe, ridge_refit='incremental')
+    full = trained(df_fe)
+
+    assert inc.ridge_stats.n_rows == scratch.ridge_stats.n_rows
+    np.testing.assert_allclose(log_scores(inc, df_fe), log_scores(scratch, df_fe), rtol=0, atol=1e-9)
+    np.testing.assert_allclose(log_scores(inc, df_fe), log_scores(full, df_fe), rtol=0, atol=1e-3)
+
+
+def test_incremental_continues_when_old_rows_unchanged(history, capsys):
+    df_fe = features(history)
+    prev = df_fe[df_fe['date'] < df_fe['date'].max()].reset_index(drop=True)
+    seed = trained(prev, ridge_refit='incremental')
+    capsys.readouterr()
+
+    inc = trained(df_fe, seed.ridge_stats, ridge_refit='incremental')
+    out = capsys.readouterr().out
+    assert 'rebuilding' not in out
+    assert f"({seed.ridge_stats.n_rows} already accumulated)" in out
+
+    scratch = trained(df_fe, ridge_refit='incremental')
+    assert inc.ridge_stats.n_rows == scratch.ridge_stats.n_rows
+    np.testing.assert_allclose(log_scores(inc, df_fe), log_scores(scratch, df_fe), rtol=0, atol=1e-9)
+    assert inc.ridge_stats.matches_history(scratch.ridge_stats.checksum)
+
+
+def test_nightly_preprocess_with_stored_clip_bounds_stays_incremental(history, capsys):
+    prev = history[history['date'] < history['date'].max()]
+    df_prev, bounds = preprocess_data(prev, return_bounds=True)
+    seed = trained(prepare_features(df_prev, GROUP_COLS, assume_sorted=True), clip_bounds=bounds,
+                   ridge_refit='incremental')
+    assert seed.clip_bounds().equals(bounds)
+
+    # Tanpa batas tersimpan p99 sebagian besar series bergeser
+    _, fresh = preprocess_data(history, return_bounds=True)
+    assert (fresh.reindex(bounds.index) != bounds).mean() > 0.1
+
+    # Upload diperpanjang satu hari, preprocess ulang dengan batas dari model
+    df_next, next_bounds = preprocess_data(history, clip_bounds=seed.clip_bounds(), return_bounds=True)
+    assert next_bounds.equals(bounds)
+    df_fe = prepare_features(df_next, GROUP_COLS, assume_sorted=True)
+    capsys.readouterr()
+
+    inc = trained(df_fe, seed.ridge_stats, clip_bounds=next_bounds, ridge_refit='incremental')
+    out = capsys.readouterr().out
+    assert 'rebuilding' not in out
+    assert f"({seed.ridge_stats.n_rows} already accumulated)" in out
+
+    scratch = trained(df_fe, ridge_refit='incremental')
+    assert inc.ridge_stats.n_rows == scratch.ridge_stats.n_rows
+    np.testing.assert_allclose(log_scores(inc, df_fe), log_scores(scratch, df_fe), rtol=0, atol=1e-9)